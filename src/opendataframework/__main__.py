@@ -1,21 +1,27 @@
 """Main module."""
 
 import csv
+import hashlib
 import json
 import os
 import re
 import shutil
 import stat
 import subprocess
+import tempfile
+import time
 import traceback
 import uuid
 import venv
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
 import typer
 from rich import print as rprint
+from rich.markup import escape
 from rich.prompt import Prompt
+from rich.table import Table
 
 from opendataframework import __version__
 
@@ -28,6 +34,7 @@ IGNORE_PATTERNS = (
     "venv",
 )
 SRC_PATH = Path(__file__).parent
+WORKERS = min(32, (os.cpu_count() or 1) + 4)
 
 
 def colorized_logo() -> str:
@@ -82,6 +89,41 @@ class Profile:
     RESEARCH: str = "research"
 
 
+class LinkMode:
+    """Link modes used to place data and model files into a project."""
+
+    COPY: str = "copy"
+    HARDLINK: str = "hardlink"
+    REFLINK: str = "reflink"
+    SYMLINK: str = "symlink"
+
+
+class Mode:
+    """Generation modes of per-entity components."""
+
+    # one service per entity
+    ENTITY: str = "entity"
+    # one service for all entities
+    CONSOLIDATED: str = "consolidated"
+
+
+class UID:
+    """Kinds of `API_POSTGRES` primary keys."""
+
+    # random
+    UUID4: str = "uuid4"
+    # time-ordered, append-mostly primary key index inserts
+    UUID7: str = "uuid7"
+    ULID: str = "ulid"
+
+
+class Disk:
+    """Kinds of `POSTGRES` host disks."""
+
+    HDD: str = "hdd"
+    SSD: str = "ssd"
+
+
 class Layer:
     """Layer names."""
 
@@ -107,6 +149,8 @@ class Component:
     R: str = "R"
 
     # STORAGE
+    DUCKDB: str = "duckdb"
+    PGBOUNCER: str = "pgbouncer"
     POSTGRES: str = "postgres"
 
     # UTILITY
@@ -115,6 +159,10 @@ class Component:
 
 
 PROJECT_NAME = "project_name"
+# read-only `DUCKDB` database folder, mounted into its readers
+DUCKDB_VOLUME = "./storage/duckdb/db:/db:ro"
+MANIFEST = "manifest.json"
+FRAGMENTS = ["setup.sh", "requirements.txt", "docker-compose.yaml"]
 JSON_INDENT = 2
 FILE_FORMATS = {
     ".csv",
@@ -125,12 +173,15 @@ COMPONENTS = {
     Layer.ANALYTICS: [Component.SUPERSET],
     Layer.DEVCONTAINERS: [Component.PYTHON, Component.R],
     Layer.API: [Component.API_POSTGRES, Component.INFERENCE],
-    Layer.STORAGE: [Component.POSTGRES],
+    Layer.STORAGE: [Component.POSTGRES, Component.PGBOUNCER, Component.DUCKDB],
     Layer.UTILITY: [Component.NGINX, Component.TEXLIVE],
 }
 
+# components generated once per entity, the rest are generated once per project
+ENTITY_COMPONENTS = {Component.API_POSTGRES, Component.INFERENCE}
+
 DEPENDENCIES = {
-    Component.API_POSTGRES: {Layer.STORAGE: [Component.POSTGRES]},
+    Component.API_POSTGRES: {Layer.STORAGE: [Component.POSTGRES, Component.PGBOUNCER]},
 }
 
 
@@ -143,6 +194,8 @@ DESCRIPTIONS = {
     Component.PYTHON: "VS Code devcontainer for Python",
     Component.R: "VS Code devcontainer for R",
     # STORAGE
+    Component.DUCKDB: "In-process columnar database for analytical queries",
+    Component.PGBOUNCER: "Lightweight connection pooler for PostgreSQL",
     Component.POSTGRES: "Advanced Relational Database",
     # UTILITY
     Component.NGINX: "HTTP and reverse proxy server",
@@ -157,12 +210,84 @@ PORTS = {
     Component.API_POSTGRES: "8000",
     Component.INFERENCE: "8000",
     # STORAGE
+    Component.PGBOUNCER: "6432",
     Component.POSTGRES: "5432",
     # UTILITY
     Component.NGINX: "80",
 }
 
 
+# Postgres column types of settings.json entity `columns`, besides `VARCHAR(n)` and
+# `ENUM(a,b,...)`
+COLUMN_TYPES = {
+    "BIGINT": "postgresql.BIGINT",
+    "DOUBLE PRECISION": "postgresql.DOUBLE_PRECISION",
+    "INTEGER": "postgresql.INTEGER",
+    "REAL": "postgresql.REAL",
+    "SMALLINT": "postgresql.SMALLINT",
+    "TEXT": "postgresql.TEXT",
+    "TIMESTAMP": "postgresql.TIMESTAMP",
+    "TIMESTAMPTZ": "postgresql.TIMESTAMP(timezone=True)",
+    "UUID": "postgresql.UUID(as_uuid=True)",
+}
+
+
+# rollup tables of `SUPERSET` datasets, by `date_trunc` field
+ROLLUPS = {"hourly": "hour", "daily": "day"}
+
+
+# defaults for settings.json `config`, which is optional
+CONFIG = {
+    # ANALYTICS
+    # `cache_url` is a redis url, filesystem caches by default. Timeouts are in
+    # seconds, `cache_timeouts` overrides them per dataset. `workers` run SQL
+    # Lab async queries, none runs them synchronously
+    Component.SUPERSET: {
+        "cache_url": "",
+        "cache_timeout": 300,
+        "rollup_cache_timeout": 3600,
+        "cache_timeouts": {},
+        "workers": 2,
+    },
+    # API
+    # `cache_url` is a redis url shared by workers, without it responses are
+    # cached in process, only if the service runs a single worker
+    Component.API_POSTGRES: {
+        "mode": Mode.ENTITY,
+        "uid": UID.UUID4,
+        "workers": 1,
+        "write_behind": False,
+        "cache_url": "",
+    },
+    Component.INFERENCE: {"mode": Mode.ENTITY, "workers": 1, "memory": 1024},
+    # STORAGE
+    # `api_reads` points api-postgres range reads at the read-only copy of
+    # new Postgres rows, appended every `refresh_s` seconds
+    Component.DUCKDB: {"parquet": False, "api_reads": False, "refresh_s": 300},
+    # server connections per database, shared by all clients
+    Component.PGBOUNCER: {"pool_size": 20, "reserve_pool_size": 5, "clients": 1000},
+    # host resources, `memory` in megabytes
+    Component.POSTGRES: {
+        "memory": 4096,
+        "cpus": 4,
+        "disk": Disk.SSD,
+        "connections": 100,
+    },
+    # UTILITY
+    # API reads are cached for `cache_ttl` seconds, 0 disables caching.
+    # `keepalive` idle connections are kept per API upstream
+    Component.NGINX: {"cache_ttl": 5, "cache_max_mb": 1024, "keepalive": 32},
+}
+
+
+# components whose generated files also depend on another component's config
+CONFIG_DEPENDENCIES = {
+    Component.API_POSTGRES: [Component.DUCKDB],
+    Component.PGBOUNCER: [Component.POSTGRES],
+    Component.NGINX: [Component.API_POSTGRES, Component.INFERENCE],
+}
+
+
 VOLUMES = {
     # UTILITY
     Component.TEXLIVE: {
@@ -220,6 +345,21 @@ LAYOUTS = {Layout.CUSTOM, Layout.RESEARCH}
 PROFILES = {Profile.CUSTOM, Profile.RESEARCH}
 
 
+MODES = {Mode.ENTITY, Mode.CONSOLIDATED}
+
+
+UIDS = {UID.UUID4, UID.UUID7, UID.ULID}
+
+
+DISKS = {Disk.HDD, Disk.SSD}
+
+
+LINK_MODES = {LinkMode.COPY, LinkMode.HARDLINK, LinkMode.REFLINK, LinkMode.SYMLINK}
+
+# linux `FICLONE` ioctl, shares file extents on copy-on-write filesystems
+FICLONE = 0x40049409
+
+
 BADGES = {
     Layer.ANALYTICS: "badge badge-info gap-2",
     Layer.API: "badge badge-accent gap-2",
@@ -238,10 +378,18 @@ class Field:
 
     TS_FRMTS = {"%Y-%m-%d %H:%M:%S", "%d.%m.%Y %H:%M:%S"}
 
+    INT32 = 2**31
+    ENUM_MAX_VALUES = 16
+
     def __init__(self):
         """Create field instance."""
         self._field_name = None
         self._field_type = None
+        self._min = None
+        self._max = None
+        self._length = 0
+        self._count = 0
+        self._values = set()
 
     @property
     def field_name(self) -> str:
@@ -288,6 +436,57 @@ class Field:
 
         self._field_type = "str"
 
+    def observe(self, value: str) -> None:
+        """Observe csv value, for range & length of the column type."""
+        if not value:
+            return
+
+        if self.field_type == "int":
+            try:
+                number = int(value)
+            except ValueError:
+                return
+            self._min = number if self._min is None else min(self._min, number)
+            self._max = number if self._max is None else max(self._max, number)
+        elif self.field_type == "str":
+            self._count += 1
+            self._length = max(self._length, len(value))
+            if len(self._values) <= self.ENUM_MAX_VALUES:
+                self._values.add(value)
+
+    def column_type(self, enums: bool = False, narrow: bool = False) -> str:
+        """Get Postgres column type of observed values.
+
+        Integers are `BIGINT` & strings `TEXT`, with `narrow` integers in range
+        are `INTEGER` & strings `VARCHAR` bounded by twice the longest value.
+        With `enums`, strings are enums when at most `ENUM_MAX_VALUES` values
+        repeat.
+        """
+        if self.field_type == "int":
+            if narrow and (
+                self._min is None or -self.INT32 <= self._min and self._max < self.INT32
+            ):
+                return "INTEGER"
+            return "BIGINT"
+
+        if self.field_type == "float":
+            return "DOUBLE PRECISION"
+
+        if self.field_type.startswith("datetime"):
+            return "TIMESTAMPTZ"
+
+        if (
+            enums
+            and len(self._values) <= self.ENUM_MAX_VALUES
+            and 2 * len(self._values) <= self._count
+            and all(re.match(r"^[\w .-]+$", value) for value in self._values)
+        ):
+            return f"ENUM({','.join(sorted(self._values))})"
+
+        if not narrow or not self._length:
+            return "TEXT"
+        return f"VARCHAR({max(16, 2 ** (2 * self._length - 1).bit_length())})"
+
     def to_dict(self) -> dict:
         """Create dict representation."""
         return {self.field_name: self.field_type}
@@ -309,6 +508,8 @@ class Entity:
 
         self._fields = {}
         self._layers = {}
+        self._enums = False
+        self._narrow = False
 
     @property
     def fields(self):
@@ -371,8 +572,15 @@ class Entity:
 
         self._path = path
 
-    def read(self, newline="") -> None:
-        """Read field names & types from csv."""
+    def read(self, newline="", enums: bool = False, narrow: bool = False) -> None:
+        """Read field names & types from csv.
+
+        Types are inferred from the first row, all rows are observed for
+        column types, low-cardinality strings are enums with `enums`, integers
+        & strings are narrowed to observed values with `narrow`.
+        """
+        self._enums = enums
+        self._narrow = narrow
         with open(self.path, newline=newline) as csv_file:
             reader = csv.DictReader(csv_file)
             try:
@@ -380,11 +588,18 @@ class Entity:
             except StopIteration:
                 return
 
+            fields = []
             for key, value in row.items():
                 field = Field()
                 field.field_name = key
                 field.field_type = value
+                field.observe(value)
                 self.add_field(field)
+                fields.append((key, field))
+
+            for row in reader:
+                for key, field in fields:
+                    field.observe(row[key])
 
     def add_field(self, field: Field, key: str = None) -> None:
         """Add field."""
@@ -400,6 +615,10 @@ class Entity:
                 "name": self.name,
                 "description": self.description,
                 "fields": {k: v.field_type for k, v in self.fields.items()},
+                "columns": {
+                    k: v.column_type(self._enums, self._narrow)
+                    for k, v in self.fields.items()
+                },
                 "layers": self.layers,
             }
         }
@@ -433,13 +652,22 @@ class Entity:
 class Project:
     """Project."""
 
-    def __init__(self, name: str, path: str = "", data: str = "", models: str = ""):
+    def __init__(
+        self,
+        name: str,
+        path: str = "",
+        data: str = "",
+        models: str = "",
+        link_mode: str = LinkMode.COPY,
+    ):
         """Create project instance."""
         self._name = None
         self._path = None
         self._profile = Profile.CUSTOM
         self._layout = Layout.CUSTOM
         self._models = None
+        self._workers = WORKERS
+        self._link_mode = LinkMode.COPY
 
         if data:
             self._data = os.path.join(os.getcwd(), data)
@@ -459,6 +687,7 @@ class Project:
             "ports": {},
         }
         self.name = name
+        self.link_mode = link_mode
         self.path = path
 
         self._api_ports = []
@@ -502,12 +731,16 @@ class Project:
             if not os.path.exists(self._data):
                 raise ValueError(f"{self._data} not found")
 
-            for file_name in os.listdir(self._data):
-                if file_name.endswith(".csv"):
-                    source_path = os.path.join(self._data)
-                    dest_path = os.path.join(data_path)
-                    self.copy(source_path, dest_path, file_name)
-                    rprint(f"{file_name}[green] copied to [/green]{dest_path}")
+            files = [
+                (self._data, data_path, file_name)
+                for file_name in os.listdir(self._data)
+                if file_name.endswith(".csv")
+            ]
+            # `data/` is bind-mounted into containers, absolute symlinks dangle
+            link_mode = self.link_mode
+            if link_mode == LinkMode.SYMLINK:
+                link_mode = LinkMode.HARDLINK
+            self.copy_all(files, link_mode)
 
         self._path = path
 
@@ -522,6 +755,7 @@ class Project:
             os.mkdir(models_path)
             rprint(f"{models_path}[green] created[/green]")
 
+            files = []
             for folder in os.listdir(self._models):
                 source_path = os.path.join(self._models, folder)
                 if os.path.isdir(source_path):
@@ -536,8 +770,50 @@ class Project:
                         ]
                         if not any(supported):
                             continue
-                        self.copy(source_path, dest_path, file_name)
-                        rprint(f"{file_name}[green] copied to [/green]{dest_path}")
+                        files.append((source_path, dest_path, file_name))
+            self.copy_all(files)
+
+    def copy_all(self, files: list, link_mode: str = None) -> None:
+        """Copy (from_path, to_path, file_name) files in parallel using link mode.
+
+        Project's link mode is used unless `link_mode` is given.
+        """
+        link_mode = link_mode or self.link_mode
+
+        def copy(args: tuple) -> None:
+            from_path, to_path, file_name = args
+            self.copy(from_path, to_path, file_name, link_mode=link_mode)
+            rprint(f"{file_name}[green] copied to [/green]{to_path}")
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            list(executor.map(copy, files))
+
+    @property
+    def link_mode(self) -> str:
+        """Get link mode used to place data and model files."""
+        return self._link_mode
+
+    @link_mode.setter
+    def link_mode(self, value: str) -> None:
+        """Set link mode used to place data and model files."""
+        value = value.strip().lower()
+        if value not in LINK_MODES:
+            raise ValueError(
+                f"Invalid link mode `{value}`. Valid modes are: {LINK_MODES}"
+            )
+        self._link_mode = value
+
+    @property
+    def workers(self) -> int:
+        """Get number of workers used to generate components."""
+        return self._workers
+
+    @workers.setter
+    def workers(self, value: int) -> None:
+        """Set number of workers used to generate components."""
+        if value < 1:
+            raise ValueError(f"Invalid number of workers: {value}")
+        self._workers = value
 
     @property
     def settings(self) -> dict:
@@ -663,6 +939,35 @@ class Project:
 
                 self._settings["ports"][component] = port
 
+    def config(self, component: str) -> dict:
+        """Get component config, settings.json `config` overrides the defaults."""
+        config = self.settings.get("config", {}).get(component, {})
+        return {**CONFIG.get(component, {}), **config}
+
+    def per_entity(self, component: str) -> bool:
+        """Check whether component is generated once per entity."""
+        if component not in ENTITY_COMPONENTS:
+            return False
+        return self.config(component).get("mode") != Mode.CONSOLIDATED
+
+    def api_port(self, component: str, plural_name: str) -> str:
+        """Get port serving entity's API component.
+
+        Consolidated services serve every entity on the lowest entity port.
+        """
+        entities = self.settings["entities"]
+        port = entities[plural_name]["layers"][Layer.API][component]["port"]
+        if self.per_entity(component):
+            return port
+        return min(
+            (
+                settings["layers"][Layer.API][component]["port"]
+                for settings in entities.values()
+                if component in settings["layers"].get(Layer.API, {})
+            ),
+            key=int,
+        )
+
     def register(self, entity: Entity):
         """Register entity."""
         if entity.plural_name in self.settings["entities"]:
@@ -842,7 +1147,7 @@ class Project:
 
         rprint(f"{self.name}: tests[green] created[/green]")
 
-    def init(self):
+    def init(self, enums: bool = False, narrow: bool = False):
         """Handler for `init` CLI command."""
         rprint()
         while True:
@@ -919,7 +1224,7 @@ class Project:
                         rprint(f"[bold red] {e} [/bold red]")
                         continue
 
-                entity.read()
+                entity.read(enums=enums, narrow=narrow)
 
                 for layer, components in COMPONENTS.items():
                     if not components:
@@ -962,9 +1267,18 @@ class Project:
         hooks: bool = True,
         workflows: bool = False,
         tests: bool = True,
+        workers: int = WORKERS,
+        incremental: bool = False,
     ):
         """Handler for `create` CLI command."""
+        self.workers = workers
         self.from_json()
+
+        manifest = self.from_manifest() if incremental else None
+        if manifest is not None:
+            self.update(manifest)
+            return
+
         self.add_layout()
         if docs:
             self.add_docs()
@@ -975,18 +1289,229 @@ class Project:
         if tests:
             self.add_tests()
 
-        layers = [
-            Analytics(project=self),
-            API(project=self),
-            Devcontainers(project=self),
-            Storage(project=self),
-            Utility(project=self),
-        ]
-
-        for layer in layers:
+        for layer in self.layers().values():
             layer()
 
+        units = self.units()
+        fragments = self.fragments(units)
+        requirements = self.requirements()
         self.collect()
+        self.to_manifest(units, fragments, requirements)
+
+    def update(self, manifest: dict):
+        """Regenerate only platform units whose inputs changed since `manifest`."""
+        to_path = os.path.join(self.path, PLATFORM_FOLDER)
+        previous = manifest.get("units", {})
+        units = self.units()
+
+        for key in previous:
+            if key not in units and os.path.exists(os.path.join(to_path, key)):
+                shutil.rmtree(os.path.join(to_path, key))
+                try:
+                    # drop component/layer dirs left empty
+                    os.removedirs(os.path.dirname(os.path.join(to_path, key)))
+                except OSError:
+                    pass
+                rprint(f"{os.path.join(to_path, key)}[green] removed[/green]")
+
+        changed = []
+        for key, unit in units.items():
+            previous_unit = previous.get(key)
+            if (
+                previous_unit
+                and previous_unit["settings"] == unit
+                and self.verify(to_path, previous_unit["files"])
+            ):
+                continue
+            if os.path.exists(os.path.join(to_path, key)):
+                shutil.rmtree(os.path.join(to_path, key))
+            changed.append(key)
+
+        layers = self.layers()
+        plan = {}
+        for key in changed:
+            layer, component, *plural_name = key.split("/")
+            plan.setdefault((layer, component), set()).update(plural_name)
+
+        for (layer, component), plural_names in plan.items():
+            generator = getattr(layers[layer], component.lower().replace("-", "_"))
+            if self.per_entity(component):
+                generator(plural_names=plural_names)
+            else:
+                generator()
+
+        # restore fragments of unchanged units, so merged files are complete
+        for key, unit in previous.items():
+            if key not in units or key in changed:
+                continue
+            for file_path, file_data in unit.get("fragments", {}).items():
+                with open(os.path.join(to_path, file_path), "w") as file:
+                    file.write(file_data)
+
+        # collect overwrites merged files, except ingest.py once api is gone
+        if os.path.exists(os.path.join(self.path, "ingest.py")):
+            os.remove(os.path.join(self.path, "ingest.py"))
+
+        requirements = manifest.get("requirements")
+        requirements_path = os.path.join(self.path, "requirements.txt")
+        if requirements is not None:
+            with open(requirements_path, "w") as file:
+                file.write(requirements)
+        elif os.path.exists(requirements_path):
+            os.remove(requirements_path)
+
+        fragments = self.fragments(units)
+        self.collect()
+        self.to_manifest(units, fragments, requirements)
+
+        rprint(
+            f"{self.name}: {len(changed)} of {len(units)} units[green] updated[/green]"
+        )
+
+    def layers(self) -> dict:
+        """Get layer instances."""
+        return {
+            Layer.ANALYTICS: Analytics(project=self),
+            Layer.API: API(project=self),
+            Layer.DEVCONTAINERS: Devcontainers(project=self),
+            Layer.STORAGE: Storage(project=self),
+            Layer.UTILITY: Utility(project=self),
+        }
+
+    def units(self) -> dict:
+        """Get platform units with the settings.json slice each unit is built from.
+
+        A unit is a directory under `platform/` produced by a single component,
+        either once per project or, for `ENTITY_COMPONENTS` not configured as
+        consolidated, once per entity.
+        """
+        entities = self.settings.get("entities", {})
+        units = {}
+
+        for layer, components in COMPONENTS.items():
+            for component in components:
+                registered = {
+                    plural_name: settings
+                    for plural_name, settings in entities.items()
+                    if component in settings["layers"].get(layer, {})
+                }
+                if not registered:
+                    continue
+
+                base = {
+                    "project": self.settings["project"],
+                    "layout": self.settings["layout"],
+                    "ports": self.settings["ports"],
+                    "mounts": self.settings["mounts"].get(component, {}),
+                    "volumes": self.settings["volumes"].get(component, {}),
+                    "config": {
+                        **self.config(component),
+                        **{
+                            name: self.config(name)
+                            for name in CONFIG_DEPENDENCIES.get(component, [])
+                        },
+                    },
+                }
+
+                if not self.per_entity(component):
+                    unit = {**base, "entities": registered}
+                    if component == Component.INFERENCE:
+                        unit["models"] = {
+                            plural_name: self.models(plural_name)
+                            for plural_name in registered
+                        }
+                    units[f"{layer}/{component}"] = unit
+                    continue
+
+                for plural_name, settings in registered.items():
+                    unit = {**base, "entities": {plural_name: settings}}
+                    if component == Component.INFERENCE:
+                        unit["models"] = self.models(plural_name)
+                    units[f"{layer}/{component}/{plural_name}"] = unit
+
+        return units
+
+    def models(self, plural_name: str) -> dict:
+        """Get digests of entity's model files."""
+        model_path = os.path.join(self.path, "models", plural_name)
+        if not os.path.exists(model_path):
+            return {}
+        return {
+            file_name: self.digest(os.path.join(model_path, file_name))
+            for file_name in sorted(os.listdir(model_path))
+        }
+
+    def fragments(self, units: dict) -> dict:
+        """Read per-unit fragments which `collect` merges into platform files."""
+        to_path = os.path.join(self.path, PLATFORM_FOLDER)
+        fragments = {}
+        for key in units:
+            unit_path = os.path.join(to_path, key)
+            paths = self.scan(unit_path, FRAGMENTS) if os.path.exists(unit_path) else []
+            fragments[key] = {
+                os.path.relpath(path, to_path): self.read(path) for path in paths
+            }
+        return fragments
+
+    def requirements(self) -> str | None:
+        """Read project `requirements.txt` if it exists."""
+        path = os.path.join(self.path, "requirements.txt")
+        if not os.path.exists(path):
+            return None
+        with open(path, "r") as file:
+            return file.read()
+
+    def to_manifest(self, units: dict, fragments: dict, requirements: str | None):
+        """Dump manifest of generated platform files."""
+        to_path = os.path.join(self.path, PLATFORM_FOLDER)
+        manifest = {
+            "opendataframework": __version__,
+            "requirements": requirements,
+            "units": {},
+        }
+        for key, unit in units.items():
+            files = {}
+            unit_path = os.path.join(to_path, key)
+            for dir_path, dirs, file_names in os.walk(unit_path):
+                dirs.sort()
+                for file_name in sorted(file_names):
+                    file_path = os.path.join(dir_path, file_name)
+                    files[os.path.relpath(file_path, to_path)] = self.digest(file_path)
+            manifest["units"][key] = {
+                "settings": unit,
+                "files": files,
+                "fragments": fragments.get(key, {}),
+            }
+
+        self.write(
+            {os.path.join(to_path, MANIFEST): json.dumps(manifest, indent=JSON_INDENT)}
+        )
+
+    def from_manifest(self) -> dict | None:
+        """Load manifest of generated platform files."""
+        path = os.path.join(self.path, PLATFORM_FOLDER, MANIFEST)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r") as file:
+            return json.load(file)
+
+    @classmethod
+    def verify(cls, path: str, files: dict) -> bool:
+        """Check that generated files under path still match their digests."""
+        for file_path, digest in files.items():
+            file_path = os.path.join(path, file_path)
+            if not os.path.exists(file_path) or cls.digest(file_path) != digest:
+                return False
+        return True
+
+    @staticmethod
+    def digest(path: str) -> str:
+        """Get sha256 digest of a file."""
+        sha256 = hashlib.sha256()
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b""):
+                sha256.update(chunk)
+        return sha256.hexdigest()
 
     @staticmethod
     def replace(path: str, text: str, new_text: str):
@@ -1000,36 +1525,70 @@ class Project:
             file.write(filedata)
 
     @staticmethod
-    def walk(path: str, file_names: list, ignore_dirs: list = None) -> tuple:
-        """Walk over dirs based on path and collect file data based on file names."""
-        from collections import defaultdict
-
-        if ignore_dirs is None:
-            ignore_dirs = []
+    def scan(path: str, file_names: list) -> list:
+        """Find files by name under path with a single `os.scandir` traversal.
 
-        data = defaultdict(list)
+        Entries are visited in sorted order, so the result does not depend on
+        the filesystem.
+        """
         paths = []
+        stack = [path]
+        while stack:
+            dir_path = stack.pop()
+            with os.scandir(dir_path) as entries:
+                entries = sorted(entries, key=lambda entry: entry.name)
+            for entry in entries:
+                if entry.is_file() and entry.name in file_names:
+                    paths.append(entry.path)
+            stack.extend(
+                entry.path
+                for entry in reversed(entries)
+                if entry.is_dir(follow_symlinks=False)
+            )
+        return paths
 
-        for dir_path, dirs, files in os.walk(path):
-            for ignore_dir in ignore_dirs:
-                if ignore_dir in dir_path:
-                    continue
-            if dir_path == path:
-                continue
-            for file_name in files:
-                if file_name in file_names:
-                    file_path = os.path.join(dir_path, file_name)
+    @staticmethod
+    def read(path: str) -> str:
+        """Read text file."""
+        with open(path, "r") as file:
+            return file.read()
 
-                    with open(file_path, "r") as file:
-                        file_data = file.read()
-                        data[file_name].append(file_data)
-                        paths.append(file_path)
+    @staticmethod
+    def write(files: dict) -> None:
+        """Write {path: text} files atomically.
+
+        Every file is staged into a temporary file next to its target first and
+        only then moved in place, so a failure never leaves a partially written
+        or partially merged file behind.
+        """
+        staged = []
+        try:
+            for path, data in files.items():
+                fd, tmp_path = tempfile.mkstemp(
+                    dir=os.path.dirname(path), prefix=".", suffix=".tmp"
+                )
+                staged.append((tmp_path, path))
+                with os.fdopen(fd, "w") as file:
+                    file.write(data)
+                mode = (
+                    stat.S_IMODE(os.stat(path).st_mode)
+                    if os.path.exists(path)
+                    else 0o644
+                )
+                os.chmod(tmp_path, mode)
+        except BaseException:
+            for tmp_path, _ in staged:
+                os.remove(tmp_path)
+            raise
 
-        return data, paths
+        for tmp_path, path in staged:
+            os.replace(tmp_path, path)
 
     @staticmethod
-    def copy(from_path: str, to_path: str, file_name: str):
-        """Copy file."""
+    def copy(
+        from_path: str, to_path: str, file_name: str, link_mode: str = LinkMode.COPY
+    ):
+        """Copy file, or link it when `link_mode` is supported by the filesystem."""
         src_path = os.path.join(from_path, file_name)
         if not os.path.exists(src_path):
             raise ValueError(f"{src_path} not found")
@@ -1038,6 +1597,23 @@ class Project:
         if os.path.exists(target_path):
             raise ValueError(f"{target_path} already exists")
 
+        try:
+            if link_mode == LinkMode.HARDLINK:
+                os.link(src_path, target_path)
+                return
+            if link_mode == LinkMode.SYMLINK:
+                os.symlink(os.path.abspath(src_path), target_path)
+                return
+            if link_mode == LinkMode.REFLINK:
+                import fcntl
+
+                with open(src_path, "rb") as src, open(target_path, "wb") as target:
+                    fcntl.ioctl(target.fileno(), FICLONE, src.fileno())
+                return
+        except (ImportError, OSError):
+            # not supported by the platform/filesystem, e.g. cross-device link
+            pass
+
         shutil.copyfile(src_path, target_path)
 
     @staticmethod
@@ -1047,7 +1623,12 @@ class Project:
             os.remove(file_path)
 
     def collect(self):
-        """Collect scripts."""
+        """Collect scripts.
+
+        Fragments (`setup.sh`, `requirements.txt`, `docker-compose.yaml`) are
+        found with a single traversal of `platform/`, merged in memory and each
+        merged file is written once, atomically. Fragments are removed after.
+        """
         from_path = SRC_PATH
         if not os.path.exists(from_path):
             raise ValueError(f"{from_path} does not exist")
@@ -1058,30 +1639,38 @@ class Project:
 
         scripts = ["setup.sh", "requirements.txt"]
 
-        for file_name in scripts:
-            if file_name == "requirements.txt":
-                if os.path.exists(os.path.join(self.path, file_name)):
-                    with open(os.path.join(from_path, file_name), "r") as file:
-                        src_file_data = file.read()
-                    with open(os.path.join(self.path, file_name), "a") as file:
-                        file.write(src_file_data)
-                else:
-                    self.copy(from_path, self.path, file_name)
-            else:
-                self.copy(from_path, to_path, file_name)
+        # layer -> fragment name -> paths, fragments at layer level are skipped
+        layers = {}
+        for path in self.scan(to_path, FRAGMENTS):
+            layer, *rest = os.path.relpath(path, to_path).split(os.sep)
+            if len(rest) < 2:
+                continue
+            layers.setdefault(layer, {}).setdefault(os.path.basename(path), [])
+            layers[layer][os.path.basename(path)].append(path)
 
-        self.copy(from_path, to_path, "docker-compose.yaml")
-        self.copy(from_path, self.path, "expectations.py")
-        self.copy(from_path, self.path, "README.md")
+        setup = self.read(os.path.join(from_path, "setup.sh"))
+        requirements = self.read(os.path.join(from_path, "requirements.txt"))
+        if os.path.exists(os.path.join(self.path, "requirements.txt")):
+            requirements = (
+                self.read(os.path.join(self.path, "requirements.txt")) + requirements
+            )
+        compose = self.read(os.path.join(from_path, "docker-compose.yaml"))
 
-        self.replace(os.path.join(self.path, "README.md"), f"{PROJECT_NAME}", self.name)
+        files = {
+            os.path.join(self.path, "expectations.py"): self.read(
+                os.path.join(from_path, "expectations.py")
+            ),
+            os.path.join(self.path, "README.md"): self.read(
+                os.path.join(from_path, "README.md")
+            ).replace(PROJECT_NAME, self.name),
+        }
+        paths = []
 
         for layer in COMPONENTS:
             if layer is Layer.DEVCONTAINERS:
                 continue
 
-            target_path = os.path.join(to_path, layer)
-            if not os.path.exists(target_path):
+            if not os.path.exists(os.path.join(to_path, layer)):
                 continue
 
             src_path = os.path.join(from_path, layer)
@@ -1089,67 +1678,59 @@ class Project:
                 raise ValueError(f"{src_path} does not exist")
 
             if layer is Layer.API:
-                self.copy(os.path.join(from_path, Layer.API), self.path, "ingest.py")
-            files_data, paths = self.walk(target_path, scripts)
+                files[os.path.join(self.path, "ingest.py")] = self.read(
+                    os.path.join(src_path, "ingest.py")
+                )
 
-            for file_name in scripts:
-                lines = files_data[file_name] if paths else []
+            fragments = layers.get(layer, {})
 
-                file_path = f"{src_path}/{file_name}"
+            for file_name in scripts:
+                lines = [self.read(path) for path in fragments.get(file_name, [])]
+                paths.extend(fragments.get(file_name, []))
 
+                file_path = os.path.join(src_path, file_name)
                 if not os.path.exists(file_path):
                     continue
 
-                with open(file_path, "r") as file:
-                    src_file_data = file.read()
+                src_file_data = self.read(file_path)
 
                 if lines and layer == Layer.STORAGE and file_name == "setup.sh":
                     # put storage setup logic on top of setup.sh
-                    with open(f"{to_path}/{file_name}", "r") as file:
-                        current_file_data = file.readlines()
-                        # keep shebang on top of the file
-                        header, current_file_data = (
-                            current_file_data[:3],
-                            current_file_data[3:],
-                        )
-                        header = [line for line in header if line != "\n"]
-                        header = "".join([*header])
-                        current_file_data = "".join([*current_file_data])
-                    with open(f"{to_path}/{file_name}", "w") as file:
-                        file.write(
-                            "\n".join(
-                                [header, src_file_data, *lines, current_file_data]
-                            )
-                        )
-
+                    current_file_data = setup.splitlines(keepends=True)
+                    # keep shebang on top of the file
+                    header = [line for line in current_file_data[:3] if line != "\n"]
+                    setup = "\n".join(
+                        [
+                            "".join(header),
+                            src_file_data,
+                            *lines,
+                            "".join(current_file_data[3:]),
+                        ]
+                    )
+                elif file_name == "requirements.txt":
+                    requirements += src_file_data + "\n".join(lines)
                 else:
-                    path = self.path if file_name == "requirements.txt" else to_path
-                    with open(f"{path}/{file_name}", "a") as file:
-                        file.write(src_file_data)
-                        file.write("\n".join(lines))
-
-            if paths:
-                self.remove(paths)
+                    setup += src_file_data + "\n".join(lines)
 
-            file_name = "docker-compose.yaml"
-            files_data, paths = self.walk(target_path, [file_name])
-            if paths:
-                lines = files_data[file_name]
-                file_path = f"{to_path}/{file_name}"
+            # exclude docker compose header
+            lines = [
+                "\n".join(self.read(path).split("\n")[2:])
+                for path in fragments.get("docker-compose.yaml", [])
+            ]
+            paths.extend(fragments.get("docker-compose.yaml", []))
+            if lines:
+                compose += "\n".join(lines)
 
-                # exclude docker compose header
-                lines = lines[0].split("\n")[2:]
-                lines = ["\n".join(lines)]
+        compose += "networks:\n"
+        compose += f"  {self.name}_default:\n"
+        compose += f"    name: {self.name}_default\n"
 
-                with open(file_path, "a") as file:
-                    file.write("\n".join(lines))
+        files[os.path.join(to_path, "setup.sh")] = setup
+        files[os.path.join(to_path, "docker-compose.yaml")] = compose
+        files[os.path.join(self.path, "requirements.txt")] = requirements
 
-                self.remove(paths)
-
-        with open(os.path.join(to_path, "docker-compose.yaml"), "a") as file:
-            file.write("networks:\n")
-            file.write(f"  {self.name}_default:\n")
-            file.write(f"    name: {self.name}_default\n")
+        self.write(files)
+        self.remove(paths)
 
 
 class Analytics:
@@ -1174,7 +1755,12 @@ class Analytics:
         entities = self.project.settings.get("entities", {})
         ports = self.project.settings.get("ports", {})
 
-        to_setup = os.path.join(to_path, "setup.sh")
+        config = self.project.config(Component.SUPERSET)
+        for key in ("cache_timeout", "rollup_cache_timeout", "workers"):
+            if not isinstance(config[key], int) or config[key] < 0:
+                raise ValueError(f"Invalid {key} `{config[key]}`, expected int >= 0")
+
+        databases, datasets = {}, []
 
         for plural_name, settings in entities.items():
             components = settings["layers"].get(Layer.ANALYTICS, {})
@@ -1189,54 +1775,96 @@ class Analytics:
                 )
 
             storages = settings["layers"].get(Layer.STORAGE, {})
-            if not storages:
-                continue
-
             for storage in storages:
-                from_setup = os.path.join(
-                    from_path, "database", f"{storage}", "setup.sh"
-                )
-
-                if not os.path.exists(from_setup):
+                from_database = os.path.join(from_path, "database", f"{storage}.json")
+                if not os.path.exists(from_database):
                     continue
 
-                with open(f"{from_setup}", "r") as file:
-                    content = file.read()
-
-                with open(f"{to_setup}", "a") as file:
-                    file.write("&& " + content)
-
-                from_create = os.path.join(
-                    from_path, "database", f"{storage}", "create.sh"
-                )
-
-                with open(f"{from_create}", "r") as file:
-                    content = file.read()
-                    content = content.replace("table-name", f"{plural_name}")
-
-                with open(f"{to_setup}", "a") as file:
-                    file.write("&& " + content)
-
+                with open(from_database, "r") as file:
+                    content = file.read().replace(PROJECT_NAME, self.project.name)
                 if PORTS.get(storage) and ports.get(storage):
-                    Project.replace(to_setup, PORTS.get(storage), ports.get(storage))
+                    content = content.replace(
+                        f'"port": "{PORTS[storage]}"', f'"port": "{ports[storage]}"'
+                    )
+                database = json.loads(content)
+                if config["workers"]:
+                    database["database"]["allow_run_async"] = True
+                database_name = database["database"]["database_name"]
+                databases[database_name] = database["database"]
+
+                tables = {plural_name: config["cache_timeout"]}
+                if storage == Component.POSTGRES and Component.API_POSTGRES in (
+                    settings["layers"].get(Layer.API, {})
+                ):
+                    sql_path = os.path.join(to_path, "rollups", f"{plural_name}.sql")
+                    with open(sql_path, "w") as file:
+                        file.write(self.rollups(plural_name, settings))
+                    for rollup in ROLLUPS:
+                        tables[f"{plural_name}_{rollup}"] = config[
+                            "rollup_cache_timeout"
+                        ]
 
-            with open(f"{to_setup}", "a") as file:
-                file.write("\n")
+                for table_name, cache_timeout in tables.items():
+                    datasets.append(
+                        {
+                            "database_name": database_name,
+                            "schema": database["schema"],
+                            "table_name": table_name,
+                            "cache_timeout": config["cache_timeouts"].get(
+                                table_name, cache_timeout
+                            ),
+                        }
+                    )
 
         if not os.path.exists(to_path):
             return
 
+        with open(os.path.join(to_path, "provision.json"), "w") as file:
+            json.dump(
+                {
+                    "url": f"http://localhost:{ports[Component.SUPERSET]}",
+                    "databases": list(databases.values()),
+                    "datasets": datasets,
+                },
+                file,
+                indent=2,
+            )
+            file.write("\n")
+
         Project.replace(
             os.path.join(to_path, ".env"),
             'SUPERSET_SECRET_KEY=""',
             f'SUPERSET_SECRET_KEY="{uuid.uuid4()}"',
         )
-
         Project.replace(
-            os.path.join(to_path, "setup.sh"), f"{PROJECT_NAME}", self.project.name
+            os.path.join(to_path, ".env"),
+            'SUPERSET_CACHE_URL=""',
+            f'SUPERSET_CACHE_URL="{config["cache_url"]}"',
+        )
+        Project.replace(
+            os.path.join(to_path, ".env"),
+            "SUPERSET_CACHE_TIMEOUT=300",
+            f"SUPERSET_CACHE_TIMEOUT={config['cache_timeout']}",
         )
 
-        Project.replace(to_setup, PORTS[Component.SUPERSET], ports[Component.SUPERSET])
+        if config["workers"]:
+            # celery worker of async queries, next to the web server
+            Project.replace(
+                os.path.join(to_path, "docker-compose.yaml"),
+                "      context: ./analytics/superset\n",
+                "      context: ./analytics/superset\n"
+                "    command: >-\n"
+                '      bash -c "celery --app=superset.tasks.celery_app:app worker\n'
+                f"      --concurrency={config['workers']} --detach\n"
+                "      --pidfile=/tmp/celery.pid\n"
+                "      --logfile=/app/superset_home/celery.log\n"
+                '      && exec /usr/bin/run-server.sh"\n',
+            )
+
+        for file_name in ("setup.sh", os.path.join("rollups", "refresh.sh")):
+            Project.replace(
+                os.path.join(to_path, file_name), f"{PROJECT_NAME}", self.project.name
+            )
 
         hostname = self.project.settings["project"].replace("_", "-")
 
@@ -1258,8 +1886,94 @@ class Analytics:
             f"{ports[Component.SUPERSET]}:",
         )
 
+        if any(
+            Component.SUPERSET in settings["layers"].get(Layer.ANALYTICS, {})
+            and Component.DUCKDB in settings["layers"].get(Layer.STORAGE, {})
+            for settings in entities.values()
+        ):
+            Project.replace(
+                os.path.join(to_path, "Dockerfile"),
+                "RUN python -m pip install prophet",
+                "RUN python -m pip install prophet duckdb-engine",
+            )
+            Project.replace(
+                os.path.join(to_path, "docker-compose.yaml"),
+                "      - ./analytics/superset/.env",
+                "      - ./analytics/superset/.env\n"
+                f"    volumes:\n      - {DUCKDB_VOLUME}",
+            )
+
         rprint(f"{to_path}[green] created[/green]")
 
+    @staticmethod
+    def rollups(plural_name: str, settings: dict) -> str:
+        """Get SQL creating & incrementally refreshing entity's rollup tables.
+
+        Rollups hold row count and sum, min & max of numeric fields per
+        `__time` bucket, averages are sums over counts. A refresh recomputes
+        buckets from the last stored one on, daily from hourly rollups, and
+        upserts them. Rows ingested with a `ts` before that are not picked up.
+        """
+        numeric = [
+            field_name
+            for field_name, field_type in settings["fields"].items()
+            if field_type in ("int", "float")
+        ]
+        # name, aggregate of rows, aggregate of finer rollup, type
+        aggregates = [("count", "count(*)", 'sum("count")', "BIGINT NOT NULL")]
+        for field_name in numeric:
+            for function in ("sum", "min", "max"):
+                name = f"{field_name}_{function}"
+                aggregates.append(
+                    (
+                        name,
+                        f'{function}("{field_name}")',
+                        f'{function}("{name}")',
+                        "DOUBLE PRECISION",
+                    )
+                )
+
+        statements = [
+            f"-- {plural_name} rollups, generated by opendataframework",
+            "",
+            "-- append-only time column, a BRIN index keeps refresh scans short",
+            f'CREATE INDEX IF NOT EXISTS "{plural_name}___time_brin" '
+            f'ON "{plural_name}" USING brin ("__time");',
+        ]
+        source, bucket_column = plural_name, '"__time"'
+        for rollup, field in ROLLUPS.items():
+            table = f"{plural_name}_{rollup}"
+            columns = ",\n".join(
+                f'    "{name}" {type_}' for name, _, _, type_ in aggregates
+            )
+            expressions = ",\n".join(
+                f"    {raw if source == plural_name else rolled}"
+                for _, raw, rolled, _ in aggregates
+            )
+            updates = ",\n".join(
+                f'    "{name}" = EXCLUDED."{name}"' for name, _, _, _ in aggregates
+            )
+            statements += [
+                "",
+                f'CREATE TABLE IF NOT EXISTS "{table}" (',
+                f'    "bucket" TIMESTAMP PRIMARY KEY,\n{columns}',
+                ");",
+                "",
+                f'INSERT INTO "{table}"',
+                f"SELECT\n    date_trunc('{field}', {bucket_column}) AS bucket,",
+                f"{expressions}",
+                f'FROM "{source}"',
+                f"WHERE {bucket_column} >= COALESCE(",
+                f'    (SELECT max("bucket") FROM "{table}"), \'-infinity\'',
+                ")",
+                "GROUP BY 1",
+                'ON CONFLICT ("bucket") DO UPDATE SET',
+                f"{updates};",
+            ]
+            source, bucket_column = table, '"bucket"'
+
+        return "\n".join(statements) + "\n"
+
     def __call__(self):
         """Call layer."""
         self.superset()
@@ -1272,231 +1986,619 @@ class API:
         """Create API layer instance."""
         self.project = project
 
-    def api_postgres(self):
-        """Configure API `API_POSTGRES` component."""
+    def map(self, func, entities: dict) -> list:
+        """Run `func` for each entity on a thread pool, keeping entities order.
+
+        Every entity is generated into its own directory, so entities can be
+        processed concurrently. Results are returned in entities order, which
+        keeps the merged outputs deterministic.
+        """
+        with ThreadPoolExecutor(max_workers=self.project.workers) as executor:
+            futures = [
+                executor.submit(func, plural_name, settings)
+                for plural_name, settings in entities.items()
+            ]
+            return [future.result() for future in futures]
+
+    def api_postgres(self, plural_names: set = None):
+        """Configure API `API_POSTGRES` component, optionally for some entities."""
         from_path = os.path.join(SRC_PATH, Layer.API, Component.API_POSTGRES)
         if not os.path.exists(from_path):
             raise ValueError(f"{from_path} does not exist")
 
-        entities = self.project.settings.get("entities", {})
+        entities = {
+            plural_name: settings
+            for plural_name, settings in self.project.settings.get(
+                "entities", {}
+            ).items()
+            if Component.API_POSTGRES in settings["layers"].get(Layer.API, {})
+            and (plural_names is None or plural_name in plural_names)
+        }
 
-        for plural_name, settings in entities.items():
-            components = settings["layers"].get(Layer.API, {})
-            if Component.API_POSTGRES not in components:
-                continue
+        config = self.project.config(Component.API_POSTGRES)
+        if config["mode"] not in MODES:
+            raise ValueError(f"Invalid mode `{config['mode']}`. Valid modes: {MODES}")
+        if config["uid"] not in UIDS:
+            raise ValueError(f"Invalid uid `{config['uid']}`. Valid uids: {UIDS}")
 
-            to_path = os.path.join(
-                self.project.path,
-                PLATFORM_FOLDER,
-                Layer.API,
-                Component.API_POSTGRES,
-                plural_name,
-            )
-            if os.path.exists(to_path):
-                raise ValueError(f"{to_path} already exists")
+        if config["mode"] == Mode.CONSOLIDATED:
+            self.api_postgres_consolidated(entities)
+            return
 
-            shutil.copytree(
-                from_path,
-                to_path,
-                ignore=shutil.ignore_patterns(
-                    *IGNORE_PATTERNS,
-                ),
-            )
+        self.map(self.api_postgres_entity, entities)
 
-            hostname = self.project.settings["project"].replace("_", "-")
+    def api_postgres_entity(self, plural_name: str, settings: dict):
+        """Configure API `API_POSTGRES` component for an entity."""
+        from_path = os.path.join(SRC_PATH, Layer.API, Component.API_POSTGRES)
+        components = settings["layers"].get(Layer.API, {})
 
-            Project.replace(
-                os.path.join(to_path, "docker-compose.yaml"),
-                f"hostname: {PROJECT_NAME}-{Component.API_POSTGRES}",
-                f"hostname: {hostname}-{Component.API_POSTGRES}",
-            )
+        to_path = os.path.join(
+            self.project.path,
+            PLATFORM_FOLDER,
+            Layer.API,
+            Component.API_POSTGRES,
+            plural_name,
+        )
+        if os.path.exists(to_path):
+            raise ValueError(f"{to_path} already exists")
 
-            Project.replace(
-                os.path.join(to_path, "docker-compose.yaml"),
-                f"{PROJECT_NAME}",
-                self.project.settings["project"],
-            )
+        shutil.copytree(
+            from_path,
+            to_path,
+            ignore=shutil.ignore_patterns(
+                *IGNORE_PATTERNS,
+            ),
+        )
 
-            Project.replace(
-                os.path.join(to_path, "docker-compose.yaml"), "entity", plural_name
-            )
+        hostname = self.project.settings["project"].replace("_", "-")
 
-            port = components[Component.API_POSTGRES]["port"]
-            Project.replace(
-                os.path.join(to_path, "docker-compose.yaml"),
-                f"{PORTS[Component.API_POSTGRES]}:",
-                f"{port}:",
-            )
+        Project.replace(
+            os.path.join(to_path, "docker-compose.yaml"),
+            f"hostname: {PROJECT_NAME}-{Component.API_POSTGRES}",
+            f"hostname: {hostname}-{Component.API_POSTGRES}",
+        )
 
-            # model
-            model_path = os.path.join(to_path, "app", "models.py")
-            new_text = "# fields"
+        Project.replace(
+            os.path.join(to_path, "docker-compose.yaml"),
+            f"{PROJECT_NAME}",
+            self.project.settings["project"],
+        )
 
-            for field_name, field_type in settings["fields"].items():
-                if field_name in Field.RESERVED_FIELDS:
-                    raise ValueError(
-                        f"Field names `{self.RESERVED_FIELDS}` are reserved"
-                    )
-                if "datetime" in field_type:
-                    # TODO: format validator
-                    field_type = "datetime"
-
-                new_text += f"\n    {field_name}: {field_type}"
-
-            Project.replace(model_path, "# extra fields", new_text)
-            Project.replace(model_path, "entities", plural_name)
-            Project.replace(model_path, "Entity", settings["name"].capitalize())
-
-            # crud
-            crud_path = os.path.join(to_path, "app", "crud.py")
-            Project.replace(crud_path, "entity", settings["name"])
-            Project.replace(crud_path, "entities", plural_name)
-            Project.replace(crud_path, "Entity", settings["name"].capitalize())
-
-            # router
-            router_path = os.path.join(to_path, "app", "router.py")
-            Project.replace(router_path, "entity", settings["name"])
-            Project.replace(router_path, "entities", plural_name)
-            Project.replace(router_path, "Entity", settings["name"].capitalize())
-
-            # env
-            port = self.project.settings["ports"][Component.POSTGRES]
-            env_path = os.path.join(to_path, ".env")
-            Project.replace(
-                env_path, f"{PROJECT_NAME}", self.project.settings["project"]
-            )
-            Project.replace(env_path, "description", settings["description"])
-            Project.replace(env_path, PORTS[Component.POSTGRES], port)
+        Project.replace(
+            os.path.join(to_path, "docker-compose.yaml"), "entity", plural_name
+        )
 
-            # main
-            main_path = os.path.join(to_path, "app", "main.py")
-            Project.replace(main_path, "entity", settings["name"])
+        port = components[Component.API_POSTGRES]["port"]
+        Project.replace(
+            os.path.join(to_path, "docker-compose.yaml"),
+            f"{PORTS[Component.API_POSTGRES]}:",
+            f"{port}:",
+        )
 
-            rprint(f"{to_path}[green] created[/green]")
+        self.render_api_postgres(os.path.join(to_path, "app"), plural_name, settings)
 
-    def inference(self):
-        """Configure API `INFERENCE` component."""
-        from_path = os.path.join(SRC_PATH, Layer.API, Component.INFERENCE)
-        if not os.path.exists(from_path):
-            raise ValueError(f"{from_path} does not exist")
+        # env
+        env_path = os.path.join(to_path, ".env")
+        Project.replace(env_path, f"{PROJECT_NAME}", self.project.settings["project"])
+        Project.replace(env_path, "description", settings["description"])
+        self.api_postgres_env(to_path, {plural_name: settings})
 
-        entities = self.project.settings.get("entities", {})
+        # main
+        main_path = os.path.join(to_path, "app", "main.py")
+        Project.replace(main_path, "entity", settings["name"])
 
-        for plural_name, settings in entities.items():
-            components = settings["layers"].get(Layer.API, {})
-            if Component.INFERENCE not in components:
-                continue
+        rprint(f"{to_path}[green] created[/green]")
 
-            to_path = os.path.join(
-                self.project.path,
-                PLATFORM_FOLDER,
-                Layer.API,
-                Component.INFERENCE,
-                plural_name,
+    def api_postgres_consolidated(self, entities: dict):
+        """Configure API `API_POSTGRES` component as one service for all entities.
+
+        Every entity gets an `app/<plural_name>` package whose router is mounted
+        under `/api/v1/<plural_name>`. Routers share one engine and connection
+        pool, and the service runs `workers` uvicorn workers.
+        """
+        to_path = self.consolidate(
+            Component.API_POSTGRES,
+            entities,
+            {"models", "crud", "router", "benchmark"},
+            self.render_api_postgres,
+        )
+        if not to_path:
+            return
+
+        # env
+        self.api_postgres_env(to_path, entities)
+
+        rprint(f"{to_path}[green] created[/green]")
+
+    def api_postgres_env(self, to_path: str, entities: dict):
+        """Configure `API_POSTGRES` databases, uid kind, write-behind & cache.
+
+        Entities with `PGBOUNCER` registered connect through the pooler, older
+        settings.json files without it connect to `POSTGRES` directly. With
+        `DUCKDB` `api_reads`, range reads go to its read-only copy, and cached
+        ranges expire as it is reloaded.
+        """
+        env_path = os.path.join(to_path, ".env")
+        pooled = any(
+            Component.PGBOUNCER in settings["layers"].get(Layer.STORAGE, {})
+            for settings in entities.values()
+        )
+        component = Component.PGBOUNCER if pooled else Component.POSTGRES
+        Project.replace(
+            env_path,
+            f"host.docker.internal:{PORTS[Component.POSTGRES]}/",
+            f"host.docker.internal:{self.project.settings['ports'][component]}/",
+        )
+
+        if self.project.config(Component.DUCKDB)["api_reads"] and all(
+            Component.DUCKDB in settings["layers"].get(Layer.STORAGE, {})
+            for settings in entities.values()
+        ):
+            project_name = self.project.settings["project"]
+            Project.replace(
+                env_path,
+                'DB_READ_CONNECTION_STR=""',
+                f'DB_READ_CONNECTION_STR="duckdb:////db/{project_name}.duckdb'
+                '?access_mode=read_only"',
+            )
+            Project.replace(
+                os.path.join(to_path, "docker-compose.yaml"),
+                "    restart: always",
+                f"    restart: always\n    volumes:\n      - {DUCKDB_VOLUME}",
+            )
+            # cached ranges expire with the copy they were read from
+            refresh_s = self.project.config(Component.DUCKDB)["refresh_s"]
+            Project.replace(
+                env_path, "CACHE_TTL_S=3600", f"CACHE_TTL_S={min(refresh_s, 3600)}"
             )
-            if os.path.exists(to_path):
-                raise ValueError(f"{to_path} already exists")
 
-            shutil.copytree(
-                from_path,
-                to_path,
-                ignore=shutil.ignore_patterns(
-                    *IGNORE_PATTERNS,
-                ),
+        config = self.project.config(Component.API_POSTGRES)
+        Project.replace(
+            env_path, f'UID_KIND="{UID.UUID4}"', f'UID_KIND="{config["uid"]}"'
+        )
+        if config["write_behind"]:
+            Project.replace(env_path, "WRITE_BEHIND=False", "WRITE_BEHIND=True")
+        if config["cache_url"]:
+            Project.replace(
+                env_path, 'CACHE_URL=""', f'CACHE_URL="{config["cache_url"]}"'
             )
+        elif not self.project.per_entity(Component.API_POSTGRES) and (
+            config["workers"] > 1
+        ):
+            # in-process caches miss invalidations by other workers
+            Project.replace(env_path, "CACHE=True", "CACHE=False")
+
+    def consolidate(
+        self, component: str, entities: dict, modules: set, render
+    ) -> str | None:
+        """Configure API `component` as one service for all entities.
+
+        Every entity gets an `app/<plural_name>` package holding `modules`,
+        rendered by `render(package_path, plural_name, settings)`, and its router
+        is included by `app/main.py`. Returns path of the service, if created.
+        """
+        from_path = os.path.join(SRC_PATH, Layer.API, component)
+        to_path = os.path.join(self.project.path, PLATFORM_FOLDER, Layer.API, component)
+        if os.path.exists(to_path):
+            raise ValueError(f"{to_path} already exists")
 
-            model_path = os.path.join(self.project.path, "models", plural_name)
-            if not os.path.exists(os.path.join(model_path, "model.pkl")):
-                raise ValueError(f"{model_path} does not exist")
+        if not entities:
+            return None
 
-            Project.copy(model_path, os.path.join(to_path, "app"), "model.pkl")
+        reserved = {
+            file_name.split(".py")[0]
+            for file_name in os.listdir(os.path.join(from_path, "app"))
+        }
+        for plural_name in entities:
+            if not plural_name.isidentifier() or plural_name in reserved:
+                raise ValueError(f"Invalid package name: {plural_name}")
 
-            if os.path.exists(os.path.join(model_path, "requirements.txt")):
-                with open(os.path.join(model_path, "requirements.txt"), "r") as file:
-                    filedata = file.read()
-                    new_filedata = []
-                    for line in filedata.split("\n"):
-                        if not line:
-                            continue
-                        packet, version = line.split("==")
-                        new_line = f'{packet} = "{version}"'
-                        new_filedata.append(new_line)
-                    filedata = "\n".join(new_filedata)
+        shutil.copytree(
+            from_path,
+            to_path,
+            ignore=shutil.ignore_patterns(
+                *IGNORE_PATTERNS, *(f"{module}.py" for module in modules)
+            ),
+        )
+
+        def package(plural_name: str, settings: dict):
+            package_path = os.path.join(to_path, "app", plural_name)
+            os.mkdir(package_path)
+            with open(os.path.join(package_path, "__init__.py"), "w") as file:
+                file.write(f'"""{plural_name.capitalize()} package."""\n')
+
+            for module in modules:
+                shutil.copyfile(
+                    os.path.join(from_path, "app", f"{module}.py"),
+                    os.path.join(package_path, f"{module}.py"),
+                )
+            render(package_path, plural_name, settings)
 
+            for module in modules:
+                module_path = os.path.join(package_path, f"{module}.py")
+                for other in modules:
                     Project.replace(
-                        os.path.join(to_path, "pyproject.toml"),
-                        "# dependencies",
-                        filedata,
+                        module_path,
+                        f"from app.{other} import",
+                        f"from app.{plural_name}.{other} import",
                     )
+                # usage of runnable modules
+                Project.replace(
+                    module_path,
+                    f"python -m app.{module} ",
+                    f"python -m app.{plural_name}.{module} ",
+                )
+
+        self.map(package, entities)
+
+        # main
+        main_path = os.path.join(to_path, "app", "main.py")
+        main = Project.read(main_path)
+        router = re.search(r"^from app\.router import (\w+)$", main, re.MULTILINE)[1]
+        main = main.replace(
+            f"from app.router import {router}\n",
+            "".join(
+                f"from app.{plural_name}.router import "
+                f"{router.replace('entity', settings['name'])} "
+                f"as {plural_name}_router\n"
+                for plural_name, settings in entities.items()
+            ),
+        )
+        main = main.replace(
+            f"app.include_router({router}, prefix=settings.api_v1_prefix)\n",
+            "".join(
+                f"app.include_router({plural_name}_router, "
+                "prefix=settings.api_v1_prefix)\n"
+                for plural_name in entities
+            ),
+        )
+        main = main.replace("startup_entity", "startup")
+        # keep `from app.* import` block sorted
+        lines = main.split("\n")
+        block = [i for i, line in enumerate(lines) if line.startswith("from app.")]
+        lines[block[0] : block[-1] + 1] = sorted(lines[block[0] : block[-1] + 1])
+        Project.write({main_path: "\n".join(lines)})
+
+        # compose
+        compose_path = os.path.join(to_path, "docker-compose.yaml")
+        plural_name = next(iter(entities))
+        hostname = self.project.settings["project"].replace("_", "-")
+        Project.replace(
+            compose_path, f"hostname: {PROJECT_NAME}-", f"hostname: {hostname}-"
+        )
+        Project.replace(compose_path, PROJECT_NAME, self.project.settings["project"])
+        Project.replace(
+            compose_path,
+            f"./{Layer.API}/{component}/entity",
+            f"./{Layer.API}/{component}",
+        )
+        for separator in "_-":
+            Project.replace(compose_path, f"entity{separator}{component}", component)
+        Project.replace(compose_path, "entity", component)
+        Project.replace(
+            compose_path,
+            f"{PORTS[component]}:",
+            f"{self.project.api_port(component, plural_name)}:",
+        )
+        config = self.project.config(component)
+        with open(compose_path, "a") as file:
+            file.write(" " * 4 + "environment:\n")
+            file.write(" " * 6 + f"- WEB_CONCURRENCY={config['workers']}\n")
+
+        # env
+        env_path = os.path.join(to_path, ".env")
+        Project.replace(env_path, f"{PROJECT_NAME}", self.project.settings["project"])
+        Project.replace(env_path, "description", ", ".join(entities))
+
+        return to_path
+
+    @staticmethod
+    def render_api_postgres(app_path: str, plural_name: str, settings: dict):
+        """Render entity's models, crud, router & benchmark modules of `API_POSTGRES`.
+
+        Fields are typed by entity's `columns` setting, if any. Fields listed in
+        component's `indexes` setting are indexed.
+        """
+        # model
+        model_path = os.path.join(app_path, "models.py")
+        new_text = "# fields"
 
-            hostname = self.project.settings["project"].replace("_", "-")
+        columns = settings.get("columns", {})
 
+        indexes = settings["layers"][Layer.API][Component.API_POSTGRES].get(
+            "indexes", []
+        )
+        for field_name in indexes:
+            if field_name not in {*settings["fields"], Field.TS_FILED}:
+                raise ValueError(f"Index field `{field_name}` does not exist")
+
+        for field_name, field_type in settings["fields"].items():
+            if field_name in Field.RESERVED_FIELDS:
+                raise ValueError(f"Field names `{Field.RESERVED_FIELDS}` are reserved")
+            if "datetime" in field_type:
+                # TODO: format validator
+                field_type = "datetime"
+
+            column_type = columns.get(field_name)
+            if column_type == "UUID":
+                field_type = "UUID"
+
+            line = f"\n    {field_name}: {field_type}"
+            if column_type:
+                args = [API.column_type(column_type, f"{plural_name}_{field_name}")]
+                if field_name in indexes:
+                    args.append("index=True")
+                args.append("nullable=False")
+                line += f" = Field(sa_column=Column({', '.join(args)}))"
+            elif field_name in indexes:
+                line += " = Field(index=True)"
+            new_text += line
+
+        if Field.TS_FILED in indexes:
             Project.replace(
-                os.path.join(to_path, "docker-compose.yaml"),
-                f"hostname: {PROJECT_NAME}-{Component.INFERENCE}",
-                f"hostname: {hostname}-{Component.INFERENCE}",
+                model_path,
+                'Column("__time", DateTime)',
+                'Column("__time", DateTime, index=True)',
             )
+        Project.replace(model_path, "entities", plural_name)
+        Project.replace(model_path, "Entity", settings["name"].capitalize())
+        Project.replace(model_path, "# extra fields", new_text)
+
+        # crud
+        crud_path = os.path.join(app_path, "crud.py")
+        Project.replace(crud_path, "entity", settings["name"])
+        Project.replace(crud_path, "entities", plural_name)
+        Project.replace(crud_path, "Entity", settings["name"].capitalize())
+
+        # router & benchmark
+        for module in ("router", "benchmark"):
+            module_path = os.path.join(app_path, f"{module}.py")
+            Project.replace(module_path, "entity", settings["name"])
+            Project.replace(module_path, "entities", plural_name)
+            Project.replace(module_path, "Entity", settings["name"].capitalize())
 
-            Project.replace(
-                os.path.join(to_path, "docker-compose.yaml"),
-                f"{PROJECT_NAME}",
-                self.project.settings["project"],
+    @staticmethod
+    def column_type(column_type: str, enum_name: str) -> str:
+        """Get SQLAlchemy type expression of Postgres column type."""
+        if column_type in COLUMN_TYPES:
+            return COLUMN_TYPES[column_type]
+
+        match = re.fullmatch(r"VARCHAR\((\d+)\)", column_type)
+        if match:
+            return f"postgresql.VARCHAR({match[1]})"
+
+        match = re.fullmatch(r"ENUM\((.+)\)", column_type)
+        values = match[1].split(",") if match else []
+        if not values or not all(re.match(r"^[\w .-]+$", value) for value in values):
+            raise ValueError(
+                f"Invalid column type `{column_type}`. Valid types are "
+                f"{list(COLUMN_TYPES)}, `VARCHAR(n)` or `ENUM(a,b,...)`"
             )
+        values = ", ".join(f'"{value}"' for value in values)
+        return f'postgresql.ENUM({values}, name="{enum_name}")'
 
+    def inference(self, plural_names: set = None):
+        """Configure API `INFERENCE` component, optionally for some entities."""
+        from_path = os.path.join(SRC_PATH, Layer.API, Component.INFERENCE)
+        if not os.path.exists(from_path):
+            raise ValueError(f"{from_path} does not exist")
+
+        entities = {
+            plural_name: settings
+            for plural_name, settings in self.project.settings.get(
+                "entities", {}
+            ).items()
+            if Component.INFERENCE in settings["layers"].get(Layer.API, {})
+            and (plural_names is None or plural_name in plural_names)
+        }
+
+        config = self.project.config(Component.INFERENCE)
+        if config["mode"] not in MODES:
+            raise ValueError(f"Invalid mode `{config['mode']}`. Valid modes: {MODES}")
+
+        if config["mode"] == Mode.CONSOLIDATED:
+            self.inference_consolidated(entities)
+            return
+
+        self.map(self.inference_entity, entities)
+
+    def inference_entity(self, plural_name: str, settings: dict):
+        """Configure API `INFERENCE` component for an entity."""
+        from_path = os.path.join(SRC_PATH, Layer.API, Component.INFERENCE)
+        components = settings["layers"].get(Layer.API, {})
+
+        to_path = os.path.join(
+            self.project.path,
+            PLATFORM_FOLDER,
+            Layer.API,
+            Component.INFERENCE,
+            plural_name,
+        )
+        if os.path.exists(to_path):
+            raise ValueError(f"{to_path} already exists")
+
+        shutil.copytree(
+            from_path,
+            to_path,
+            ignore=shutil.ignore_patterns(
+                *IGNORE_PATTERNS,
+            ),
+        )
+
+        self.place_model(plural_name, os.path.join(to_path, "app"))
+
+        dependencies = self.model_requirements(plural_name)
+        if dependencies:
             Project.replace(
-                os.path.join(to_path, "docker-compose.yaml"), "entity", plural_name
+                os.path.join(to_path, "pyproject.toml"),
+                "# dependencies",
+                "\n".join(
+                    f'{packet} = "{version}"' for packet, version in dependencies
+                ),
             )
 
-            port = components[Component.INFERENCE]["port"]
+        hostname = self.project.settings["project"].replace("_", "-")
+
+        Project.replace(
+            os.path.join(to_path, "docker-compose.yaml"),
+            f"hostname: {PROJECT_NAME}-{Component.INFERENCE}",
+            f"hostname: {hostname}-{Component.INFERENCE}",
+        )
+
+        Project.replace(
+            os.path.join(to_path, "docker-compose.yaml"),
+            f"{PROJECT_NAME}",
+            self.project.settings["project"],
+        )
+
+        Project.replace(
+            os.path.join(to_path, "docker-compose.yaml"), "entity", plural_name
+        )
+
+        port = components[Component.INFERENCE]["port"]
+        Project.replace(
+            os.path.join(to_path, "docker-compose.yaml"),
+            f"{PORTS[Component.INFERENCE]}:",
+            f"{port}:",
+        )
+
+        self.render_inference(os.path.join(to_path, "app"), plural_name, settings)
+
+        # env
+        env_path = os.path.join(to_path, ".env")
+        Project.replace(env_path, f"{PROJECT_NAME}", self.project.settings["project"])
+        Project.replace(env_path, "description", settings["description"])
+
+        # main
+        main_path = os.path.join(to_path, "app", "main.py")
+        Project.replace(main_path, "entity", settings["name"])
+
+        rprint(f"{to_path}[green] created[/green]")
+
+    def inference_consolidated(self, entities: dict):
+        """Configure API `INFERENCE` component as one service for all entities.
+
+        Every entity gets an `app/<plural_name>` package whose router is mounted
+        under `/api/v1/inference/<plural_name>`, its model is placed into
+        `models/<plural_name>`. Models are loaded on first use by a registry,
+        which keeps them within `memory` megabytes.
+        """
+
+        def render(package_path: str, plural_name: str, settings: dict):
+            self.render_inference(package_path, plural_name, settings)
             Project.replace(
-                os.path.join(to_path, "docker-compose.yaml"),
-                f"{PORTS[Component.INFERENCE]}:",
-                f"{port}:",
+                os.path.join(package_path, "router.py"),
+                'prefix="/inference", tags=["inference"]',
+                f'prefix="/inference/{plural_name}", tags=["{plural_name}"]',
+            )
+            Project.replace(
+                os.path.join(package_path, "dependencies.py"),
+                'os.path.join(Path(__file__).parent, "model.pkl")',
+                f'os.path.join(Path(__file__).parents[2], "models", "{plural_name}", '
+                '"model.pkl")',
             )
+            self.place_model(plural_name, os.path.join(to_path, "models", plural_name))
 
-            # model
-            model_path = os.path.join(to_path, "app", "models.py")
-            new_text = "# fields"
+        to_path = os.path.join(
+            self.project.path, PLATFORM_FOLDER, Layer.API, Component.INFERENCE
+        )
+        if not self.consolidate(
+            Component.INFERENCE,
+            entities,
+            {"models", "crud", "router", "dependencies"},
+            render,
+        ):
+            return
 
-            for field_name, field_type in settings["fields"].items():
-                if field_name in Field.RESERVED_FIELDS:
+        dependencies = {}
+        for plural_name in entities:
+            for packet, version in self.model_requirements(plural_name):
+                if dependencies.setdefault(packet, version) != version:
                     raise ValueError(
-                        f"Field names `{self.RESERVED_FIELDS}` are reserved"
+                        f"Conflicting `{packet}` versions: "
+                        f"{dependencies[packet]}, {version}"
                     )
-                if "datetime" in field_type:
-                    # TODO: format validator
-                    field_type = "datetime"
-
-                new_text += f"\n    {field_name}: {field_type}"
-
-            Project.replace(model_path, "# extra fields", new_text)
-            Project.replace(model_path, "entities", plural_name)
-            Project.replace(model_path, "Entity", settings["name"].capitalize())
-
-            # crud
-            crud_path = os.path.join(to_path, "app", "crud.py")
-            Project.replace(crud_path, "entity", settings["name"])
-            Project.replace(crud_path, "entities", plural_name)
-            Project.replace(crud_path, "Entity", settings["name"].capitalize())
-
-            # router
-            router_path = os.path.join(to_path, "app", "router.py")
-            Project.replace(router_path, "entity", settings["name"])
-            Project.replace(router_path, "entities", plural_name)
-            Project.replace(router_path, "Entity", settings["name"].capitalize())
-
-            # env
-            env_path = os.path.join(to_path, ".env")
+        if dependencies:
             Project.replace(
-                env_path, f"{PROJECT_NAME}", self.project.settings["project"]
+                os.path.join(to_path, "pyproject.toml"),
+                "# dependencies",
+                "\n".join(
+                    f'{packet} = "{version}"'
+                    for packet, version in dependencies.items()
+                ),
             )
-            Project.replace(env_path, "description", settings["description"])
 
-            # main
-            main_path = os.path.join(to_path, "app", "main.py")
-            Project.replace(main_path, "entity", settings["name"])
+        Project.replace(
+            os.path.join(to_path, "Dockerfile"),
+            "COPY app/ app/\n",
+            "COPY app/ app/\nCOPY models/ models/\n",
+        )
 
-            rprint(f"{to_path}[green] created[/green]")
+        # env
+        config = self.project.config(Component.INFERENCE)
+        Project.replace(
+            os.path.join(to_path, ".env"),
+            "MODELS_MEMORY_MB=1024",
+            f"MODELS_MEMORY_MB={config['memory']}",
+        )
+
+        rprint(f"{to_path}[green] created[/green]")
+
+    def place_model(self, plural_name: str, to_path: str):
+        """Place entity's `model.pkl` into `to_path`."""
+        model_path = os.path.join(self.project.path, "models", plural_name)
+        if not os.path.exists(os.path.join(model_path, "model.pkl")):
+            raise ValueError(f"{model_path} does not exist")
+
+        os.makedirs(to_path, exist_ok=True)
+        # docker build context does not follow symlinks
+        link_mode = self.project.link_mode
+        if link_mode == LinkMode.SYMLINK:
+            link_mode = LinkMode.HARDLINK
+        Project.copy(model_path, to_path, "model.pkl", link_mode=link_mode)
+
+    def model_requirements(self, plural_name: str) -> list:
+        """Get `(packet, version)` pairs of entity's model `requirements.txt`."""
+        path = os.path.join(
+            self.project.path, "models", plural_name, "requirements.txt"
+        )
+        if not os.path.exists(path):
+            return []
+
+        with open(path, "r") as file:
+            return [tuple(line.split("==")) for line in file.read().split("\n") if line]
+
+    @staticmethod
+    def render_inference(app_path: str, plural_name: str, settings: dict):
+        """Render entity's models, crud & router modules of `INFERENCE`."""
+        # model
+        model_path = os.path.join(app_path, "models.py")
+        new_text = "# fields"
+
+        for field_name, field_type in settings["fields"].items():
+            if field_name in Field.RESERVED_FIELDS:
+                raise ValueError(f"Field names `{Field.RESERVED_FIELDS}` are reserved")
+            if "datetime" in field_type:
+                # TODO: format validator
+                field_type = "datetime"
+
+            new_text += f"\n    {field_name}: {field_type}"
+
+        Project.replace(model_path, "# extra fields", new_text)
+        Project.replace(model_path, "entities", plural_name)
+        Project.replace(model_path, "Entity", settings["name"].capitalize())
+
+        # crud
+        crud_path = os.path.join(app_path, "crud.py")
+        Project.replace(crud_path, "entity", settings["name"])
+        Project.replace(crud_path, "entities", plural_name)
+        Project.replace(crud_path, "Entity", settings["name"].capitalize())
+
+        # router
+        router_path = os.path.join(app_path, "router.py")
+        Project.replace(router_path, "entity", settings["name"])
+        Project.replace(router_path, "entities", plural_name)
+        Project.replace(router_path, "Entity", settings["name"].capitalize())
 
     def __call__(self):
         """Call layer."""
@@ -1680,11 +2782,246 @@ class Storage:
             f"{ports[Component.POSTGRES]}:",
         )
 
+        # profiles
+        config = self.project.config(Component.POSTGRES)
+        profile = self.postgres_profile(config)
+        Storage.write_conf(
+            os.path.join(to_path, "postgresql.conf"),
+            f"sized for {config['memory']}MB memory, {config['cpus']} cpus, "
+            f"{config['disk']} disk & {config['connections']} connections",
+            profile,
+        )
+        Storage.write_conf(
+            os.path.join(to_path, "bulk-load.conf"),
+            "applied by `python ingest.py --bulk-load` for backfills, settings "
+            "are reloadable, not crash safe for the last commits",
+            self.postgres_bulk_load_profile(config),
+        )
+        Project.replace(
+            os.path.join(to_path, "docker-compose.yaml"),
+            "shm_size: 256m",
+            f"shm_size: {max(config['memory'] // 4, 256)}m",
+        )
+
+        rprint(f"{to_path}[green] created[/green]")
+
+    def duckdb(self):
+        """Configure Storage `DUCKDB` component.
+
+        A container loads entities into `db/<project>.duckdb`, read-only by
+        Superset & api-postgres. Entities with `API_POSTGRES` are copied from
+        their Postgres tables, others from their csv files in `data/`. With
+        `api_reads`, rows written since the last load are appended every
+        `refresh_s` seconds, `python load.py --full` copies tables in full.
+        """
+        from_path = os.path.join(SRC_PATH, Layer.STORAGE, Component.DUCKDB)
+        if not os.path.exists(from_path):
+            raise ValueError(f"{from_path} does not exist")
+
+        to_path = os.path.join(
+            self.project.path, PLATFORM_FOLDER, Layer.STORAGE, Component.DUCKDB
+        )
+        if os.path.exists(to_path):
+            raise ValueError(f"{to_path} already exists")
+
+        entities = self.project.settings.get("entities", {})
+        if not any(
+            Component.DUCKDB in settings["layers"].get(Layer.STORAGE, {})
+            for settings in entities.values()
+        ):
+            return
+
+        shutil.copytree(
+            from_path,
+            to_path,
+            ignore=shutil.ignore_patterns(*IGNORE_PATTERNS),
+        )
+        os.makedirs(os.path.join(to_path, "db"))
+
+        hostname = self.project.settings["project"].replace("_", "-")
+        compose_path = os.path.join(to_path, "docker-compose.yaml")
+        Project.replace(
+            compose_path,
+            f"hostname: {PROJECT_NAME}-{Component.DUCKDB}",
+            f"hostname: {hostname}-{Component.DUCKDB}",
+        )
+        Project.replace(
+            compose_path, f"{PROJECT_NAME}", self.project.settings["project"]
+        )
+        config = self.project.config(Component.DUCKDB)
+        if not isinstance(config["refresh_s"], int) or config["refresh_s"] < 1:
+            raise ValueError(
+                f"Invalid refresh_s `{config['refresh_s']}`, expected int > 0"
+            )
+
+        command = "python load.py"
+        if config["parquet"]:
+            command += " -p"
+        if config["api_reads"]:
+            command += f" -i {config['refresh_s']}"
+        Project.replace(compose_path, "command: python load.py", f"command: {command}")
+
+        rprint(f"{to_path}[green] created[/green]")
+
+    def pgbouncer(self):
+        """Configure Storage `PGBOUNCER` component.
+
+        Pools server connections in transaction mode, `pool_size` connections
+        per database are shared by up to `clients` client connections.
+        """
+        from_path = os.path.join(SRC_PATH, Layer.STORAGE, Component.PGBOUNCER)
+        if not os.path.exists(from_path):
+            raise ValueError(f"{from_path} does not exist")
+
+        to_path = os.path.join(
+            self.project.path, PLATFORM_FOLDER, Layer.STORAGE, Component.PGBOUNCER
+        )
+        if os.path.exists(to_path):
+            raise ValueError(f"{to_path} already exists")
+
+        entities = self.project.settings.get("entities", {})
+        ports = self.project.settings.get("ports", {})
+
+        if not any(
+            Component.PGBOUNCER in settings["layers"].get(Layer.STORAGE, {})
+            for settings in entities.values()
+        ):
+            return
+
+        config = self.project.config(Component.PGBOUNCER)
+        connections = self.project.config(Component.POSTGRES)["connections"]
+        server_connections = config["pool_size"] + config["reserve_pool_size"]
+        if server_connections >= connections:
+            raise ValueError(
+                f"Invalid pool_size `{config['pool_size']}` & reserve_pool_size "
+                f"`{config['reserve_pool_size']}`, their sum must be below Postgres "
+                f"connections `{connections}`"
+            )
+
+        shutil.copytree(
+            from_path,
+            to_path,
+            ignore=shutil.ignore_patterns(*IGNORE_PATTERNS),
+        )
+
+        hostname = self.project.settings["project"].replace("_", "-")
+        compose_path = os.path.join(to_path, "docker-compose.yaml")
+        Project.replace(
+            compose_path,
+            f"hostname: {PROJECT_NAME}-{Component.PGBOUNCER}",
+            f"hostname: {hostname}-{Component.PGBOUNCER}",
+        )
+        Project.replace(
+            compose_path, f"{PROJECT_NAME}", self.project.settings["project"]
+        )
+        Project.replace(
+            compose_path,
+            f"{PORTS[Component.PGBOUNCER]}:",
+            f"{ports[Component.PGBOUNCER]}:",
+        )
+
+        ini_path = os.path.join(to_path, "pgbouncer.ini")
+        Project.replace(ini_path, f"{PROJECT_NAME}", self.project.settings["project"])
+        Project.replace(
+            ini_path,
+            f"port={PORTS[Component.POSTGRES]} ",
+            f"port={ports[Component.POSTGRES]} ",
+        )
+        for default, value in (
+            ("max_client_conn = 1000", config["clients"]),
+            ("default_pool_size = 20", config["pool_size"]),
+            ("reserve_pool_size = 5", config["reserve_pool_size"]),
+            ("max_db_connections = 25", server_connections),
+        ):
+            Project.replace(ini_path, default, f"{default.split(' = ')[0]} = {value}")
+
         rprint(f"{to_path}[green] created[/green]")
 
+    @staticmethod
+    def postgres_profile(config: dict) -> dict:
+        """Get `postgresql.conf` settings sized from host resources.
+
+        Memory is split between shared buffers and the OS page cache, per
+        operation memory leaves room for every connection sorting in parallel.
+        """
+        for key in ("memory", "cpus", "connections"):
+            if not isinstance(config[key], int) or config[key] < 1:
+                raise ValueError(f"Invalid {key} `{config[key]}`, expected int > 0")
+        if config["memory"] < 256:
+            raise ValueError(f"Invalid memory `{config['memory']}`, expected >= 256")
+        if config["disk"] not in DISKS:
+            raise ValueError(f"Invalid disk `{config['disk']}`. Valid disks: {DISKS}")
+
+        memory, cpus = config["memory"], config["cpus"]
+        ssd = config["disk"] == Disk.SSD
+        shared_buffers = memory // 4
+        parallel = max(min(cpus // 2, 4), 1)
+        work_mem = (memory - shared_buffers) // (3 * config["connections"]) // parallel
+        max_wal_size = Storage.postgres_wal_size(config)
+
+        return {
+            "listen_addresses": "'*'",
+            "max_connections": config["connections"],
+            # memory
+            "shared_buffers": f"{shared_buffers}MB",
+            "effective_cache_size": f"{memory * 3 // 4}MB",
+            "work_mem": f"{max(work_mem, 4)}MB",
+            "maintenance_work_mem": f"{min(memory // 16, 2048)}MB",
+            # wal & checkpoints, spread over ingest bursts
+            "wal_compression": "on",
+            "min_wal_size": f"{max_wal_size // 4}MB",
+            "max_wal_size": f"{max_wal_size}MB",
+            "checkpoint_timeout": "15min",
+            "checkpoint_completion_target": 0.9,
+            # planner & io
+            "random_page_cost": 1.1 if ssd else 4,
+            "effective_io_concurrency": 200 if ssd else 2,
+            # parallel queries
+            "max_worker_processes": max(cpus, 8),
+            "max_parallel_workers": cpus,
+            "max_parallel_workers_per_gather": parallel,
+            "max_parallel_maintenance_workers": parallel,
+            # autovacuum, keeps append-mostly tables analyzed & visible
+            "autovacuum_max_workers": max(cpus // 2, 3),
+            "autovacuum_naptime": "30s",
+            "autovacuum_vacuum_scale_factor": 0.05,
+            "autovacuum_vacuum_insert_scale_factor": 0.05,
+            "autovacuum_analyze_scale_factor": 0.02,
+            "autovacuum_vacuum_cost_limit": 1000 if ssd else 200,
+        }
+
+    @staticmethod
+    def postgres_bulk_load_profile(config: dict) -> dict:
+        """Get reloadable `postgresql.conf` settings for backfills.
+
+        Commits do not wait for WAL flushes and checkpoints are rare, tables
+        are analyzed once ingestion is done instead of by autovacuum.
+        """
+        return {
+            "synchronous_commit": "off",
+            "max_wal_size": f"{Storage.postgres_wal_size(config) * 4}MB",
+            "checkpoint_timeout": "30min",
+            "autovacuum": "off",
+        }
+
+    @staticmethod
+    def postgres_wal_size(config: dict) -> int:
+        """Get megabytes of WAL between checkpoints, grows with memory."""
+        return min(max(config["memory"], 1024), 16384)
+
+    @staticmethod
+    def write_conf(path: str, description: str, profile: dict):
+        """Write `postgresql.conf` settings."""
+        with open(path, "w") as file:
+            file.write(f"# Generated by opendataframework, {description}\n\n")
+            for name, value in profile.items():
+                file.write(f"{name} = {value}\n")
+
     def __call__(self):
         """Call layer."""
         self.postgres()
+        self.pgbouncer()
+        self.duckdb()
 
 
 class Utility:
@@ -1695,7 +3032,12 @@ class Utility:
         self.project = project
 
     def nginx(self):
-        """Configure Analytics `NGINX` component."""
+        """Configure Analytics `NGINX` component.
+
+        Besides the landing page, API services of entities registering it are
+        proxied under `/api/<plural_name>/` through keepalive upstreams, GET
+        reads are cached for `cache_ttl` seconds.
+        """
         from_path = os.path.join(SRC_PATH, Layer.UTILITY, Component.NGINX)
         if not os.path.exists(from_path):
             raise ValueError(f"{from_path} does not exist")
@@ -1708,6 +3050,13 @@ class Utility:
 
         entities = self.project.settings.get("entities", {})
 
+        config = self.project.config(Component.NGINX)
+        for key, minimum in (("cache_ttl", 0), ("cache_max_mb", 1), ("keepalive", 1)):
+            if not isinstance(config[key], int) or config[key] < minimum:
+                raise ValueError(
+                    f"Invalid {key} `{config[key]}`, expected int >= {minimum}"
+                )
+
         for plural_name, settings in entities.items():
             components = settings["layers"].get(Layer.UTILITY, {})
             if Component.NGINX not in components:
@@ -1716,11 +3065,16 @@ class Utility:
             if os.path.exists(to_path):
                 raise ValueError(f"{to_path} already exists")
 
-            shutil.copytree(
-                from_path,
-                to_path,
-                ignore=shutil.ignore_patterns(*IGNORE_PATTERNS),
-            )
+            patterns = shutil.ignore_patterns(*IGNORE_PATTERNS)
+
+            def ignore(path: str, names: list) -> set:
+                # top level api snippets are rendered, not copied
+                ignored = patterns(path, names)
+                if path == from_path:
+                    ignored.add(Layer.API)
+                return ignored
+
+            shutil.copytree(from_path, to_path, ignore=ignore)
 
             break
 
@@ -1741,6 +3095,8 @@ class Utility:
             f"{ports[Component.NGINX]}:",
         )
 
+        self.nginx_api(from_path, to_path, config)
+
         host = "http://localhost"
         target_path = os.path.join(to_path, "static", "index.html")
 
@@ -1785,6 +3141,8 @@ class Utility:
                     port = components[component].get("port")
                     if not port:
                         continue
+                    if layer == Layer.API:
+                        port = self.project.api_port(component, plural_name)
 
                     tr = template.replace(
                         'class="badge badge-info gap-2">layer_name',
@@ -1801,6 +3159,68 @@ class Utility:
 
         rprint(f"{to_path}[green] created[/green]")
 
+    def nginx_api(self, from_path: str, to_path: str, config: dict):
+        """Configure `NGINX` upstreams & locations of entities' API services.
+
+        Only entities registering `NGINX` are proxied. Consolidated services
+        share one upstream. `INFERENCE` is proxied under
+        `/api/<plural_name>/inference/`.
+        """
+        project_name = self.project.settings["project"]
+        templates = {}
+        for file_name in ("upstream", "location", "inference"):
+            with open(os.path.join(from_path, Layer.API, f"{file_name}.conf")) as file:
+                templates[file_name] = file.read()
+
+        upstreams, locations = {}, []
+        for plural_name, settings in self.project.settings["entities"].items():
+            if Component.NGINX not in settings["layers"].get(Layer.UTILITY, {}):
+                continue
+
+            components = settings["layers"].get(Layer.API, {})
+            for component in (Component.API_POSTGRES, Component.INFERENCE):
+                if component not in components:
+                    continue
+
+                per_entity = self.project.per_entity(component)
+                if component == Component.API_POSTGRES:
+                    name = f"{project_name}_{plural_name if per_entity else component}"
+                    template = templates["location"]
+                    path = plural_name
+                else:
+                    name = f"{project_name}_{plural_name}_{component}"
+                    path = component
+                    if not per_entity:
+                        name = f"{project_name}_{component}"
+                        path = f"{component}/{plural_name}"
+                    template = templates["inference"]
+
+                upstreams[name] = templates["upstream"].replace("upstream-name", name)
+                locations.append(
+                    template.replace("plural-name", plural_name)
+                    .replace("upstream-name", name)
+                    .replace("inference-path", path)
+                )
+
+        if not upstreams:
+            return
+
+        conf_path = os.path.join(to_path, "nginx.conf")
+        Project.replace(conf_path, "# upstreams\n", "\n".join(upstreams.values()))
+        Project.replace(conf_path, "    # locations\n", "\n".join(locations))
+        Project.replace(
+            conf_path, "max_size=1024m", f"max_size={config['cache_max_mb']}m"
+        )
+        Project.replace(conf_path, "keepalive 32;", f"keepalive {config['keepalive']};")
+        if config["cache_ttl"]:
+            Project.replace(
+                conf_path,
+                "proxy_cache_valid 200 5s;",
+                f"proxy_cache_valid 200 {config['cache_ttl']}s;",
+            )
+        else:
+            Project.replace(conf_path, "proxy_cache api;", "proxy_cache off;")
+
     def texlive(self):
         """Configure Analytics `TEXLIVE` component."""
         from_path = os.path.join(SRC_PATH, Layer.UTILITY, Component.TEXLIVE)
@@ -1857,9 +3277,11 @@ class Utility:
 class Research:
     """Reasearch Profile."""
 
-    def __init__(self, project: Project):
+    def __init__(self, project: Project, enums: bool = False, narrow: bool = False):
         """Reasearch Profile instance."""
         self.project = project
+        self.enums = enums
+        self.narrow = narrow
 
     def __call__(self):
         """Call Profile."""
@@ -1876,7 +3298,7 @@ class Research:
                 entity = Entity(name=name, path=file_path)
                 entity.plural_name = entity.name + "s"
                 entity.description = f"{entity.plural_name} {Profile.RESEARCH}"
-                entity.read()
+                entity.read(enums=self.enums, narrow=self.narrow)
                 entity.register(Layer.DEVCONTAINERS, Component.R)
                 entity.register(Layer.UTILITY, Component.TEXLIVE)
 
@@ -1895,15 +3317,26 @@ def init(
     path: str = "",
     data: str = "",
     profile: str = Profile.CUSTOM,
+    link_mode: str = LinkMode.COPY,
+    enums: bool = False,
+    narrow: bool = False,
 ):
-    """Initialize PROJECT settings.json, optionally with a --path."""
+    """Initialize PROJECT settings.json, optionally with a --path.
+
+    Data files are copied into the project, or linked with --link-mode
+    (copy, hardlink, reflink, symlink) where the filesystem supports it.
+    Symlink applies to models only, data files are hardlinked instead, as
+    `data/` is mounted into containers. With --enums, low-cardinality string
+    columns are typed as enums. With --narrow, integer & string columns are
+    sized by the observed values.
+    """
     try:
-        project = Project(name=project, path=path, data=data)
+        project = Project(name=project, path=path, data=data, link_mode=link_mode)
         profile = profile.strip().lower()
         if profile == Profile.CUSTOM:
-            project.init()
+            project.init(enums=enums, narrow=narrow)
         elif profile == Profile.RESEARCH:
-            Research(project)()
+            Research(project, enums=enums, narrow=narrow)()
         else:
             raise ValueError(f"Invalid Profile. Supported profiles are: {PROFILES}")
     except Exception:
@@ -1918,11 +3351,25 @@ def create(
     hooks: bool = True,
     workflows: bool = False,
     tests: bool = True,
+    workers: int = WORKERS,
+    incremental: bool = False,
+    link_mode: str = LinkMode.COPY,
 ):
-    """Create PROJECT structure based on settings.json, optionally with a --path."""
+    """Create PROJECT structure based on settings.json, optionally with a --path.
+
+    With --incremental, an existing project is updated in place: only platform
+    components whose settings.json slice changed are regenerated.
+    """
     try:
-        project = Project(name=project, path=path)
-        project.create(docs=docs, hooks=hooks, workflows=workflows, tests=tests)
+        project = Project(name=project, path=path, link_mode=link_mode)
+        project.create(
+            docs=docs,
+            hooks=hooks,
+            workflows=workflows,
+            tests=tests,
+            workers=workers,
+            incremental=incremental,
+        )
     except Exception:
         rprint(f"[bold red] {traceback.format_exc()} [/bold red]")
 
@@ -1950,9 +3397,69 @@ def install(project: str = "", path: str = ""):
         rprint(f"[bold red] {e} [/bold red]")
 
 
+def services(compose_path: str) -> list:
+    """Get service names from a generated docker-compose.yaml."""
+    with open(compose_path, "r") as file:
+        compose = file.read()
+    compose = compose.split("services:\n", 1)[-1].split("\nnetworks:\n", 1)[0]
+    return re.findall(r"^  ([^\s:]+):$", compose, re.MULTILINE)
+
+
+def docker_compose(path: str, command: list, parallel: int = -1) -> dict:
+    """Run `docker compose` once for every layer profile and time services.
+
+    All profiles are passed to a single invocation, so compose schedules every
+    service at once instead of one layer after another. Output is streamed and
+    each service is timed from the first to the last output line mentioning it.
+    """
+    compose_path = os.path.join(path, "docker-compose.yaml")
+    if not os.path.exists(compose_path):
+        raise ValueError(f"{compose_path} not exists")
+
+    names = services(compose_path)
+    profiles = [arg for layer in COMPONENTS for arg in ("--profile", layer)]
+    args = [
+        "docker",
+        "compose",
+        "--progress",
+        "plain",
+        "--parallel",
+        f"{parallel}",
+        *profiles,
+        *command,
+    ]
+
+    timings = {}
+    started_at = time.monotonic()
+    with subprocess.Popen(
+        args, cwd=path, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+    ) as process:
+        for line in process.stdout:
+            # compose output such as `[+] Running` is not markup
+            rprint(escape(line), end="")
+            now = time.monotonic()
+            for name in names:
+                if re.search(rf"\b{re.escape(name)}\b", line):
+                    timings.setdefault(name, [now, now])[1] = now
+    total = time.monotonic() - started_at
+
+    table = Table("service", "seconds", title=" ".join(command))
+    for name in names:
+        if name in timings:
+            first, last = timings[name]
+            table.add_row(name, f"{last - first:.1f}")
+    table.add_row("total", f"{total:.1f}")
+    rprint(table)
+
+    if process.returncode:
+        raise ValueError(f"`{' '.join(args)}` exited with {process.returncode}")
+
+    return timings
+
+
 @app.command()
-def build(project: str = "", path: str = ""):
-    """Run `docker compose --profile {layer} build`."""
+def build(project: str = "", path: str = "", parallel: int = -1):
+    """Run `docker compose --profile {layer} ... build` for all layers at once."""
     try:
         if path and not os.path.exists(path):
             raise ValueError(f"{path} does not exists")
@@ -1960,22 +3467,15 @@ def build(project: str = "", path: str = ""):
             path = os.getcwd()
         path = os.path.join(path, project, "platform")
 
-        compose_path = os.path.join(path, "docker-compose.yaml")
-        if not os.path.exists(compose_path):
-            raise ValueError(f"{compose_path} not exists")
-
-        for layer in COMPONENTS:
-            subprocess.run(
-                ["docker", "compose", "--profile", f"{layer}", "build"], cwd=path
-            )
+        docker_compose(path, ["build"], parallel=parallel)
 
     except Exception as e:
         rprint(f"[bold red] {e} [/bold red]")
 
 
 @app.command()
-def start(project: str = "", path: str = ""):
-    """Run `docker compose --profile {layer} up -d`."""
+def start(project: str = "", path: str = "", parallel: int = -1):
+    """Run `docker compose --profile {layer} ... up -d` for all layers at once."""
     try:
         if path and not os.path.exists(path):
             raise ValueError(f"{path} does not exists")
@@ -1983,22 +3483,15 @@ def start(project: str = "", path: str = ""):
             path = os.getcwd()
         path = os.path.join(path, project, "platform")
 
-        compose_path = os.path.join(path, "docker-compose.yaml")
-        if not os.path.exists(compose_path):
-            raise ValueError(f"{compose_path} not exists")
-
-        for layer in COMPONENTS:
-            subprocess.run(
-                ["docker", "compose", "--profile", f"{layer}", "up", "-d"], cwd=path
-            )
+        docker_compose(path, ["up", "-d"], parallel=parallel)
 
     except Exception as e:
         rprint(f"[bold red] {e} [/bold red]")
 
 
 @app.command()
-def stop(project: str = "", path: str = ""):
-    """Run `docker compose --profile {layer} stop`."""
+def stop(project: str = "", path: str = "", parallel: int = -1):
+    """Run `docker compose --profile {layer} ... stop` for all layers at once."""
     try:
         if path and not os.path.exists(path):
             raise ValueError(f"{path} does not exists")
@@ -2006,14 +3499,7 @@ def stop(project: str = "", path: str = ""):
             path = os.getcwd()
         path = os.path.join(path, project, "platform")
 
-        compose_path = os.path.join(path, "docker-compose.yaml")
-        if not os.path.exists(compose_path):
-            raise ValueError(f"{compose_path} not exists")
-
-        for layer in COMPONENTS:
-            subprocess.run(
-                ["docker", "compose", "--profile", f"{layer}", "stop"], cwd=path
-            )
+        docker_compose(path, ["stop"], parallel=parallel)
 
     except Exception as e:
         rprint(f"[bold red] {e} [/bold red]")
@@ -2203,6 +3689,24 @@ def chat():
             "lang",
         },
         # STORAGE
+        Component.DUCKDB: {
+            "columnar",
+            "olap",
+            "analytical",
+            "aggregation",
+            "scan",
+            "parquet",
+            "duckdb",
+        },
+        Component.PGBOUNCER: {
+            "pool",
+            "pooler",
+            "pooling",
+            "connections",
+            "scale",
+            "workers",
+            "pgbouncer",
+        },
         Component.POSTGRES: {
             "structured",
             "sql",
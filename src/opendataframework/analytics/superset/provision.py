@@ -0,0 +1,228 @@
+"""Provision module.
+
+Creates the Superset databases & datasets of `provision.json`, existing ones
+are skipped, so it can be rerun:
+
+    python3 analytics/superset/provision.py analytics/superset/provision.json
+
+Logs in once, requests run concurrently, every thread keeps one keep-alive
+connection. Requests failing with connection errors or `RETRY_STATUSES` are
+retried with exponential backoff. Only the standard library is used.
+"""
+
+import argparse
+import http.client
+import json
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+PAGE_SIZE = 100
+RETRY_STATUSES = {429, 502, 503, 504}
+
+
+class ProvisionError(Exception):
+    """Superset API request failed."""
+
+
+class Client:
+    """Superset API client, one keep-alive connection per thread."""
+
+    def __init__(
+        self,
+        url: str,
+        retries: int = 5,
+        backoff_s: float = 0.5,
+        timeout_s: float = 30,
+    ):
+        """Create client instance."""
+        parts = urllib.parse.urlsplit(url)
+        self.connection_class = (
+            http.client.HTTPSConnection
+            if parts.scheme == "https"
+            else http.client.HTTPConnection
+        )
+        self.netloc = parts.netloc
+        self.retries = retries
+        self.backoff_s = backoff_s
+        self.timeout_s = timeout_s
+        self.access_token = None
+        self._local = threading.local()
+
+    def connection(self) -> http.client.HTTPConnection:
+        """Get thread's connection, opened on first use."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self.connection_class(self.netloc, timeout=self.timeout_s)
+            self._local.connection = connection
+        return connection
+
+    def close(self):
+        """Close thread's connection."""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def request(self, method: str, path: str, body: Optional[dict] = None) -> dict:
+        """Send request, get decoded JSON response."""
+        headers = {"Accept": "application/json"}
+        data = None
+        if body is not None:
+            headers["Content-Type"] = "application/json"
+            data = json.dumps(body).encode()
+        if self.access_token:
+            headers["Authorization"] = f"Bearer {self.access_token}"
+
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(self.backoff_s * 2 ** (attempt - 1))
+            try:
+                connection = self.connection()
+                connection.request(method, path, body=data, headers=headers)
+                response = connection.getresponse()
+                payload = response.read()
+            except (OSError, http.client.HTTPException) as error:
+                # stale keep-alive connections end up here too
+                self.close()
+                failure = repr(error)
+                continue
+
+            if response.status < 400:
+                return json.loads(payload) if payload else {}
+            failure = f"{response.status} {payload[:500].decode(errors='replace')}"
+            if response.status not in RETRY_STATUSES:
+                break
+
+        raise ProvisionError(f"{method} {path} failed: {failure}")
+
+    def login(self, username: str, password: str):
+        """Log in, the access token is sent with every later request."""
+        response = self.request(
+            "POST",
+            "/api/v1/security/login",
+            {
+                "username": username,
+                "password": password,
+                "provider": "db",
+                "refresh": True,
+            },
+        )
+        self.access_token = response["access_token"]
+
+
+def run(
+    executor: ThreadPoolExecutor, call: Callable, items: Iterable[Any]
+) -> List[Any]:
+    """Call with every item concurrently, re-raise the first failure."""
+    return [future.result() for future in [executor.submit(call, i) for i in items]]
+
+
+def list_all(client: Client, executor: ThreadPoolExecutor, resource: str) -> List:
+    """List all objects of resource, pages after the first are fetched concurrently."""
+
+    def page(number: int) -> dict:
+        query = urllib.parse.quote(f"(page:{number},page_size:{PAGE_SIZE})")
+        return client.request("GET", f"/api/v1/{resource}/?q={query}")
+
+    first = page(0)
+    pages = -(-first["count"] // PAGE_SIZE)
+    results = list(first["result"])
+    for response in run(executor, page, range(1, pages)):
+        results.extend(response["result"])
+    return results
+
+
+def provision(client: Client, spec: dict, workers: int = 8) -> Dict[str, int]:
+    """Create missing databases & datasets, set datasets' `cache_timeout`."""
+    counts = {"databases": 0, "datasets": 0}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        database_ids = {
+            database["database_name"]: database["id"]
+            for database in list_all(client, executor, "database")
+        }
+
+        def create_database(database: dict) -> Tuple[str, int]:
+            response = client.request("POST", "/api/v1/database/", database)
+            return database["database_name"], response["id"]
+
+        missing = [
+            database
+            for database in spec.get("databases", [])
+            if database["database_name"] not in database_ids
+        ]
+        database_ids.update(run(executor, create_database, missing))
+        counts["databases"] = len(missing)
+
+        dataset_ids = {
+            (dataset["database"]["id"], dataset["schema"], dataset["table_name"]): (
+                dataset["id"]
+            )
+            for dataset in list_all(client, executor, "dataset")
+        }
+
+        def key(dataset: dict) -> Tuple[int, str, str]:
+            database_id = database_ids.get(dataset["database_name"])
+            if database_id is None:
+                raise ProvisionError(
+                    f"Unknown database `{dataset['database_name']}` of dataset "
+                    f"`{dataset['table_name']}`"
+                )
+            return database_id, dataset["schema"], dataset["table_name"]
+
+        def create_dataset(dataset: dict) -> bool:
+            database_id, schema, table_name = key(dataset)
+            dataset_id = dataset_ids.get((database_id, schema, table_name))
+            created = dataset_id is None
+            if created:
+                response = client.request(
+                    "POST",
+                    "/api/v1/dataset/",
+                    {
+                        "database": database_id,
+                        "schema": schema,
+                        "table_name": table_name,
+                    },
+                )
+                dataset_id = response["id"]
+            if dataset.get("cache_timeout") is not None:
+                client.request(
+                    "PUT",
+                    f"/api/v1/dataset/{dataset_id}",
+                    {"cache_timeout": dataset["cache_timeout"]},
+                )
+            return created
+
+        counts["datasets"] = sum(
+            run(executor, create_dataset, spec.get("datasets", []))
+        )
+    return counts
+
+
+def main():
+    """Main."""
+    parser = argparse.ArgumentParser(description="Superset provisioner")
+    parser.add_argument("spec", help="provision.json path")
+    parser.add_argument("--url", help="Superset url, spec's `url` by default")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin")
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    with open(args.spec) as file:
+        spec = json.load(file)
+
+    start = time.perf_counter()
+    client = Client(args.url or spec["url"])
+    client.login(args.username, args.password)
+    counts = provision(client, spec, args.workers)
+    print(
+        f"Created {counts['databases']} databases & {counts['datasets']} datasets "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+#!/bin/bash
+# Refresh rollup tables of Superset datasets, buckets since the last refresh
+# only, e.g. hourly by cron: 5 * * * * /path/to/refresh.sh
+# Entities without a table yet are skipped, failures are reported at the end.
+cd "$(dirname "$0")"
+failed=()
+for file in *.sql; do
+  [ -e "$file" ] || continue
+  entity="${file%.sql}"
+  exists=$(docker exec -i project_name_postgres psql -U admin -d project_name \
+    -tAc "SELECT to_regclass('public.\"$entity\"') IS NOT NULL")
+  if [ "$exists" != "t" ]; then
+    echo ">> Skipping $entity rollups, table $entity does not exist yet"
+    continue
+  fi
+  echo ">> Refreshing $entity rollups"
+  docker exec -i project_name_postgres psql -U admin -d project_name \
+    -v ON_ERROR_STOP=1 -q < "$file" || failed+=("$entity")
+done
+if [ ${#failed[@]} -gt 0 ]; then
+  echo ">> Refreshing rollups failed: ${failed[*]}" >&2
+  exit 1
+fi
@@ -9,8 +9,8 @@ docker exec -it project_name_superset superset fab create-admin \
 docker exec -it project_name_superset superset db upgrade
 docker exec -it project_name_superset superset init
 
-json=$(curl -k 'http://localhost:8088/api/v1/security/login' \
-        -X POST -H 'Content-Type: application/json' \
-        -d '{"password": "admin", "provider": "db", "refresh": true, "username": "admin"}') \
-&& access_token=$(echo $json | sed "s/{.*\"access_token\":\"\([^\"]*\).*}/\1/g") \
-&& echo "access_token = $access_token" \
+# create rollup tables, then Superset databases & datasets even if rollups failed
+analytics/superset/rollups/refresh.sh \
+  || echo ">> Rollups failed, their datasets may not be provisioned" >&2
+python3 analytics/superset/provision.py analytics/superset/provision.json \
+  || echo ">> Provisioning Superset databases & datasets failed" >&2
@@ -0,0 +1,82 @@
+"""Superset config module.
+
+Caches are kept in `SUPERSET_HOME`, or in redis if `SUPERSET_CACHE_URL` is set.
+SQL Lab queries of databases allowing async run on a celery worker, brokered
+through `SUPERSET_HOME` files unless redis is set.
+"""
+
+import os
+
+from cachelib.file import FileSystemCache
+from cachelib.redis import RedisCache
+
+SUPERSET_HOME = os.environ.get("SUPERSET_HOME", "/app/superset_home")
+CACHE_URL = os.environ.get("SUPERSET_CACHE_URL", "")
+# seconds, datasets' `cache_timeout` overrides it for chart data
+CACHE_DEFAULT_TIMEOUT = int(os.environ.get("SUPERSET_CACHE_TIMEOUT", "300"))
+
+
+def cache_config(prefix: str, timeout: int = CACHE_DEFAULT_TIMEOUT) -> dict:
+    """Get flask-caching config, filesystem backend unless redis is set."""
+    if CACHE_URL:
+        return {
+            "CACHE_TYPE": "RedisCache",
+            "CACHE_DEFAULT_TIMEOUT": timeout,
+            "CACHE_KEY_PREFIX": f"superset_{prefix}_",
+            "CACHE_REDIS_URL": CACHE_URL,
+        }
+    return {
+        "CACHE_TYPE": "FileSystemCache",
+        "CACHE_DEFAULT_TIMEOUT": timeout,
+        "CACHE_DIR": os.path.join(SUPERSET_HOME, "cache", prefix),
+        "CACHE_THRESHOLD": 10000,
+    }
+
+
+def folder(*names: str) -> str:
+    """Get folder in `SUPERSET_HOME`, created if missing."""
+    path = os.path.join(SUPERSET_HOME, *names)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+# dashboards, charts & datasets metadata
+CACHE_CONFIG = cache_config("metadata")
+# chart query results
+DATA_CACHE_CONFIG = cache_config("data")
+FILTER_STATE_CACHE_CONFIG = cache_config("filter_state", 86400)
+EXPLORE_FORM_DATA_CACHE_CONFIG = cache_config("explore_form_data", 86400)
+
+# SQL Lab async query results
+if CACHE_URL:
+    import redis
+
+    RESULTS_BACKEND = RedisCache(
+        host=redis.Redis.from_url(CACHE_URL), key_prefix="superset_results_"
+    )
+else:
+    RESULTS_BACKEND = FileSystemCache(folder("results"), threshold=10000)
+
+
+class CeleryConfig:
+    """Celery config of SQL Lab async queries."""
+
+    imports = ("superset.sql_lab",)
+    worker_prefetch_multiplier = 1
+    task_acks_late = False
+    if CACHE_URL:
+        broker_url = CACHE_URL
+        result_backend = CACHE_URL
+    else:
+        broker_url = "filesystem://"
+        broker_transport_options = {
+            "data_folder_in": folder("celery", "queue"),
+            "data_folder_out": folder("celery", "queue"),
+            "processed_folder": folder("celery", "processed"),
+        }
+        result_backend = f"file://{folder('celery', 'results')}"
+
+
+CELERY_CONFIG = CeleryConfig
+
+SQLLAB_ASYNC_TIME_LIMIT_SEC = 6 * 60 * 60
@@ -0,0 +1,104 @@
+"""Aggregate module."""
+
+import re
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Tuple, Type
+
+from sqlalchemy import DateTime, func
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import GenericFunction
+from sqlmodel import SQLModel
+
+UNITS = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+CALENDAR_UNITS = ("month", "quarter", "year")
+FUNCTIONS = ("count", "sum", "avg", "min", "max")
+ORIGIN = datetime(2000, 1, 1)
+
+
+class date_bin(GenericFunction):
+    """`date_bin(stride, source, origin)`, rendered as `time_bucket` on DuckDB."""
+
+    type = DateTime()
+    inherit_cache = True
+
+
+@compiles(date_bin, "duckdb")
+def compile_date_bin(element: date_bin, compiler: Any, **kw) -> str:
+    """Compile `date_bin` as DuckDB's `time_bucket`, same arguments."""
+    return f"time_bucket({compiler.process(element.clauses, **kw)})"
+
+
+def time_bucket(
+    column: Any, bucket: str, start_at: datetime, end_at: datetime, max_buckets: int
+) -> Any:
+    """Get time bucket of column, `date_bin` for `<n><s|m|h|d|w>` intervals.
+
+    Calendar units (`month`, `quarter`, `year`) are bucketed by `date_trunc`.
+    """
+    if bucket in CALENDAR_UNITS:
+        return func.date_trunc(bucket, column)
+
+    match = re.fullmatch(r"([1-9]\d*)([smhdw])", bucket)
+    if not match:
+        raise ValueError(
+            f"Invalid bucket `{bucket}`. Valid buckets are `<n><unit>` with units "
+            f"{list(UNITS)}, or {list(CALENDAR_UNITS)}"
+        )
+
+    interval = timedelta(**{UNITS[match[2]]: int(match[1])})
+    if (end_at - start_at) / interval > max_buckets:
+        raise ValueError(f"Bucket `{bucket}` gives more than {max_buckets} buckets")
+    return func.date_bin(interval, column, ORIGIN)
+
+
+def aggregate(column: Any, function: str) -> Tuple[Any, type]:
+    """Get aggregate of column and its type, `pNN` is a percentile."""
+    if function == "count":
+        return func.count(column), int
+    if function in FUNCTIONS:
+        return getattr(func, function)(column), float
+
+    match = re.fullmatch(r"p(\d{1,2}(\.\d+)?)", function)
+    if not match or not 0 < float(match[1]) < 100:
+        raise ValueError(
+            f"Invalid function `{function}`. Valid functions are {list(FUNCTIONS)} "
+            "or percentiles `p1`..`p99`"
+        )
+    return func.percentile_cont(float(match[1]) / 100).within_group(column), float
+
+
+def numeric_fields(model: Type[SQLModel], fields: List[str]) -> List[str]:
+    """Check that fields are model's `int` or `float` fields."""
+    numeric = [
+        name for name, field in model.__fields__.items() if field.type_ in (int, float)
+    ]
+    for field_name in fields:
+        if field_name not in numeric:
+            raise ValueError(
+                f"Invalid field `{field_name}`. Numeric fields are {numeric}"
+            )
+    return fields
+
+
+def aggregates(
+    model: Type[SQLModel], fields: List[str], functions: List[str]
+) -> Tuple[Dict[str, type], List[Any]]:
+    """Get `{name: type}` and columns of model's numeric fields aggregates.
+
+    Without fields only `count` of rows is supported.
+    """
+    numeric_fields(model, fields)
+
+    types, columns = {}, []
+    if not fields:
+        if set(functions) != {"count"}:
+            raise ValueError("Fields are required for functions other than count")
+        types["count"] = int
+        columns.append(func.count().label("count"))
+
+    for field_name in dict.fromkeys(fields):
+        for function in dict.fromkeys(functions):
+            name = f"{field_name}_{function}"
+            column, types[name] = aggregate(getattr(model, field_name), function)
+            columns.append(column.label(name))
+    return types, columns
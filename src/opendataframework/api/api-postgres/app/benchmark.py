@@ -0,0 +1,92 @@
+"""Benchmark module.
+
+Compares per-request latency of entity lookups & inserts with the previous
+query & `commit`/`refresh` implementations, on a copy of a stored entity:
+
+    python -m app.benchmark --requests 1000
+"""
+
+import argparse
+import statistics
+import time
+from typing import Callable, List
+
+from sqlmodel import Session, delete, select
+
+from app.crud import get_entity, post_entity
+from app.database import engine
+from app.ids import new_uid
+from app.models import Entity
+
+
+def query_entity(uid, session: Session) -> Entity:
+    """Read entity by query, previous implementation."""
+    return session.query(Entity).filter(Entity.uid == uid).first()
+
+
+def refresh_entity(entity: Entity, session: Session) -> Entity:
+    """Create entity, refreshed after commit, previous implementation."""
+    session.add(entity)
+    session.commit()
+    session.refresh(entity)
+    return entity
+
+
+def measure(call: Callable[[Session], None], requests: int) -> List[float]:
+    """Measure milliseconds per request, every request gets its own session."""
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        with Session(engine) as session:
+            call(session)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def report(name: str, latencies: List[float]):
+    """Print latency percentiles."""
+    latencies = sorted(latencies)
+    print(
+        f"{name:<24} mean {statistics.mean(latencies):8.3f} ms"
+        f"  p50 {latencies[len(latencies) // 2]:8.3f} ms"
+        f"  p95 {latencies[int(len(latencies) * 0.95)]:8.3f} ms"
+    )
+
+
+def main():
+    """Measure lookups & inserts, then delete the inserted entities."""
+    parser = argparse.ArgumentParser(description="entities CRUD benchmark")
+    parser.add_argument("--requests", type=int, default=1000)
+    args = parser.parse_args()
+
+    with Session(engine) as session:
+        stored = session.exec(select(Entity).limit(1)).first()
+    if stored is None:
+        raise SystemExit("No entities stored, ingest some first")
+
+    values = stored.dict(exclude={"uid"})
+    uids = []
+
+    def new_entity() -> Entity:
+        entity = Entity(**values, uid=new_uid())
+        uids.append(entity.uid)
+        return entity
+
+    try:
+        for name, call in (
+            ("insert refresh", lambda s: refresh_entity(new_entity(), s)),
+            ("insert returning", lambda s: post_entity(new_entity(), s)),
+            ("lookup query", lambda s: query_entity(stored.uid, s)),
+            ("lookup primary key", lambda s: get_entity(stored.uid, s)),
+        ):
+            # warm up connection pool & statement cache
+            measure(call, 10)
+            report(name, measure(call, args.requests))
+    finally:
+        with Session(engine) as session:
+            session.exec(delete(Entity).where(Entity.uid.in_(uids)))
+            session.commit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Buffer module."""
+
+import asyncio
+from typing import List, Type
+
+from sqlmodel import Session, SQLModel
+
+from app.database import engine
+
+
+class BufferFull(Exception):
+    """Buffer is full."""
+
+
+class Buffer:
+    """Write-behind buffer, groups single rows into multi-row inserts.
+
+    Rows are queued and flushed by a background task every `flush_ms`
+    milliseconds or `max_rows` rows, whichever comes first. Callers wait
+    until the batch holding their row is committed. Once `queue_size` rows
+    are waiting, callers wait up to `timeout_ms` before `BufferFull`.
+    """
+
+    instances: List["Buffer"] = []
+
+    def __init__(
+        self,
+        model: Type[SQLModel],
+        flush_ms: int,
+        max_rows: int,
+        queue_size: int,
+        timeout_ms: int,
+    ):
+        """Create buffer instance."""
+        self.model = model
+        self.flush_ms = flush_ms
+        self.max_rows = max_rows
+        self.queue_size = queue_size
+        self.timeout_ms = timeout_ms
+        self._loop = None
+        self._queue = None
+        self._task = None
+        Buffer.instances.append(self)
+
+    def start(self):
+        """Start flushing on the running event loop."""
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._task = self._loop.create_task(self.run())
+
+    async def put(self, row: SQLModel):
+        """Queue row and wait until it is committed."""
+        if self._loop is not asyncio.get_running_loop():
+            self.start()
+
+        future = self._loop.create_future()
+        try:
+            await asyncio.wait_for(
+                self._queue.put((row, future)), self.timeout_ms / 1000
+            )
+        except asyncio.TimeoutError:
+            raise BufferFull(f"{self.queue_size} rows are waiting")
+        await future
+
+    async def run(self):
+        """Flush queued rows in batches."""
+        while True:
+            batch = [await self._queue.get()]
+            deadline = self._loop.time() + self.flush_ms / 1000
+
+            while len(batch) < self.max_rows:
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                await self._loop.run_in_executor(
+                    None, self.insert, [row for row, _ in batch]
+                )
+            except Exception as error:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+            else:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_result(None)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def insert(self, rows: List[SQLModel]):
+        """Insert rows in one transaction."""
+        with Session(engine) as session:
+            session.bulk_insert_mappings(self.model, [row.dict() for row in rows])
+            session.commit()
+
+    async def close(self):
+        """Flush queued rows and stop."""
+        if self._task is None:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        self._task = None
+        self._loop = None
+
+
+async def close():
+    """Flush and stop all buffers."""
+    for buffer in Buffer.instances:
+        await buffer.close()
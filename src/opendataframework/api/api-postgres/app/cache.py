@@ -0,0 +1,239 @@
+"""Cache module."""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Iterable, List, NamedTuple, Optional, Type
+
+import msgpack
+from fastapi import Request, Response, status
+from pydantic import parse_obj_as
+from sqlmodel import SQLModel
+
+from app import settings
+
+# buckets of wall-clock times, as range reads compare `__time` with them
+EPOCH = datetime(1970, 1, 1)
+
+
+class Entry(NamedTuple):
+    """Cached response."""
+
+    etag: str
+    last_modified: str
+    media_type: str
+    body: bytes
+
+
+class Memory:
+    """In-process LRU backend, keeps entries while they fit into `max_bytes`.
+
+    Entries are per worker process, use a shared backend with several workers.
+    """
+
+    def __init__(self, max_bytes: int):
+        """Create memory backend instance."""
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Get value of key, None if missing or expired."""
+        with self._lock:
+            value, expires_at = self._entries.get(key, (None, None))
+            if value is None:
+                return None
+            if expires_at and expires_at < time.monotonic():
+                self._pop(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl_s: int):
+        """Set value of key, evicting least recently used entries to fit."""
+        if len(value) > self.max_bytes:
+            return
+
+        expires_at = time.monotonic() + ttl_s if ttl_s else None
+        with self._lock:
+            self._pop(key)
+            while self._entries and self.size + len(value) > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+            self._entries[key] = (value, expires_at)
+            self.size += len(value)
+
+    def _pop(self, key: str):
+        value, _ = self._entries.pop(key, (b"", None))
+        self.size -= len(value)
+
+    def generations(self, keys: List[str]) -> List[int]:
+        """Get generation counters."""
+        with self._lock:
+            return [self._generations.get(key, 0) for key in keys]
+
+    def incr(self, keys: Iterable[str], ttl_s: int):
+        """Increment generation counters."""
+        with self._lock:
+            for key in keys:
+                self._generations[key] = self._generations.get(key, 0) + 1
+
+
+class Redis:
+    """Redis backend, shared by workers & services."""
+
+    def __init__(self, url: str):
+        """Create redis backend instance."""
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Get value of key, None if missing or expired."""
+        return self.client.get(key)
+
+    def set(self, key: str, value: bytes, ttl_s: int):
+        """Set value of key, eviction is left to redis `maxmemory-policy`."""
+        self.client.set(key, value, ex=ttl_s or None)
+
+    def generations(self, keys: List[str]) -> List[int]:
+        """Get generation counters."""
+        if not keys:
+            return []
+        return [int(value or 0) for value in self.client.mget(keys)]
+
+    def incr(self, keys: Iterable[str], ttl_s: int):
+        """Increment generation counters.
+
+        Counters outlive entries, so an expired counter never revives one.
+        """
+        pipeline = self.client.pipeline(transaction=False)
+        for key in keys:
+            pipeline.incr(key)
+            if ttl_s:
+                pipeline.expire(key, 2 * ttl_s)
+        pipeline.execute()
+
+
+class Cache:
+    """Read-through cache of encoded responses.
+
+    Range reads are keyed by their query and the generation counters of the
+    `bucket_s` aligned time buckets they cover, writes increment counters of
+    the buckets they touch, so stale entries are never read again. Ranges
+    covering more than `max_buckets` buckets are not cached. Rows are never
+    updated, so lookups by uid are keyed by uid only.
+    """
+
+    def __init__(self, backend: Any, bucket_s: int, max_buckets: int, ttl_s: int):
+        """Create cache instance."""
+        self.backend = backend
+        self.bucket_s = bucket_s
+        self.max_buckets = max_buckets
+        self.ttl_s = ttl_s
+
+    def bucket(self, ts: Any) -> int:
+        """Get index of time bucket holding timestamp, its offset is dropped."""
+        ts = parse_obj_as(datetime, ts).replace(tzinfo=None)
+        return (ts - EPOCH) // timedelta(seconds=self.bucket_s)
+
+    def uid_key(self, model: Type[SQLModel], uid: str, media_type: str) -> str:
+        """Get key of lookup by uid."""
+        return self.key(model, "uid", uid, media_type)
+
+    def range_key(
+        self,
+        model: Type[SQLModel],
+        start_at: datetime,
+        end_at: datetime,
+        request: Request,
+        media_type: str,
+    ) -> Optional[str]:
+        """Get key of range read, None if range covers too many buckets."""
+        first, last = self.bucket(start_at), self.bucket(end_at)
+        if last - first >= self.max_buckets:
+            return None
+
+        generations = self.backend.generations(
+            [self.generation_key(model, index) for index in range(first, last + 1)]
+        )
+        params = sorted(request.query_params.multi_items())
+        return self.key(model, "range", params, generations, media_type)
+
+    def key(self, model: Type[SQLModel], *parts: Any) -> str:
+        """Get key of parts in model's namespace."""
+        digest = hashlib.sha256(repr(parts).encode()).hexdigest()
+        return f"cache:{model.__tablename__}:{digest}"
+
+    def generation_key(self, model: Type[SQLModel], index: int) -> str:
+        """Get key of bucket's generation counter."""
+        return f"cache:{model.__tablename__}:generation:{index}"
+
+    def get(self, key: str) -> Optional[Entry]:
+        """Get cached response."""
+        value = self.backend.get(key)
+        return Entry(*msgpack.unpackb(value)) if value else None
+
+    def set(self, key: str, media_type: str, body: bytes) -> Entry:
+        """Cache response, its ETag is derived from the key."""
+        entry = Entry(
+            etag=f'"{key.rpartition(":")[2][:32]}"',
+            last_modified=formatdate(usegmt=True),
+            media_type=media_type,
+            body=body,
+        )
+        self.backend.set(key, msgpack.packb(tuple(entry)), self.ttl_s)
+        return entry
+
+    def invalidate(self, model: Type[SQLModel], timestamps: Iterable[Any]):
+        """Invalidate range reads covering timestamps."""
+        indexes = {self.bucket(ts) for ts in timestamps}
+        self.backend.incr(
+            [self.generation_key(model, index) for index in sorted(indexes)],
+            self.ttl_s,
+        )
+
+
+def fresh(request: Request, entry: Entry) -> bool:
+    """Check whether client's copy is fresh, per conditional request headers."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        etags = [etag.strip().removeprefix("W/") for etag in if_none_match.split(",")]
+        return "*" in etags or entry.etag in etags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None:
+        return False
+    try:
+        return parsedate_to_datetime(if_modified_since) >= parsedate_to_datetime(
+            entry.last_modified
+        )
+    except (TypeError, ValueError):
+        return False
+
+
+def respond(request: Request, entry: Entry) -> Response:
+    """Respond with entry, or 304 if client's copy is fresh."""
+    headers = {"ETag": entry.etag, "Last-Modified": entry.last_modified}
+    if fresh(request, entry):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(entry.body, media_type=entry.media_type, headers=headers)
+
+
+cache = (
+    Cache(
+        Redis(settings.cache_url)
+        if settings.cache_url
+        else Memory(settings.cache_max_mb * 1024 * 1024),
+        bucket_s=settings.cache_bucket_s,
+        max_buckets=settings.cache_max_buckets,
+        ttl_s=settings.cache_ttl_s,
+    )
+    # workers don't see each other's invalidations of in-process caches
+    if settings.cache and (settings.cache_url or settings.web_concurrency == 1)
+    else None
+)
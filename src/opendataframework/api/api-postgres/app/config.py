@@ -15,3 +15,46 @@ class Settings(BaseSettings):
 
     # Database
     db_connection_str: str
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_echo: bool = False
+    db_statement_cache_size: int = 500
+    # range reads, e.g. a read-only DuckDB copy, primary database if empty
+    db_read_connection_str: str = ""
+    db_read_recycle_s: int = 60
+
+    # Aggregate
+    aggregate_max_buckets: int = 10000
+
+    # Cache
+    cache: bool = True
+    cache_bucket_s: int = 3600
+    cache_max_buckets: int = 1000
+    cache_max_mb: int = 64
+    cache_ttl_s: int = 3600
+    cache_url: str = ""
+    # uvicorn workers, in-process caches are disabled with more than one
+    web_concurrency: int = 1
+
+    # Downsample
+    downsample_batch_rows: int = 10000
+    downsample_max_points: int = 10000
+
+    # Parquet
+    parquet_compression: str = "zstd"
+    parquet_row_group_size: int = 65536
+
+    # Stream
+    stream_batch_rows: int = 1000
+    stream_max_errors: int = 100
+    stream_max_line_bytes: int = 1048576
+
+    # Uid
+    uid_kind: str = "uuid4"
+
+    # Write-behind
+    write_behind: bool = False
+    write_behind_flush_ms: int = 10
+    write_behind_max_rows: int = 1000
+    write_behind_queue_size: int = 10000
+    write_behind_timeout_ms: int = 1000
@@ -1,17 +1,36 @@
 """CRUD module."""
 
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
 from uuid import UUID
 
-from sqlmodel import Session
+from sqlalchemy import insert, inspect, literal_column
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql import Select
+from sqlmodel import Session, select
 
+from app.aggregate import aggregates, numeric_fields, time_bucket
+from app.downsample import downsample
+from app.formats import field_types
 from app.models import Entity
 
 
-def get_entity(uid: str | UUID, session: Session) -> Entity:
-    """Read entity."""
-    return session.query(Entity).filter(Entity.uid == uid).first()
+@contextmanager
+def autocommit(session: Session) -> Iterator[Connection]:
+    """Get connection running a single statement without `BEGIN` & `COMMIT`.
+
+    A separate connection of session's engine, the session's own transaction
+    keeps its isolation level, which is reset once the connection is returned
+    to the pool.
+    """
+    with session.get_bind().connect() as connection:
+        yield connection.execution_options(isolation_level="AUTOCOMMIT")
+
+
+def get_entity(uid: str | UUID, session: Session) -> Entity | None:
+    """Read entity by primary key, without a query if already loaded."""
+    return session.get(Entity, uid)
 
 
 def get_entities(
@@ -23,9 +42,110 @@ def get_entities(
     return entities
 
 
+def select_entities(
+    start_at: datetime, end_at: datetime, fields: List[str], filters: List[Any]
+) -> Tuple[Dict[str, type], Select]:
+    """Select entities' `fields` in period, matching `filters`."""
+    types = field_types(Entity)
+    types = {name: types[name] for name in fields or types}
+    period = Entity.ts.between(str(start_at), str(end_at))
+    statement = select(*(getattr(Entity, name).label(name) for name in types))
+    return types, statement.where(period, *filters)
+
+
+def get_entities_rows(
+    start_at: datetime,
+    end_at: datetime,
+    session: Session,
+    fields: List[str] = None,
+    filters: List[Any] = (),
+) -> Tuple[Dict[str, type], List[tuple]]:
+    """Read entities as `{name: type}` and cursor rows, without model instances."""
+    types, statement = select_entities(start_at, end_at, fields, filters)
+    rows = session.execute(statement).all()
+    return types, rows
+
+
+def get_entities_partitions(
+    start_at: datetime,
+    end_at: datetime,
+    session: Session,
+    size: int,
+    fields: List[str] = None,
+    filters: List[Any] = (),
+) -> Tuple[Dict[str, type], Iterator[Sequence]]:
+    """Read entities as `{name: type}` and row partitions of server-side cursor."""
+    types, statement = select_entities(start_at, end_at, fields, filters)
+    result = session.execute(statement.execution_options(stream_results=True))
+    return types, result.partitions(size)
+
+
+def get_entities_aggregate(
+    start_at: datetime,
+    end_at: datetime,
+    bucket: str,
+    fields: List[str],
+    functions: List[str],
+    max_buckets: int,
+    session: Session,
+) -> Tuple[Dict[str, type], List[tuple]]:
+    """Aggregate entities' numeric fields in time buckets."""
+    types, columns = aggregates(Entity, fields, functions)
+    bucket = time_bucket(Entity.ts, bucket, start_at, end_at, max_buckets)
+    period = Entity.ts.between(str(start_at), str(end_at))
+    # group & order by position, as bound parameters make expressions differ
+    statement = (
+        select(bucket.label("bucket"), *columns)
+        .where(period)
+        .group_by(literal_column("1"))
+        .order_by(literal_column("1"))
+    )
+    rows = session.execute(statement).all()
+    return {"bucket": datetime, **types}, rows
+
+
+def get_entities_downsample(
+    start_at: datetime,
+    end_at: datetime,
+    fields: List[str],
+    points: int,
+    method: str,
+    session: Session,
+    size: int,
+) -> Tuple[Dict[str, type], List[tuple]]:
+    """Downsample entities' numeric fields in one pass over server-side cursor."""
+    numeric_fields(Entity, fields)
+    fields = list(dict.fromkeys(fields))
+    period = Entity.ts.between(str(start_at), str(end_at))
+    statement = (
+        select(Entity.ts, *(getattr(Entity, name) for name in fields))
+        .where(period)
+        .order_by(Entity.ts)
+    )
+
+    def rows():
+        result = session.execute(statement.execution_options(stream_results=True))
+        for partition in result.partitions(size):
+            yield from partition
+
+    points = downsample(rows(), fields, start_at, end_at, points, method)
+    return {"field": str, "ts": datetime, "value": float}, list(points)
+
+
 def post_entity(entity: Entity, session: Session) -> Entity:
-    """Create entity."""
-    session.add(entity)
+    """Create entity in one `INSERT ... RETURNING` round trip."""
+    columns = inspect(Entity).columns
+    statement = (
+        insert(Entity)
+        .values({columns[name]: value for name, value in entity.dict().items()})
+        .returning(*columns)
+    )
+    with autocommit(session) as connection:
+        row = connection.execute(statement).one()
+    return Entity(**dict(zip(columns.keys(), row)))
+
+
+def post_entities(entities: List[Entity], session: Session):
+    """Create entities in one multi-row insert."""
+    session.bulk_insert_mappings(Entity, [entity.dict() for entity in entities])
     session.commit()
-    session.refresh(entity)
-    return entity
@@ -4,7 +4,26 @@ from sqlmodel import SQLModel, create_engine
 
 from app import settings
 
-engine = create_engine(settings.db_connection_str, echo=True)
+engine = create_engine(
+    settings.db_connection_str,
+    echo=settings.db_echo,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    # compiled statements, reused by every request
+    query_cache_size=settings.db_statement_cache_size,
+)
+
+read_engine = (
+    create_engine(
+        settings.db_read_connection_str,
+        echo=settings.db_echo,
+        query_cache_size=settings.db_statement_cache_size,
+        # reconnect to pick up reloaded read-only copies
+        pool_recycle=settings.db_read_recycle_s,
+    )
+    if settings.db_read_connection_str
+    else engine
+)
 
 
 def init_db():
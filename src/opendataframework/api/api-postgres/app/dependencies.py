@@ -2,10 +2,16 @@
 
 from sqlmodel import Session
 
-from app.database import engine
+from app.database import engine, read_engine
 
 
 def get_session():
     """Get database session."""
     with Session(engine) as session:
         yield session
+
+
+def get_read_session():
+    """Get database session of range reads."""
+    with Session(read_engine) as session:
+        yield session
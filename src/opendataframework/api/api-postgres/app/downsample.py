@@ -0,0 +1,130 @@
+"""Downsample module."""
+
+from datetime import datetime
+from typing import Any, Iterable, Iterator, List, Sequence, Tuple
+
+METHODS = ("lttb", "minmax")
+
+
+def buckets(
+    rows: Iterable[Sequence], start_at: datetime, end_at: datetime, count: int
+) -> Iterator[List[Sequence]]:
+    """Group time ordered `(ts, *values)` rows into `count` equal time buckets.
+
+    Only one bucket is held in memory, empty buckets are skipped.
+    """
+    width = (end_at - start_at) / count
+    bucket, index = [], None
+    for row in rows:
+        current = min(int((row[0] - start_at) / width), count - 1)
+        if current != index and bucket:
+            yield bucket
+            bucket = []
+        index = current
+        bucket.append(row)
+    if bucket:
+        yield bucket
+
+
+def area(a: Tuple[float, float], b: Sequence, c: Tuple[float, float]) -> float:
+    """Get doubled area of triangle."""
+    return abs((a[0] - c[0]) * (b[1] - a[1]) - (a[0] - b[0]) * (c[1] - a[1]))
+
+
+def points(bucket: List[Sequence], i: int) -> List[Tuple[float, Any, Sequence]]:
+    """Get `(timestamp, value, row)` of field `i` in bucket, nulls skipped."""
+    return [
+        (row[0].timestamp(), row[i + 1], row)
+        for row in bucket
+        if row[i + 1] is not None
+    ]
+
+
+def lttb(
+    buckets: Iterable[List[Sequence]], fields: List[str]
+) -> Iterator[Tuple[str, datetime, float]]:
+    """Largest-triangle-three-buckets, one point per bucket and field.
+
+    Every field's first and last values are always kept, buckets without
+    values of a field are skipped for it. A bucket is decided once the next
+    one arrives, so at most two buckets are held in memory.
+    """
+    # last kept point & candidates of undecided bucket, per field
+    selected = [None] * len(fields)
+    pending = [[] for _ in fields]
+
+    def select(i: int, candidates: List[Tuple], next_point: Tuple[float, float]):
+        t, value, row = max(candidates, key=lambda b: area(selected[i], b, next_point))
+        selected[i] = (t, value)
+        return fields[i], row[0], value
+
+    for bucket in buckets:
+        for i, field_name in enumerate(fields):
+            candidates = points(bucket, i)
+            if not candidates:
+                continue
+
+            if selected[i] is None:
+                t, value, row = candidates.pop(0)
+                selected[i] = (t, value)
+                yield field_name, row[0], value
+                if not candidates:
+                    continue
+
+            if pending[i]:
+                average = (
+                    sum(t for t, _, _ in candidates) / len(candidates),
+                    sum(v for _, v, _ in candidates) / len(candidates),
+                )
+                yield select(i, pending[i], average)
+            pending[i] = candidates
+
+    for i, field_name in enumerate(fields):
+        if not pending[i]:
+            continue
+        *body, (t, value, row) = pending[i]
+        if body:
+            yield select(i, body, (t, value))
+        yield field_name, row[0], value
+
+
+def minmax(
+    buckets: Iterable[List[Sequence]], fields: List[str]
+) -> Iterator[Tuple[str, datetime, float]]:
+    """Minimum & maximum per bucket and field, in time order, nulls skipped."""
+    for bucket in buckets:
+        for i, field_name in enumerate(fields):
+            candidates = points(bucket, i)
+            if not candidates:
+                continue
+            low = min(candidates, key=lambda point: point[1])
+            high = max(candidates, key=lambda point: point[1])
+            for _, value, row in sorted(
+                {id(low): low, id(high): high}.values(), key=lambda point: point[0]
+            ):
+                yield field_name, row[0], value
+
+
+def naive(ts: datetime) -> datetime:
+    """Get wall-clock time of timestamp, as compared with `__time` by crud."""
+    return ts.replace(tzinfo=None)
+
+
+def downsample(
+    rows: Iterable[Sequence],
+    fields: List[str],
+    start_at: datetime,
+    end_at: datetime,
+    points: int,
+    method: str,
+) -> Iterator[Tuple[str, datetime, float]]:
+    """Downsample time ordered `(ts, *fields)` rows to `points` per field."""
+    if method not in METHODS:
+        raise ValueError(f"Invalid method `{method}`. Valid methods are {METHODS}")
+    start_at, end_at = naive(start_at), naive(end_at)
+    if end_at <= start_at:
+        raise ValueError("end_at must be after start_at")
+
+    if method == "lttb":
+        return lttb(buckets(rows, start_at, end_at, max(points - 2, 1)), fields)
+    return minmax(buckets(rows, start_at, end_at, max(points // 2, 1)), fields)
@@ -0,0 +1,58 @@
+"""Filters module."""
+
+import operator
+from typing import Any, Iterable, List, Tuple, Type
+
+from pydantic import parse_obj_as
+from sqlmodel import SQLModel
+
+OPERATORS = {
+    "": operator.eq,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+}
+
+
+def projection(model: Type[SQLModel], fields: List[str]) -> List[str]:
+    """Get projected fields, comma separated values are split, all by default."""
+    fields = [name for value in fields for name in value.split(",") if name]
+    if not fields:
+        return list(model.__fields__)
+
+    for field_name in fields:
+        if field_name not in model.__fields__:
+            raise ValueError(
+                f"Invalid field `{field_name}`. Valid fields are "
+                f"{list(model.__fields__)}"
+            )
+    return list(dict.fromkeys(fields))
+
+
+def filters(model: Type[SQLModel], params: Iterable[Tuple[str, str]]) -> List[Any]:
+    """Get SQL filters of `field=`, `field__<gt|gte|lt|lte|in>=` query params.
+
+    Values are parsed as field types, `in` takes comma separated values.
+    """
+    clauses = []
+    for key, value in params:
+        name, suffix = key, ""
+        if key not in model.__fields__:
+            name, _, suffix = key.rpartition("__")
+        if name not in model.__fields__ or suffix not in (*OPERATORS, "in"):
+            raise ValueError(f"Invalid filter `{key}`")
+
+        type_ = model.__fields__[name].type_
+        column = getattr(model, name)
+        try:
+            if suffix == "in":
+                values = [parse_obj_as(type_, item) for item in value.split(",")]
+                clauses.append(column.in_(values))
+            else:
+                clauses.append(OPERATORS[suffix](column, parse_obj_as(type_, value)))
+        except ValueError:
+            raise ValueError(
+                f"Invalid `{key}` value `{value}`, expected {type_.__name__}"
+            )
+    return clauses
@@ -0,0 +1,191 @@
+"""Formats module."""
+
+import io
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Type
+
+import msgpack
+import orjson
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlmodel import SQLModel
+
+JSON = "application/json"
+ARROW = "application/vnd.apache.arrow.stream"
+MSGPACK = "application/msgpack"
+
+MEDIA_TYPES = {
+    JSON: JSON,
+    ARROW: ARROW,
+    MSGPACK: MSGPACK,
+    "application/x-msgpack": MSGPACK,
+    "application/*": JSON,
+    "*/*": JSON,
+}
+
+ARROW_TYPES = {
+    bool: pa.bool_(),
+    int: pa.int64(),
+    float: pa.float64(),
+    str: pa.string(),
+    datetime: pa.timestamp("us"),
+}
+
+
+def negotiate(accept: str | None) -> str | None:
+    """Get media type to respond with for `Accept` header, None if unsupported."""
+    if not accept:
+        return JSON
+
+    ranges = []
+    for index, value in enumerate(accept.split(",")):
+        media_type, *params = [part.strip() for part in value.split(";")]
+        quality = 1.0
+        for param in params:
+            key, _, number = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(number)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            ranges.append((-quality, index, media_type.lower()))
+
+    for _, _, media_type in sorted(ranges):
+        if media_type in MEDIA_TYPES:
+            return MEDIA_TYPES[media_type]
+    return None
+
+
+def content_type(header: str | None) -> str | None:
+    """Get media type of `Content-Type` header, None if unsupported."""
+    media_type = (header or JSON).split(";")[0].strip().lower()
+    if media_type.endswith("*"):
+        return None
+    return MEDIA_TYPES.get(media_type)
+
+
+def field_types(model: Type[SQLModel]) -> Dict[str, type]:
+    """Get types of model fields."""
+    return {name: field.type_ for name, field in model.__fields__.items()}
+
+
+def schema(types: Dict[str, type]) -> pa.Schema:
+    """Get arrow schema of `{name: type}` columns."""
+    return pa.schema(
+        [(name, ARROW_TYPES.get(type_, pa.string())) for name, type_ in types.items()]
+    )
+
+
+def table(
+    types: Dict[str, type], columns: List[Sequence], arrow_schema: pa.Schema
+) -> pa.Table:
+    """Get arrow table of columns, types without arrow type (e.g. UUID) as strings."""
+    return pa.Table.from_arrays(
+        [
+            pa.array(
+                column
+                if type_ in ARROW_TYPES
+                else [None if value is None else str(value) for value in column],
+                type=field.type,
+            )
+            for column, type_, field in zip(columns, types.values(), arrow_schema)
+        ],
+        schema=arrow_schema,
+    )
+
+
+def default(value: Any) -> Any:
+    """Encode values msgpack does not support."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+class Sink(io.RawIOBase):
+    """Write-only file, which hands over written bytes and keeps offsets."""
+
+    def __init__(self):
+        """Create sink instance."""
+        self.chunks = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        """Check whether sink is writable."""
+        return True
+
+    def write(self, data: bytes) -> int:
+        """Write data."""
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        """Get number of bytes written."""
+        return self.position
+
+    def take(self) -> bytes:
+        """Take bytes written since previous call."""
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def parquet(
+    types: Dict[str, type], partitions: Iterable[Sequence], compression: str = "zstd"
+) -> Iterator[bytes]:
+    """Encode cursor partitions as Parquet, one row group per partition."""
+    arrow_schema = schema(types)
+    sink = Sink()
+    with pq.ParquetWriter(
+        pa.PythonFile(sink, mode="w"), arrow_schema, compression=compression
+    ) as writer:
+        for rows in partitions:
+            writer.write_table(table(types, list(zip(*rows)), arrow_schema))
+            yield sink.take()
+    yield sink.take()
+
+
+def encode(media_type: str, types: Dict[str, type], rows: Sequence) -> bytes:
+    """Encode cursor rows of `{name: type}` columns.
+
+    Arrow & MessagePack are encoded column-wise, MessagePack body is a map of
+    column name to column values.
+    """
+    names = list(types)
+    if media_type == JSON:
+        return orjson.dumps([dict(zip(names, row)) for row in rows])
+
+    columns = list(zip(*rows)) or [()] * len(names)
+    if media_type == MSGPACK:
+        return msgpack.packb(
+            {name: list(column) for name, column in zip(names, columns)},
+            default=default,
+        )
+
+    arrow_schema = schema(types)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, arrow_schema) as writer:
+        writer.write_table(table(types, columns, arrow_schema))
+    return sink.getvalue().to_pybytes()
+
+
+def decode(media_type: str, body: bytes) -> List[dict]:
+    """Decode request body into rows.
+
+    MessagePack body is either a list of rows or a map of column name to
+    column values.
+    """
+    if media_type == ARROW:
+        return pa.ipc.open_stream(body).read_all().to_pylist()
+
+    if media_type == MSGPACK:
+        data = msgpack.unpackb(body)
+        if isinstance(data, dict):
+            data = [dict(zip(data, row)) for row in zip(*data.values())]
+    else:
+        data = orjson.loads(body)
+
+    if not isinstance(data, list):
+        raise ValueError("Body must be a list of rows")
+    return data
@@ -0,0 +1,66 @@
+"""Ids module."""
+
+import os
+import threading
+import time
+from typing import Callable
+from uuid import UUID, uuid4
+
+from app import settings
+
+
+def time_ordered(random_bits: int, pack: Callable[[int, int], int]) -> Callable:
+    """Create generator of time-ordered uids, monotonic within a process.
+
+    Uids start with 48 bits of unix milliseconds, followed by `random_bits`
+    random bits. Within a millisecond the random part is incremented, so
+    primary key index inserts are append-mostly.
+    """
+    state = {"ms": -1, "random": 0}
+    lock = threading.Lock()
+
+    def new_uid() -> UUID:
+        with lock:
+            ms = time.time_ns() // 1_000_000
+            if ms > state["ms"]:
+                # top random bit is left clear, room for increments
+                state["ms"] = ms
+                state["random"] = int.from_bytes(os.urandom(10), "big") >> (
+                    81 - random_bits
+                )
+            else:
+                state["random"] += 1
+                if state["random"] >> random_bits:
+                    state["ms"] += 1
+                    state["random"] = 0
+            return UUID(int=pack(state["ms"], state["random"]))
+
+    return new_uid
+
+
+def pack_uuid7(ms: int, random: int) -> int:
+    """Pack RFC 9562 UUIDv7, 12 random bits, version, variant & 62 random bits."""
+    return (
+        ms << 80
+        | 0x7 << 76
+        | (random >> 62) << 64
+        | 0b10 << 62
+        | random & ((1 << 62) - 1)
+    )
+
+
+def pack_ulid(ms: int, random: int) -> int:
+    """Pack ULID, 80 random bits."""
+    return ms << 80 | random
+
+
+uuid7 = time_ordered(74, pack_uuid7)
+ulid = time_ordered(80, pack_ulid)
+
+KINDS = {"uuid4": uuid4, "uuid7": uuid7, "ulid": ulid}
+
+if settings.uid_kind not in KINDS:
+    raise ValueError(
+        f"Invalid uid kind `{settings.uid_kind}`. Valid kinds are {list(KINDS)}"
+    )
+new_uid = KINDS[settings.uid_kind]
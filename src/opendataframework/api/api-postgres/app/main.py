@@ -4,9 +4,10 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app import settings
+from app.buffer import close
 from app.database import init_db
-from app.models import HealthCheck
 from app.router import entity_router
+from app.schemas import HealthCheck
 
 app = FastAPI(
     title=settings.project_name,
@@ -33,6 +34,12 @@ def startup_entity():
     init_db()
 
 
+@app.on_event("shutdown")
+async def shutdown():
+    """Flush write-behind buffers on shutdown."""
+    await close()
+
+
 @app.get("/", response_model=HealthCheck, tags=["status"])
 async def health_check():
     """Health check."""
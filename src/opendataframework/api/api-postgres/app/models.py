@@ -2,18 +2,12 @@
 
 from datetime import datetime
 from typing import Optional
-from uuid import uuid4
+from uuid import UUID
 
-from pydantic import BaseModel
+from sqlalchemy.dialects import postgresql
 from sqlmodel import Column, DateTime, Field, SQLModel
 
-
-class HealthCheck(BaseModel):
-    """Health check model."""
-
-    name: str
-    version: str
-    description: str
+from app.ids import new_uid
 
 
 class Entity(SQLModel, table=True):
@@ -21,8 +15,9 @@ class Entity(SQLModel, table=True):
 
     __tablename__ = "entities"
     # required fields
-    uid: Optional[str] = Field(
-        primary_key=True, index=True, default_factory=lambda: str(uuid4())
+    uid: Optional[UUID] = Field(
+        default_factory=new_uid,
+        sa_column=Column(postgresql.UUID(as_uuid=True), primary_key=True),
     )
     ts: datetime = Field(
         sa_column=Column("__time", DateTime),
@@ -1,48 +1,349 @@
 """Router module."""
 
+import asyncio
 import csv
+import json
 from datetime import datetime
 from io import BytesIO, StringIO
-from typing import List
+from typing import Any, Callable, List, Optional, Tuple
+from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import orjson
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
 from sqlmodel import Session
 
-from app.crud import get_entities, get_entity, post_entity
-from app.dependencies import get_session
+from app import settings
+from app.buffer import Buffer, BufferFull
+from app.cache import cache, respond
+from app.crud import (
+    get_entities,
+    get_entities_aggregate,
+    get_entities_downsample,
+    get_entities_partitions,
+    get_entities_rows,
+    get_entity,
+    post_entities,
+    post_entity,
+)
+from app.dependencies import get_read_session, get_session
+from app.filters import filters, projection
+from app.formats import JSON, content_type, decode, encode, negotiate, parquet
 from app.models import Entity
+from app.schemas import BatchSummary, LineError, StreamSummary
+from app.stream import ndjson_lines
 
 entity_router = APIRouter(prefix="/entities", tags=["entities"])
 
+buffer = (
+    Buffer(
+        Entity,
+        flush_ms=settings.write_behind_flush_ms,
+        max_rows=settings.write_behind_max_rows,
+        queue_size=settings.write_behind_queue_size,
+        timeout_ms=settings.write_behind_timeout_ms,
+    )
+    if settings.write_behind
+    else None
+)
+
+
+def query(request: Request, fields: List[str]) -> Tuple[List[str], List[Any]]:
+    """Get projected fields and filters of range read query params."""
+    params = [
+        (key, value)
+        for key, value in request.query_params.multi_items()
+        if key not in ("start_at", "end_at", "fields")
+    ]
+    try:
+        return projection(Entity, fields), filters(Entity, params)
+    except ValueError as error:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(error)
+        )
+
+
+def cached(
+    request: Request, key: Optional[str], media_type: str, read: Callable[[], bytes]
+) -> Response:
+    """Respond from cache by key, reading & caching body on a miss."""
+    entry = cache.get(key) if key else None
+    if entry is None:
+        body = read()
+        if key is None:
+            return Response(body, media_type=media_type)
+        entry = cache.set(key, media_type, body)
+    return respond(request, entry)
+
+
+def describe(error: Exception) -> str:
+    """Describe row validation error in one line."""
+    if isinstance(error, ValidationError):
+        return "; ".join(
+            f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in error.errors()
+        )
+    return str(error)
+
 
 @entity_router.post("/", response_model=Entity, status_code=status.HTTP_201_CREATED)
-def create_entity(entity: Entity, session: Session = Depends(get_session)):
-    """Create entity."""
-    entity = post_entity(entity, session)
+async def create_entity(entity: Entity, session: Session = Depends(get_session)):
+    """Create entity, group committed with others when write-behind is enabled."""
+    if buffer is None:
+        entity = await run_in_threadpool(post_entity, entity, session)
+    else:
+        try:
+            await buffer.put(entity)
+        except BufferFull as error:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=str(error),
+                headers={"Retry-After": "1"},
+            )
+
+    if cache:
+        await run_in_threadpool(cache.invalidate, Entity, [entity.ts])
     return entity
 
 
-@entity_router.get(
-    "/{entity_id}", response_model=Entity, status_code=status.HTTP_200_OK
+@entity_router.post(
+    "/stream", response_model=StreamSummary, status_code=status.HTTP_200_OK
+)
+async def create_entities_stream(
+    request: Request, session: Session = Depends(get_session)
+):
+    """Create entities from NDJSON body, inserted in batches while it arrives."""
+    summary = StreamSummary()
+
+    def fail(line: int, error: str):
+        summary.failed += 1
+        if len(summary.errors) < settings.stream_max_errors:
+            summary.errors.append(LineError(line=line, error=error))
+
+    async def insert(entities: List[Entity], lines: List[int]):
+        try:
+            await run_in_threadpool(post_entities, entities, session)
+            summary.created += len(entities)
+            if cache:
+                await run_in_threadpool(
+                    cache.invalidate, Entity, [entity.ts for entity in entities]
+                )
+        except SQLAlchemyError as error:
+            await run_in_threadpool(session.rollback)
+            for line in lines:
+                fail(line, str(getattr(error, "orig", error)))
+
+    # next batch is parsed while the previous one is inserted
+    inserting = None
+    entities, lines = [], []
+    async for line, data in ndjson_lines(
+        request.stream(), settings.stream_max_line_bytes
+    ):
+        if data is not None and not data.strip():
+            continue
+
+        summary.received += 1
+        if data is None:
+            fail(line, f"line exceeds {settings.stream_max_line_bytes} bytes")
+            continue
+
+        try:
+            entities.append(Entity.validate(json.loads(data)))
+            lines.append(line)
+        except (TypeError, ValueError) as error:
+            fail(line, describe(error))
+            continue
+
+        if len(entities) >= settings.stream_batch_rows:
+            if inserting:
+                await inserting
+            inserting = asyncio.create_task(insert(entities, lines))
+            entities, lines = [], []
+
+    if inserting:
+        await inserting
+    if entities:
+        await insert(entities, lines)
+
+    return summary
+
+
+@entity_router.post(
+    "/batch", response_model=BatchSummary, status_code=status.HTTP_201_CREATED
 )
-def read_entity(entity_id: str, session: Session = Depends(get_session)):
-    """Read entity."""
-    entity = get_entity(entity_id, session)
-    if entity is None:
+async def create_entities_batch(
+    request: Request, session: Session = Depends(get_session)
+):
+    """Create entities from JSON, Arrow IPC stream or MessagePack body."""
+    media_type = content_type(request.headers.get("content-type"))
+    if media_type is None:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="entity not found"
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="unsupported content type",
+        )
+
+    try:
+        rows = decode(media_type, await request.body())
+    except ValueError as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(error))
+
+    entities, errors = [], []
+    for i, row in enumerate(rows):
+        try:
+            entities.append(Entity.validate(row))
+        except (TypeError, ValueError) as error:
+            errors.append(LineError(line=i + 1, error=describe(error)).dict())
+    if errors:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=errors[: settings.stream_max_errors],
         )
-    return entity
+
+    await run_in_threadpool(post_entities, entities, session)
+    if cache:
+        await run_in_threadpool(
+            cache.invalidate, Entity, [entity.ts for entity in entities]
+        )
+    return BatchSummary(created=len(entities))
+
+
+@entity_router.get("/aggregate", status_code=status.HTTP_200_OK)
+def read_entities_aggregate(
+    start_at: datetime,
+    end_at: datetime,
+    bucket: str,
+    request: Request,
+    fields: List[str] = Query([]),
+    functions: List[str] = Query(["count"]),
+    session: Session = Depends(get_read_session),
+):
+    """Aggregate entities in time buckets, e.g. `bucket=15m&fields=x&functions=p95`.
+
+    Responds with JSON, Arrow IPC stream or MessagePack, per `Accept`.
+    """
+    media_type = negotiate(request.headers.get("accept"))
+    if media_type is None:
+        raise HTTPException(
+            status_code=status.HTTP_406_NOT_ACCEPTABLE, detail="unsupported accept"
+        )
+
+    try:
+        types, rows = get_entities_aggregate(
+            start_at,
+            end_at,
+            bucket,
+            fields,
+            functions,
+            settings.aggregate_max_buckets,
+            session,
+        )
+    except ValueError as error:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(error)
+        )
+    return Response(encode(media_type, types, rows), media_type=media_type)
+
+
+@entity_router.get("/downsample", status_code=status.HTTP_200_OK)
+def read_entities_downsample(
+    start_at: datetime,
+    end_at: datetime,
+    request: Request,
+    fields: List[str] = Query(...),
+    points: int = Query(1000, ge=3),
+    method: str = "lttb",
+    session: Session = Depends(get_read_session),
+):
+    """Downsample entities to `points` per field, by `lttb` or `minmax`.
+
+    Rows are `(field, ts, value)`, as JSON, Arrow IPC stream or MessagePack,
+    per `Accept`.
+    """
+    media_type = negotiate(request.headers.get("accept"))
+    if media_type is None:
+        raise HTTPException(
+            status_code=status.HTTP_406_NOT_ACCEPTABLE, detail="unsupported accept"
+        )
+
+    try:
+        types, rows = get_entities_downsample(
+            start_at,
+            end_at,
+            fields,
+            min(points, settings.downsample_max_points),
+            method,
+            session,
+            settings.downsample_batch_rows,
+        )
+    except ValueError as error:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(error)
+        )
+    return Response(encode(media_type, types, rows), media_type=media_type)
+
+
+@entity_router.get(
+    "/{entity_id}", response_model=Entity, status_code=status.HTTP_200_OK
+)
+def read_entity(
+    entity_id: UUID, request: Request, session: Session = Depends(get_session)
+):
+    """Read entity, conditional requests are answered from cache."""
+
+    def read() -> bytes:
+        entity = get_entity(entity_id, session)
+        if entity is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="entity not found"
+            )
+        return orjson.dumps({name: getattr(entity, name) for name in entity.__fields__})
+
+    key = cache.uid_key(Entity, entity_id, JSON) if cache else None
+    return cached(request, key, JSON, read)
 
 
 @entity_router.get("/", response_model=List[Entity], status_code=status.HTTP_200_OK)
 def read_entities(
-    start_at: datetime, end_at: datetime, session: Session = Depends(get_session)
+    start_at: datetime,
+    end_at: datetime,
+    request: Request,
+    fields: List[str] = Query([]),
+    session: Session = Depends(get_read_session),
 ):
-    """Read entities."""
-    entities = get_entities(start_at, end_at, session)
-    return entities
+    """Read entities as JSON, Arrow IPC stream or MessagePack, per `Accept`.
+
+    `fields` selects columns, other query params filter rows, e.g.
+    `name=x&value__gte=1&id__in=1,2`. Conditional requests are answered
+    from cache.
+    """
+    media_type = negotiate(request.headers.get("accept"))
+    if media_type is None:
+        raise HTTPException(
+            status_code=status.HTTP_406_NOT_ACCEPTABLE, detail="unsupported accept"
+        )
+
+    fields, filters = query(request, fields)
+
+    def read() -> bytes:
+        types, rows = get_entities_rows(start_at, end_at, session, fields, filters)
+        return encode(media_type, types, rows)
+
+    key = (
+        cache.range_key(Entity, start_at, end_at, request, media_type)
+        if cache
+        else None
+    )
+    return cached(request, key, media_type, read)
 
 
 @entity_router.get(
@@ -51,7 +352,7 @@ def read_entities(
     status_code=status.HTTP_200_OK,
 )
 def read_entities_csv(
-    start_at: datetime, end_at: datetime, session: Session = Depends(get_session)
+    start_at: datetime, end_at: datetime, session: Session = Depends(get_read_session)
 ):
     """Download entities csv."""
     entities = get_entities(start_at, end_at, session)
@@ -74,3 +375,37 @@ def read_entities_csv(
         media_type="text/csv",
         headers={"Content-Disposition": f"attachment; filename={filename}"},
     )
+
+
+@entity_router.get(
+    "/parquet/{start_at}/{end_at}/entities.parquet",
+    response_class=StreamingResponse,
+    status_code=status.HTTP_200_OK,
+)
+def read_entities_parquet(
+    start_at: datetime,
+    end_at: datetime,
+    request: Request,
+    fields: List[str] = Query([]),
+    session: Session = Depends(get_read_session),
+):
+    """Download entities parquet, streamed by row groups.
+
+    Takes the same `fields` and filters as reading entities.
+    """
+    fields, filters = query(request, fields)
+    types, partitions = get_entities_partitions(
+        start_at, end_at, session, settings.parquet_row_group_size, fields, filters
+    )
+
+    dt_frmt = "%m-%d-%Y_%H-%M-%S"
+    start_at_frmt = start_at.strftime(dt_frmt)
+    end_at_frmt = end_at.strftime(dt_frmt)
+
+    filename = f"{start_at_frmt}__{end_at_frmt}_entities.parquet"
+
+    return StreamingResponse(
+        parquet(types, partitions, settings.parquet_compression),
+        media_type="application/vnd.apache.parquet",
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
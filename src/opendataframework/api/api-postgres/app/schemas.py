@@ -0,0 +1,35 @@
+"""Schemas module."""
+
+from typing import List
+
+from pydantic import BaseModel
+
+
+class HealthCheck(BaseModel):
+    """Health check model."""
+
+    name: str
+    version: str
+    description: str
+
+
+class LineError(BaseModel):
+    """Line error model."""
+
+    line: int
+    error: str
+
+
+class StreamSummary(BaseModel):
+    """Stream summary model."""
+
+    received: int = 0
+    created: int = 0
+    failed: int = 0
+    errors: List[LineError] = []
+
+
+class BatchSummary(BaseModel):
+    """Batch summary model."""
+
+    created: int
@@ -0,0 +1,41 @@
+"""Stream module."""
+
+from typing import AsyncIterator, Tuple
+
+
+async def ndjson_lines(
+    chunks: AsyncIterator[bytes], max_line_bytes: int
+) -> AsyncIterator[Tuple[int, bytes | None]]:
+    """Split NDJSON body chunks into numbered lines as they arrive.
+
+    Lines longer than `max_line_bytes` are discarded while they arrive and
+    yielded as None, so memory is bounded by chunk and line size.
+    """
+    number = 0
+    pending = bytearray()
+    oversized = False
+
+    async for chunk in chunks:
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            if end == -1:
+                if not oversized:
+                    pending += chunk[start:]
+                    if len(pending) > max_line_bytes:
+                        oversized = True
+                        pending.clear()
+                break
+
+            number += 1
+            if not oversized:
+                pending += chunk[start:end]
+                oversized = len(pending) > max_line_bytes
+            yield number, None if oversized else bytes(pending)
+
+            pending.clear()
+            oversized = False
+            start = end + 1
+
+    if pending or oversized:
+        yield number + 1, None if oversized else bytes(pending)
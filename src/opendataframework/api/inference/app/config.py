@@ -12,3 +12,6 @@ class Settings(BaseSettings):
     project_name: str
     version: str
     description: str
+
+    # Models
+    models_memory_mb: int = 1024
@@ -1,19 +1,13 @@
 """Dependencies module."""
 
 import os
-import pickle
 from pathlib import Path
 
+from app.registry import registry
+
 MODEL_PATH = os.path.join(Path(__file__).parent, "model.pkl")
-INFERENCE_MODEL = None
 
 
 def get_inference():
     """Get inference model."""
-    global INFERENCE_MODEL
-
-    if INFERENCE_MODEL is None:
-        with open(MODEL_PATH, "rb") as file:
-            INFERENCE_MODEL = pickle.load(file)  # nosec
-
-    yield INFERENCE_MODEL
+    yield registry.get(MODEL_PATH)
@@ -4,8 +4,8 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app import settings
-from app.models import HealthCheck
 from app.router import inference_router
+from app.schemas import HealthCheck
 
 app = FastAPI(
     title=settings.project_name,
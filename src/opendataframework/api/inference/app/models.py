@@ -1,15 +1,8 @@
 """Models module."""
 
-from pydantic import BaseModel
-from sqlmodel import SQLModel
-
+from datetime import datetime  # noqa: F401
 
-class HealthCheck(BaseModel):
-    """Health check model."""
-
-    name: str
-    version: str
-    description: str
+from sqlmodel import SQLModel
 
 
 class Entity(SQLModel):
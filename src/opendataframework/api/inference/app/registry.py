@@ -0,0 +1,90 @@
+"""Registry module."""
+
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Any
+
+from app import settings
+
+
+class Registry:
+    """Registry of lazily loaded models.
+
+    Models are loaded on first use and kept while they fit into `memory`
+    bytes (pickle size is used as an estimate), least recently used models
+    are evicted first. A model is reloaded once its file content changes.
+    """
+
+    def __init__(self, memory: int):
+        """Create registry instance."""
+        self.memory = memory
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading = {}
+
+    @property
+    def size(self) -> int:
+        """Get estimated memory used by loaded models."""
+        return sum(entry["size"] for entry in self._models.values())
+
+    def cached(self, path: str, version: tuple) -> Any:
+        """Get loaded model of file version, None if not loaded."""
+        with self._lock:
+            entry = self._models.get(path)
+            if entry and entry["version"] == version:
+                self._models.move_to_end(path)
+                return entry["model"]
+            return None
+
+    def get(self, path: str) -> Any:
+        """Get model stored at path, loading or reloading it if needed.
+
+        A model is loaded by one thread at a time, others wait for it.
+        """
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+
+        model = self.cached(path, version)
+        if model is not None:
+            return model
+
+        with self._lock:
+            loading = self._loading.setdefault(path, threading.Lock())
+
+        with loading:
+            # loaded while waiting
+            model = self.cached(path, version)
+            if model is not None:
+                return model
+
+            with open(path, "rb") as file:
+                data = file.read()
+            digest = hashlib.sha256(data).hexdigest()
+
+            with self._lock:
+                entry = self._models.get(path)
+                if entry and entry["digest"] == digest:
+                    # touched, but content did not change
+                    entry["version"] = version
+                    self._models.move_to_end(path)
+                    return entry["model"]
+
+            model = pickle.loads(data)  # nosec
+
+            with self._lock:
+                self._models.pop(path, None)
+                while self._models and self.size + len(data) > self.memory:
+                    self._models.popitem(last=False)
+                self._models[path] = {
+                    "version": version,
+                    "digest": digest,
+                    "size": len(data),
+                    "model": model,
+                }
+            return model
+
+
+registry = Registry(memory=settings.models_memory_mb * 1024 * 1024)
@@ -0,0 +1,11 @@
+"""Schemas module."""
+
+from pydantic import BaseModel
+
+
+class HealthCheck(BaseModel):
+    """Health check model."""
+
+    name: str
+    version: str
+    description: str
@@ -5,9 +5,14 @@ import csv
 import json
 import logging
 import os
+import subprocess
+import threading
+import time
+from contextlib import contextmanager, nullcontext
 from datetime import datetime
 from time import sleep
-from typing import Set
+from typing import Callable, Set
+from uuid import UUID, uuid4
 
 import httpx
 
@@ -19,6 +24,87 @@ logging.getLogger("httpx").propagate = False
 
 
 API_URL = "http://0.0.0.0:{port}/api/v1/{entity}/"  # TODO: nginx url format
+BULK_LOAD_PATH = "platform/storage/postgres/bulk-load.conf"
+
+
+# kept identical to api-postgres app/ids.py, which is not importable from here
+def time_ordered(random_bits: int, pack: Callable[[int, int], int]) -> Callable:
+    """Create generator of time-ordered uids, monotonic within a process.
+
+    Uids start with 48 bits of unix milliseconds, followed by `random_bits`
+    random bits. Within a millisecond the random part is incremented, so
+    primary key index inserts are append-mostly.
+    """
+    state = {"ms": -1, "random": 0}
+    lock = threading.Lock()
+
+    def new_uid() -> UUID:
+        with lock:
+            ms = time.time_ns() // 1_000_000
+            if ms > state["ms"]:
+                # top random bit is left clear, room for increments
+                state["ms"] = ms
+                state["random"] = int.from_bytes(os.urandom(10), "big") >> (
+                    81 - random_bits
+                )
+            else:
+                state["random"] += 1
+                if state["random"] >> random_bits:
+                    state["ms"] += 1
+                    state["random"] = 0
+            return UUID(int=pack(state["ms"], state["random"]))
+
+    return new_uid
+
+
+def pack_uuid7(ms: int, random: int) -> int:
+    """Pack RFC 9562 UUIDv7, 12 random bits, version, variant & 62 random bits."""
+    return (
+        ms << 80
+        | 0x7 << 76
+        | (random >> 62) << 64
+        | 0b10 << 62
+        | random & ((1 << 62) - 1)
+    )
+
+
+def pack_ulid(ms: int, random: int) -> int:
+    """Pack ULID, 80 random bits."""
+    return ms << 80 | random
+
+
+UIDS = {
+    "uuid4": uuid4,
+    "uuid7": time_ordered(74, pack_uuid7),
+    "ulid": time_ordered(80, pack_ulid),
+}
+
+
+def map_row(row: dict, entity: dict, skip_cols: Set, new_uid: Callable = None) -> dict:
+    """Map csv row to API model, datetime fields are converted to isoformat.
+
+    With `new_uid`, rows get client-side uids.
+    """
+    row_mapped = {}
+    if new_uid:
+        row_mapped["uid"] = str(new_uid())
+    # rename fields to match api model (TODO?)
+    for field_name, value in row.items():
+        if field_name in skip_cols:
+            continue
+
+        try:
+            date_format = entity["fields"][field_name].split("datetime|")[1]
+        except IndexError:
+            date_format = None
+
+        if date_format:
+            timestamp = datetime.strptime(value, date_format)
+            row_mapped[field_name] = timestamp.isoformat()
+        else:
+            row_mapped[field_name] = value
+
+    return row_mapped
 
 
 def load_file(
@@ -29,6 +115,7 @@ def load_file(
     negative_path: str,
     skip_cols: Set = None,
     time_interval: int = 0,
+    new_uid: Callable = None,
 ):
     """Load file via API."""
     logging.info(f"Uploading {filepath}")
@@ -40,24 +127,11 @@ def load_file(
     with open(filepath, newline="") as csv_file:
         reader = csv.DictReader(csv_file)
         for i, row in enumerate(reader, start=1):
-            current_row = {k: v for k, v in row.items() if k not in skip_cols}
-            row_mapped = {}
-            # rename fields to match api model (TODO?)
-            for field_name, value in current_row.items():
-                try:
-                    date_format = entity["fields"][field_name].split("datetime|")[1]
-                except IndexError:
-                    date_format = None
-
-                if date_format:
-                    try:
-                        timestamp = datetime.strptime(value, date_format)
-                        row_mapped[field_name] = timestamp.isoformat()
-                    except ValueError as e:
-                        logging.error(f"{e} in [{filepath}], row {i}: {row}")
-                        break
-                else:
-                    row_mapped[field_name] = value
+            try:
+                row_mapped = map_row(row, entity, skip_cols, new_uid)
+            except ValueError as e:
+                logging.error(f"{e} in [{filepath}], row {i}: {row}")
+                row_mapped = {}
 
             if not row_mapped:
                 failed += 1
@@ -118,6 +192,151 @@ def load_file(
     )
 
 
+def stream_file(
+    filepath: str,
+    api_url: str,
+    entity: dict,
+    negative_path: str,
+    skip_cols: Set = None,
+    chunk_rows: int = 1000,
+    new_uid: Callable = None,
+):
+    """Load file via API stream endpoint, as NDJSON over one connection."""
+    logging.info(f"Streaming {filepath}")
+    if skip_cols is None:
+        skip_cols = set()
+
+    start_time = datetime.now()
+    skipped = set()
+
+    def lines():
+        with open(filepath, newline="") as csv_file:
+            reader = csv.DictReader(csv_file)
+            chunk = []
+            for i, row in enumerate(reader, start=1):
+                try:
+                    chunk.append(json.dumps(map_row(row, entity, skip_cols, new_uid)))
+                except ValueError as e:
+                    logging.error(f"{e} in [{filepath}], row {i}: {row}")
+                    skipped.add(i)
+                    # empty line keeps line numbers equal to row numbers
+                    chunk.append("")
+
+                if len(chunk) == chunk_rows:
+                    yield ("\n".join(chunk) + "\n").encode()
+                    chunk = []
+            if chunk:
+                yield ("\n".join(chunk) + "\n").encode()
+
+    stream_url = f"{api_url}stream"
+    try:
+        http_request = httpx.post(
+            stream_url,
+            content=lines(),
+            headers={"Content-Type": "application/x-ndjson"},
+            timeout=None,
+        )
+        http_request.raise_for_status()
+    except Exception as e:
+        logging.error(f"{e}. URL: {stream_url}")
+        return
+
+    summary = http_request.json()
+    for error in summary["errors"]:
+        logging.error(f"[{stream_url}] Row {error['line']}: {error['error']}")
+    if summary["failed"] > len(summary["errors"]):
+        logging.warning(
+            f"[{stream_url}] {summary['failed'] - len(summary['errors'])} "
+            "failed rows are not reported"
+        )
+
+    failed_rows = skipped | {error["line"] for error in summary["errors"]}
+    if failed_rows:
+        with open(filepath, newline="") as csv_file, open(
+            negative_path, "w", newline=""
+        ) as csvfile:
+            reader = csv.DictReader(csv_file)
+            writer = csv.DictWriter(csvfile, fieldnames=reader.fieldnames)
+            writer.writeheader()
+            for i, row in enumerate(reader, start=1):
+                if i in failed_rows:
+                    writer.writerow(row)
+
+    end_time = datetime.now()
+    total = summary["received"] + len(skipped)
+    logging.info(
+        f"File {filepath}. Status: Uploaded {summary['created']}/{total}. Time: {end_time - start_time}."  # noqa: E501
+    )
+
+
+def get_port(settings: dict, component: str, port: str) -> str:
+    """Get API port, consolidated services serve all entities on the lowest port."""
+    config = settings.get("config", {}).get(component, {})
+    if config.get("mode") != "consolidated":
+        return port
+
+    ports = [
+        details["layers"]["api"][component]["port"]
+        for details in settings["entities"].values()
+        if component in details.get("layers", {}).get("api", {})
+    ]
+    return min(ports, key=int)
+
+
+def read_conf(path: str) -> dict:
+    """Read `postgresql.conf` settings."""
+    profile = {}
+    with open(path) as file:
+        for line in file:
+            line = line.split("#")[0].strip()
+            if line:
+                name, value = line.split("=", 1)
+                profile[name.strip()] = value.strip().strip("'")
+    return profile
+
+
+def psql(container: str, commands: list, database: str = "postgres"):
+    """Run psql commands in Postgres container, each in its own transaction."""
+    args = ["docker", "exec", container, "psql", "-U", "postgres", "-d", database]
+    args += ["-v", "ON_ERROR_STOP=1"]
+    for command in commands:
+        args += ["-c", command]
+    subprocess.run(args, check=True, capture_output=True)
+
+
+@contextmanager
+def bulk_load(container: str, database: str, conf_path: str):
+    """Switch Postgres to bulk-load profile while ingesting.
+
+    The profile is reset afterwards, even on failure, and tables are analyzed
+    since autovacuum was off.
+    """
+    profile = read_conf(conf_path)
+    logging.info(f"Bulk-load profile: {profile}")
+    psql(
+        container,
+        [
+            *(
+                f"ALTER SYSTEM SET {name} = '{value}'"
+                for name, value in profile.items()
+            ),
+            "SELECT pg_reload_conf()",
+        ],
+    )
+    try:
+        yield
+    finally:
+        psql(
+            container,
+            [
+                *(f"ALTER SYSTEM RESET {name}" for name in profile),
+                "SELECT pg_reload_conf()",
+            ],
+        )
+        psql(container, ["ANALYZE"], database=database)
+        logging.info("Bulk-load profile reset")
+
+
 def main():
     """Main."""
     parser = argparse.ArgumentParser(description="opendataframework")
@@ -131,6 +350,20 @@ def main():
         help="Data folder",
     )
 
+    parser.add_argument(
+        "-s",
+        "--stream",
+        action="store_true",
+        help="Stream each file to api-postgres as NDJSON over one connection",
+    )
+
+    parser.add_argument(
+        "-b",
+        "--bulk-load",
+        action="store_true",
+        help="Switch Postgres to its bulk-load profile while ingesting, backfills",
+    )
+
     args = parser.parse_args()
     if args.data:
         if os.getcwd() in args.data:
@@ -151,28 +384,53 @@ def main():
         settings = json.load(file)
 
     entites = settings["entities"]
+    uid = settings.get("config", {}).get("api-postgres", {}).get("uid", "uuid4")
+    if uid not in UIDS:
+        raise ValueError(f"Invalid uid `{uid}`. Valid uids: {list(UIDS)}")
     folder_name = datetime.now().strftime("%Y%m%d-%H%M%S")
     successful_path = os.path.join(os.getcwd(), f"ingestion/{folder_name}/successful/")
     os.makedirs(successful_path)
     failed_path = os.path.join(os.getcwd(), f"ingestion/{folder_name}/failed/")
     os.makedirs(failed_path)
 
-    for entity in entites:
-        csv_path = f"{data_path}/{entity}.csv"
+    context = nullcontext()
+    if args.bulk_load:
+        context = bulk_load(
+            f"{settings['project']}_postgres",
+            settings["project"],
+            os.path.join(os.getcwd(), BULK_LOAD_PATH),
+        )
+
+    with context:
+        for entity in entites:
+            csv_path = f"{data_path}/{entity}.csv"
+
+            components = entites[entity].get("layers", {}).get("api", {})
+            for component, config in components.items():
+                port = config.get("port")
+                if not port:
+                    continue
+                port = get_port(settings, component, port)
+                api_url = API_URL.format(port=port, entity=entity)
+                new_uid = UIDS[uid] if component == "api-postgres" else None
+                if args.stream and component == "api-postgres":
+                    stream_file(
+                        csv_path,
+                        api_url,
+                        entites[entity],
+                        negative_path=f"{failed_path}/{entity}.csv",
+                        new_uid=new_uid,
+                    )
+                    continue
 
-        components = entites[entity].get("layers", {}).get("api", {})
-        for component, config in components.items():
-            port = config.get("port")
-            if not port:
-                continue
-            api_url = API_URL.format(port=port, entity=entity)
-            load_file(
-                csv_path,
-                api_url,
-                entites[entity],
-                positive_path=f"{successful_path}/{entity}.csv",
-                negative_path=f"{failed_path}/{entity}.csv",
-            )
+                load_file(
+                    csv_path,
+                    api_url,
+                    entites[entity],
+                    positive_path=f"{successful_path}/{entity}.csv",
+                    negative_path=f"{failed_path}/{entity}.csv",
+                    new_uid=new_uid,
+                )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,290 @@
+"""Load module.
+
+Loads entities into a columnar DuckDB database, optionally exported as Parquet
+partitions. Entities with api-postgres are copied from their Postgres tables,
+keeping `uid`, `__time` & fields, so range reads of api-postgres `api_reads`
+return the same rows. Other entities are loaded from their csv in the data
+folder, typed by settings.json `columns`, with generated `uid` & load time
+`__time`. Tables are sorted by time, so range scans skip row groups by their
+min/max.
+
+Loads copy the previous database file and append Postgres rows from its
+`max(__time)` on, so a reload reads new rows only and API range reads lag
+writes by about `--interval`. `__time` is assumed append-only like the
+rollups do, rows written with an earlier one & changed csv files are picked up
+by `--full` loads.
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import shutil
+import time
+from datetime import datetime
+from typing import Optional
+
+import duckdb
+
+logging.basicConfig(
+    format="%(asctime)s [%(levelname)s] %(message)s", level=logging.INFO
+)
+
+COMPONENT = "duckdb"
+API_COMPONENT = "api-postgres"
+
+# settings.json field types, for entities without `columns`
+FIELD_TYPES = {"int": "BIGINT", "float": "DOUBLE", "str": "VARCHAR"}
+
+
+def column_type(field_type: str, column: str = None) -> str:
+    """Get DuckDB type of settings.json field type or Postgres column type."""
+    if column == "TIMESTAMPTZ":
+        # stored as UTC, readers then need no time zone database
+        return "TIMESTAMP"
+    if column:
+        match = re.fullmatch(r"ENUM\((.+)\)", column)
+        if match:
+            values = ", ".join(f"'{value}'" for value in match[1].split(","))
+            return f"ENUM({values})"
+        return column
+    if field_type.startswith("datetime"):
+        return "TIMESTAMP"
+    return FIELD_TYPES.get(field_type, "VARCHAR")
+
+
+def from_postgres(entity: dict) -> bool:
+    """Check whether entity is copied from its api-postgres table."""
+    return API_COMPONENT in entity["layers"].get("api", {})
+
+
+def select(entity: dict) -> str:
+    """Get select list casting source columns to entity's types.
+
+    Postgres rows keep their `uid` & `__time`, csv rows get generated ones and
+    their varchar columns are parsed.
+    """
+    columns = entity.get("columns", {})
+    # uids as text, api-postgres' UUID type parses them
+    if from_postgres(entity):
+        expressions = ['"uid"::VARCHAR AS uid', '"__time"']
+    else:
+        expressions = ["uuid()::VARCHAR AS uid", "current_localtimestamp() AS __time"]
+    for field_name, field_type in entity["fields"].items():
+        type_ = column_type(field_type, columns.get(field_name))
+        value = f'"{field_name}"'
+        if field_type.startswith("datetime|") and not from_postgres(entity):
+            date_format = field_type.split("|", 1)[1].replace("'", "''")
+            value = f"strptime({value}, '{date_format}')"
+        expressions.append(f'CAST({value} AS {type_}) AS "{field_name}"')
+    return ", ".join(expressions)
+
+
+def order_by(entity: dict) -> str:
+    """Get sort column, `__time` of Postgres rows, else first datetime field."""
+    if from_postgres(entity):
+        return '"__time"'
+    for field_name, field_type in entity["fields"].items():
+        if field_type.startswith("datetime"):
+            return f'"{field_name}"'
+    return "__time"
+
+
+def source(plural_name: str, entity: dict, data_path: str) -> tuple:
+    """Get relation SQL & parameters of entity's rows."""
+    if from_postgres(entity):
+        return f'pg.public."{plural_name}"', []
+    names = ", ".join(f"'{field_name}'" for field_name in entity["fields"])
+    return (
+        f"read_csv(?, header = true, all_varchar = true, names = [{names}])",
+        [os.path.join(data_path, f"{plural_name}.csv")],
+    )
+
+
+def load_table(
+    connection: duckdb.DuckDBPyConnection,
+    plural_name: str,
+    entity: dict,
+    data_path: str,
+):
+    """Load entity's rows into a table, replacing previous load."""
+    relation, parameters = source(plural_name, entity, data_path)
+    connection.execute(
+        f'CREATE OR REPLACE TABLE "{plural_name}" AS '
+        f"SELECT {select(entity)} FROM {relation} ORDER BY {order_by(entity)}",
+        parameters,
+    )
+
+
+def table_exists(connection: duckdb.DuckDBPyConnection, plural_name: str) -> bool:
+    """Check whether previous load has entity's table."""
+    (count,) = connection.execute(
+        "SELECT count(*) FROM duckdb_tables() "
+        "WHERE database_name = current_database() AND table_name = ?",
+        [plural_name],
+    ).fetchone()
+    return count > 0
+
+
+def append_table(
+    connection: duckdb.DuckDBPyConnection, plural_name: str, entity: dict
+) -> Optional[datetime]:
+    """Append Postgres rows from table's `max(__time)` on, get that time.
+
+    Rows at the max are replaced, more may have been written at that time.
+    """
+    (since,) = connection.execute(
+        f'SELECT max("__time") FROM "{plural_name}"'
+    ).fetchone()
+    relation, parameters = source(plural_name, entity, "")
+    where = ""
+    if since is not None:
+        connection.execute(f'DELETE FROM "{plural_name}" WHERE "__time" = ?', [since])
+        where, parameters = 'WHERE "__time" >= ?', [since]
+    connection.execute(
+        f'INSERT INTO "{plural_name}" SELECT {select(entity)} FROM {relation} '
+        f"{where} ORDER BY {order_by(entity)}",
+        parameters,
+    )
+    return since
+
+
+def attach_postgres(connection: duckdb.DuckDBPyConnection, dsn: str, retries: int):
+    """Attach Postgres read-only, waiting for it to accept connections."""
+    connection.execute("LOAD postgres")
+    for attempt in range(retries + 1):
+        try:
+            dsn_literal = dsn.replace("'", "''")
+            connection.execute(
+                f"ATTACH '{dsn_literal}' AS pg (TYPE POSTGRES, READ_ONLY)"
+            )
+            return
+        except duckdb.Error as error:
+            if attempt == retries:
+                raise
+            logging.warning(f"Postgres is not available, retrying: {error}")
+            time.sleep(2)
+
+
+def export_parquet(
+    connection: duckdb.DuckDBPyConnection,
+    plural_name: str,
+    entity: dict,
+    parquet_path: str,
+    since: Optional[datetime] = None,
+):
+    """Export table as Parquet, partitioned by year & month of its sort column.
+
+    With `since`, only partitions from its month on are rewritten.
+    """
+    column = order_by(entity)
+    where, parameters = "", []
+    if since is not None:
+        where, parameters = f"WHERE {column} >= date_trunc('month', ?)", [since]
+    connection.execute(
+        f'COPY (SELECT *, year({column}) AS year, month({column}) AS month FROM "'
+        f"{plural_name}\" {where}) TO '{os.path.join(parquet_path, plural_name)}' "
+        "(FORMAT PARQUET, COMPRESSION ZSTD, PARTITION_BY (year, month), "
+        "OVERWRITE_OR_IGNORE)",
+        parameters,
+    )
+
+
+def load(settings: dict, args: argparse.Namespace, full: bool = True):
+    """Load entities into a new database file, then replace the previous one.
+
+    Unless `full`, the new file starts as a copy of the previous one and
+    Postgres tables are appended to.
+    """
+    database_path = os.path.join(args.output, f"{settings['project']}.duckdb")
+    # readers keep the previous file open until they reconnect
+    loading_path = f"{database_path}.loading"
+    if os.path.exists(loading_path):
+        os.remove(loading_path)
+    incremental = not full and os.path.exists(database_path)
+    if incremental:
+        shutil.copyfile(database_path, loading_path)
+
+    entities = {
+        plural_name: entity
+        for plural_name, entity in settings["entities"].items()
+        if COMPONENT in entity["layers"].get("storage", {})
+    }
+
+    with duckdb.connect(loading_path) as connection:
+        # TIMESTAMPTZ columns are converted to UTC TIMESTAMP
+        connection.execute("SET TimeZone = 'UTC'")
+        if any(from_postgres(entity) for entity in entities.values()):
+            dsn = args.postgres or (
+                f"host={settings['project']}_postgres port=5432 "
+                f"dbname={settings['project']} user=admin password=admin"
+            )
+            attach_postgres(connection, dsn, args.retries)
+
+        for plural_name, entity in entities.items():
+            start_time = time.perf_counter()
+            since = None
+            if incremental and table_exists(connection, plural_name):
+                if not from_postgres(entity):
+                    # csv files are loaded by full loads only
+                    continue
+                since = append_table(connection, plural_name, entity)
+            else:
+                load_table(connection, plural_name, entity, args.data)
+            (rows,) = connection.execute(
+                f'SELECT count(*) FROM "{plural_name}"'
+            ).fetchone()
+            logging.info(
+                f"Loaded {rows} rows of {plural_name} in "
+                f"{time.perf_counter() - start_time:.2f}s"
+            )
+
+            if args.parquet:
+                parquet_path = os.path.join(args.output, "parquet")
+                os.makedirs(parquet_path, exist_ok=True)
+                export_parquet(connection, plural_name, entity, parquet_path, since)
+                logging.info(f"Exported {plural_name} to {parquet_path}")
+
+    os.replace(loading_path, database_path)
+    logging.info(f"Database: {database_path}")
+
+
+def main():
+    """Load entities once, then append new rows every `--interval` seconds."""
+    parser = argparse.ArgumentParser(description="opendataframework")
+    parser.add_argument("-d", "--data", default="/data", help="Data folder")
+    parser.add_argument("-s", "--settings", default="/settings.json")
+    parser.add_argument("-o", "--output", default="/db", help="Output folder")
+    parser.add_argument(
+        "-p", "--parquet", action="store_true", help="Export Parquet partitions"
+    )
+    parser.add_argument(
+        "--postgres", help="Postgres connection string, project's by default"
+    )
+    parser.add_argument(
+        "-r", "--retries", type=int, default=30, help="Postgres connection retries"
+    )
+    parser.add_argument(
+        "-i", "--interval", type=int, default=0, help="Reload every seconds, 0: once"
+    )
+    parser.add_argument(
+        "-f", "--full", action="store_true", help="Copy Postgres tables in full"
+    )
+    args = parser.parse_args()
+
+    with open(args.settings, "r") as file:
+        settings = json.load(file)
+
+    load(settings, args, full=args.full)
+    while args.interval:
+        time.sleep(args.interval)
+        try:
+            load(settings, args, full=False)
+        except duckdb.Error:
+            # readers keep the previous load
+            logging.exception("Reload failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,30 @@
 """Tests for main module."""
 
+import json
 import os
+import re
 import shutil
 
 import pytest
 from opendataframework import __version__
 from opendataframework.__main__ import (
+    COMPONENTS,
     SRC_PATH,
+    UID,
     Component,
+    Disk,
     Entity,
     Field,
     Layer,
     Layout,
+    LinkMode,
     Profile,
     Project,
+    Storage,
     app,
     colorized_logo,
+    docker_compose,
+    services,
 )
 from typer.testing import CliRunner
 
@@ -168,6 +177,43 @@ def test_project_invalid_data_path(temp_dir):
         Project(name=TEST_PROJECT_NAME, path=TEMP_DIR)
 
 
+def test_project_invalid_link_mode(temp_dir):
+    """Tests project creation using invalid link mode."""
+    with pytest.raises(ValueError):
+        Project(name=TEST_PROJECT_NAME, path=TEMP_DIR, data=DATA_DIR, link_mode="move")
+
+
+@pytest.mark.parametrize(
+    "link_mode", [LinkMode.COPY, LinkMode.HARDLINK, LinkMode.REFLINK]
+)
+def test_project_link_mode(temp_dir, link_mode):
+    """Tests data files are placed into project using link mode."""
+    project = Project(
+        name=TEST_PROJECT_NAME, path=TEMP_DIR, data=DATA_DIR, link_mode=link_mode
+    )
+    data_path = os.path.join(project.path, "data", "events.csv")
+    with open(CSV_FILE) as src, open(data_path) as target:
+        assert src.read() == target.read()
+    if link_mode == LinkMode.HARDLINK:
+        assert os.stat(data_path).st_ino == os.stat(CSV_FILE).st_ino
+    else:
+        assert os.stat(data_path).st_ino != os.stat(CSV_FILE).st_ino
+
+
+def test_project_symlink_mode(temp_dir):
+    """Tests data files are not symlinked, `data/` is mounted into containers."""
+    project = Project(
+        name=TEST_PROJECT_NAME, path=TEMP_DIR, data=DATA_DIR, link_mode="symlink"
+    )
+    data_path = os.path.join(project.path, "data", "events.csv")
+    assert not os.path.islink(data_path)
+    # readable through a copy of `data/`, as in a container's bind mount
+    mount_path = os.path.join(TEMP_DIR, "mnt")
+    shutil.copytree(os.path.join(project.path, "data"), mount_path, symlinks=True)
+    with open(CSV_FILE) as src, open(os.path.join(mount_path, "events.csv")) as target:
+        assert src.read() == target.read()
+
+
 def test_project_attrs_initialize(temp_dir):
     """Tests initialized attrs on project creation."""
     path = os.path.join(TEMP_DIR, TEST_PROJECT_NAME)
@@ -254,6 +300,28 @@ def test_field_to_dict():
     assert field.to_dict() == {"value": "float"}
 
 
+def test_field_column_type():
+    """Tests field column type of observed values."""
+    field = Field()
+    field.field_name = "value"
+    field.field_type = "1"
+    for value in ("1", "-5", ""):
+        field.observe(value)
+    assert field.column_type() == "BIGINT"
+    assert field.column_type(narrow=True) == "INTEGER"
+    field.observe(str(2**40))
+    assert field.column_type(narrow=True) == "BIGINT"
+
+    field = Field()
+    field.field_name = "name"
+    field.field_type = "b"
+    for value in ("b", "a", "b", "a", "abcdefghi", "a"):
+        field.observe(value)
+    assert field.column_type() == "TEXT"
+    assert field.column_type(narrow=True) == "VARCHAR(32)"
+    assert field.column_type(enums=True) == "ENUM(a,abcdefghi,b)"
+
+
 def test_field_timestamp():
     """Tests timestamp field."""
     field = Field()
@@ -286,7 +354,10 @@ def test_entity_register():
     entity.read()
     assert entity.layers == {}
     entity.register(Layer.API, Component.API_POSTGRES)
-    assert entity.layers == {"api": {"api-postgres": {}}, "storage": {"postgres": {}}}
+    assert entity.layers == {
+        "api": {"api-postgres": {}},
+        "storage": {"postgres": {}, "pgbouncer": {}},
+    }
 
 
 def test_entity_register_invalid_layer():
@@ -319,6 +390,12 @@ def test_entity_to_dict():
                 "name": "str",
                 "value": "float",
             },
+            "columns": {
+                "id": "BIGINT",
+                "logged_at": "TIMESTAMPTZ",
+                "name": "TEXT",
+                "value": "DOUBLE PRECISION",
+            },
             "layers": {},
             "name": TEST_ENTITY_NAME,
         }
@@ -365,7 +442,7 @@ def test_project_register(temp_dir):
     }
     assert project.settings["opendataframework"] == __version__
     assert project.settings["project"] == project.name
-    assert project.settings["ports"] == {"postgres": "5432"}
+    assert project.settings["ports"] == {"postgres": "5432", "pgbouncer": "6432"}
 
 
 def test_project_to_json(temp_dir):
@@ -401,6 +478,12 @@ def test_project_from_json(temp_dir, settings):
                     "name": "str",
                     "value": "float",
                 },
+                "columns": {
+                    "id": "BIGINT",
+                    "logged_at": "TIMESTAMPTZ",
+                    "name": "TEXT",
+                    "value": "DOUBLE PRECISION",
+                },
                 "layers": {
                     "api": {
                         "api-postgres": {
@@ -409,6 +492,7 @@ def test_project_from_json(temp_dir, settings):
                     },
                     "storage": {
                         "postgres": {},
+                        "pgbouncer": {},
                     },
                 },
                 "name": TEST_ENTITY_NAME,
@@ -420,6 +504,7 @@ def test_project_from_json(temp_dir, settings):
         "opendataframework": __version__,
         "ports": {
             "postgres": "5432",
+            "pgbouncer": "6432",
         },
         "project": TEST_PROJECT_NAME,
         "volumes": {},
@@ -448,10 +533,942 @@ def test_project_create(temp_dir, settings):
 
     assert os.listdir(os.path.join(project.path, "platform")) == [
         "setup.sh",
+        "manifest.json",
         "docker-compose.yaml",
         "storage",
         "api",
     ]
 
     assert os.listdir(os.path.join(project.path, "platform", "api")) == ["api-postgres"]
-    assert os.listdir(os.path.join(project.path, "platform", "storage")) == ["postgres"]
+    assert sorted(os.listdir(os.path.join(project.path, "platform", "storage"))) == [
+        "pgbouncer",
+        "postgres",
+    ]
+
+
+def test_project_create_parallel(temp_dir):
+    """Tests project create with entities generated in parallel."""
+    project = Project(name=TEST_PROJECT_NAME, path=TEMP_DIR, data=DATA_DIR)
+    plural_names = [f"{TEST_ENTITY_PLURAL_NAME}_{i}" for i in range(8)]
+    for plural_name in plural_names:
+        entity = Entity(name=TEST_ENTITY_NAME, path=CSV_FILE)
+        entity.plural_name = plural_name
+        entity.read()
+        entity.register(Layer.API, Component.API_POSTGRES)
+        project.register(entity)
+    project.to_json()
+    project.create(workers=4)
+
+    api_path = os.path.join(project.path, "platform", "api", "api-postgres")
+    assert sorted(os.listdir(api_path)) == plural_names
+
+    with open(os.path.join(project.path, "platform", "docker-compose.yaml")) as file:
+        services = re.findall(r"^  (\S+):$", file.read(), re.MULTILINE)
+    assert services == [
+        *[f"{TEST_PROJECT_NAME}_{plural_name}" for plural_name in plural_names],
+        f"{TEST_PROJECT_NAME}_pgbouncer",
+        f"{TEST_PROJECT_NAME}_postgres",
+        f"{TEST_PROJECT_NAME}_default",
+    ]
+
+
+def test_project_create_incremental(temp_dir, settings):
+    """Tests incremental project create regenerates changed entities only."""
+    project = Project(name=TEST_PROJECT_NAME, path=TEMP_DIR)
+    project.create()
+
+    platform_path = os.path.join(project.path, "platform")
+    api_path = os.path.join(platform_path, "api", "api-postgres")
+    events_main = os.path.join(api_path, TEST_ENTITY_PLURAL_NAME, "app", "main.py")
+    mtime = os.stat(events_main).st_mtime_ns
+
+    entity = Entity(name="log", path=CSV_FILE)
+    entity.plural_name = "logs"
+    entity.read()
+    entity.register(Layer.API, Component.API_POSTGRES)
+    project.register(entity)
+    os.remove(os.path.join(project.path, "settings.json"))
+    project.to_json()
+
+    project = Project(name=TEST_PROJECT_NAME, path=TEMP_DIR)
+    project.create(incremental=True)
+
+    assert sorted(os.listdir(api_path)) == ["events", "logs"]
+    assert os.stat(events_main).st_mtime_ns == mtime
+    with open(os.path.join(platform_path, "docker-compose.yaml")) as file:
+        services = re.findall(r"^  (\S+):$", file.read(), re.MULTILINE)
+    assert services == [
+        f"{TEST_PROJECT_NAME}_events",
+        f"{TEST_PROJECT_NAME}_logs",
+        f"{TEST_PROJECT_NAME}_pgbouncer",
+        f"{TEST_PROJECT_NAME}_postgres",
+        f"{TEST_PROJECT_NAME}_default",
+    ]
+
+    del project.settings["entities"]["logs"]
+    os.remove(os.path.join(project.path, "settings.json"))
+    project.to_json()
+
+    project = Project(name=TEST_PROJECT_NAME, path=TEMP_DIR)
+    project.create(incremental=True)
+
+    assert os.listdir(api_path) == ["events"]
+    with open(os.path.join(platform_path, "docker-compose.yaml")) as file:
+        assert "logs" not in file.read()
+    with open(os.path.join(platform_path, "setup.sh")) as file:
+        assert file.read().count("#!/bin/bash") == 1
+
+
+def test_project_write_atomic(temp_dir):
+    """Tests failed write leaves previously written files untouched."""
+    path = os.path.join(TEMP_DIR, "setup.sh")
+    with open(path, "w") as file:
+        file.write("before")
+
+    with pytest.raises(OSError):
+        Project.write(
+            {path: "after", os.path.join(TEMP_DIR, "missing", "setup.sh"): "after"}
+        )
+
+    with open(path) as file:
+        assert file.read() == "before"
+    assert os.listdir(TEMP_DIR) == ["setup.sh"]
+
+
+def test_docker_compose(temp_dir, settings, monkeypatch):
+    """Tests `docker compose` runs once for all profiles and times services."""
+    project = Project(name=TEST_PROJECT_NAME, path=TEMP_DIR)
+    project.create()
+    platform_path = os.path.join(project.path, "platform")
+    compose_path = os.path.join(platform_path, "docker-compose.yaml")
+    assert services(compose_path) == [
+        f"{TEST_PROJECT_NAME}_{TEST_ENTITY_PLURAL_NAME}",
+        f"{TEST_PROJECT_NAME}_pgbouncer",
+        f"{TEST_PROJECT_NAME}_postgres",
+    ]
+
+    calls = []
+
+    class Process:
+        """Fake `docker compose` process."""
+
+        returncode = 0
+        stdout = [
+            f" Container {TEST_PROJECT_NAME}_postgres  Starting\n",
+            f" Container {TEST_PROJECT_NAME}_postgres  Started\n",
+        ]
+
+        def __init__(self, args, **kwargs):
+            """Record call."""
+            calls.append(args)
+
+        def __enter__(self):
+            """Enter context."""
+            return self
+
+        def __exit__(self, *args):
+            """Exit context."""
+
+    monkeypatch.setattr("subprocess.Popen", Process)
+    timings = docker_compose(platform_path, ["up", "-d"])
+
+    assert len(calls) == 1
+    assert calls[0][-2:] == ["up", "-d"]
+    assert calls[0].count("--profile") == len(COMPONENTS)
+    assert list(timings) == [f"{TEST_PROJECT_NAME}_postgres"]
+
+
+def test_project_create_consolidated(temp_dir):
+    """Tests project create with one API service for all entities."""
+    project = Project(name=TEST_PROJECT_NAME, path=TEMP_DIR, data=DATA_DIR)
+    for plural_name in ("events", "logs"):
+        entity = Entity(name=plural_name[:-1], path=CSV_FILE)
+        entity.plural_name = plural_name
+        entity.read()
+        entity.register(Layer.API, Component.API_POSTGRES)
+        project.register(entity)
+    project.settings["config"] = {
+        Component.API_POSTGRES: {"mode": "consolidated", "workers": 4}
+    }
+    project.to_json()
+    project.create()
+
+    api_path = os.path.join(project.path, "platform", "api", "api-postgres")
+    assert sorted(os.listdir(os.path.join(api_path, "app", "events"))) == [
+        "__init__.py",
+        "benchmark.py",
+        "crud.py",
+        "models.py",
+        "router.py",
+    ]
+    with open(os.path.join(api_path, "app", "events", "benchmark.py")) as file:
+        assert "python -m app.events.benchmark --requests" in file.read()
+    with open(os.path.join(api_path, "app", "main.py")) as file:
+        main = file.read()
+    assert "from app.events.router import event_router as events_router" in main
+    assert "app.include_router(logs_router, prefix=settings.api_v1_prefix)" in main
+
+    with open(os.path.join(project.path, "platform", "docker-compose.yaml")) as file:
+        compose = file.read()
+    assert re.findall(r"^  (\S+):$", compose, re.MULTILINE) == [
+        f"{TEST_PROJECT_NAME}_api-postgres",
+        f"{TEST_PROJECT_NAME}_pgbouncer",
+        f"{TEST_PROJECT_NAME}_postgres",
+        f"{TEST_PROJECT_NAME}_default",
+    ]
+    assert "- 8000:8000" in compose
+    assert "- WEB_CONCURRENCY=4" in compose
+    # workers would miss each other's invalidations of in-process caches
+    with open(os.path.join(api_path, ".env")) as file:
+        env = file.read()
+    assert "CACHE=False" in env
+    assert 'CACHE_URL=""' in env
+
+
+def test_project_create_consolidated_shared_cache(temp_dir):
+    """Tests project create with several API workers sharing a redis cache."""
+    project = Project(name=TEST_PROJECT_NAME, path=TEMP_DIR, data=DATA_DIR)
+    entity = Entity(name=TEST_ENTITY_NAME, path=CSV_FILE)
+    entity.plural_name = TEST_ENTITY_PLURAL_NAME
+    entity.read()
+    entity.register(Layer.API, Component.API_POSTGRES)
+    project.register(entity)
+    project.settings["config"] = {
+        Component.API_POSTGRES: {
+            "mode": "consolidated",
+            "workers": 4,
+            "cache_url": "redis://redis:6379/0",
+        }
+    }
+    project.to_json()
+    project.create()
+
+    api_path = os.path.join(project.path, "platform", "api", "api-postgres")
+    with open(os.path.join(api_path, ".env")) as file:
+        env = file.read()
+    assert "CACHE=True" in env
+    assert 'CACHE_URL="redis://redis:6379/0"' in env
+
+
+def test_project_create_consolidated_inference(temp_dir):
+    """Tests project create with one inference service for all entities."""
+    project = Project(name=TEST_PROJECT_NAME, path=TEMP_DIR, data=DATA_DIR)
+    for plural_name in ("events", "logs"):
+        entity = Entity(name=plural_name[:-1], path=CSV_FILE)
+        entity.plural_name = plural_name
+        entity.read()
+        entity.register(Layer.API, Component.INFERENCE)
+        project.register(entity)
+
+        model_path = os.path.join(project.path, "models", plural_name)
+        os.makedirs(model_path)
+        with open(os.path.join(model_path, "model.pkl"), "wb") as file:
+            file.write(plural_name.encode())
+        with open(os.path.join(model_path, "requirements.txt"), "w") as file:
+            file.write("scikit-learn==1.5.1\n")
+    project.settings["config"] = {
+        Component.INFERENCE: {"mode": "consolidated", "memory": 256}
+    }
+    project.to_json()
+    project.create()
+
+    api_path = os.path.join(project.path, "platform", "api", "inference")
+    assert sorted(os.listdir(os.path.join(api_path, "models"))) == ["events", "logs"]
+    with open(os.path.join(api_path, "models", "logs", "model.pkl"), "rb") as file:
+        assert file.read() == b"logs"
+    with open(os.path.join(api_path, "app", "logs", "router.py")) as file:
+        assert 'prefix="/inference/logs"' in file.read()
+    with open(os.path.join(api_path, "app", "logs", "dependencies.py")) as file:
+        assert '"models", "logs", "model.pkl"' in file.read()
+    with open(os.path.join(api_path, "app", "main.py")) as file:
+        main = file.read()
+    assert "from app.events.router import inference_router as events_router" in main
+    with open(os.path.join(api_path, "pyproject.toml")) as file:
+        assert file.read().count('scikit-learn = "1.5.1"') == 1
+    with open(os.path.join(api_path, ".env")) as file:
+        assert "MODELS_MEMORY_MB=256" in file.read()
+
+    with open(os.path.join(project.path, "platform", "docker-compose.yaml")) as file:
+        compose = file.read()
+    assert re.findall(r"^  (\S+):$", compose, re.MULTILINE) == [
+        f"{TEST_PROJECT_NAME}_inference",
+        f"{TEST_PROJECT_NAME}_default",
+    ]
+
+
+def test_project_create_write_behind(temp_dir, settings):
+    """Tests project create with write-behind enabled for API."""
+    project = Project(name=TEST_PROJECT_NAME, path=TEMP_DIR)
+    project.from_json()
+    project.settings["config"] = {Component.API_POSTGRES: {"write_behind": True}}
+    os.remove(os.path.join(project.path, "settings.json"))
+    project.to_json()
+    project.create()
+
+    env_path = os.path.join(
+        project.path,
+        "platform",
+        Layer.API,
+        Component.API_POSTGRES,
+        TEST_ENTITY_PLURAL_NAME,
+        ".env",
+    )
+    with open(env_path) as file:
+        assert "WRITE_BEHIND=True" in file.read()
+
+
+def test_project_create_indexes(temp_dir, settings):
+    """Tests project create with indexed fields for API."""
+    project = Project(name=TEST_PROJECT_NAME, path=TEMP_DIR)
+    project.from_json()
+    entity_settings = project.settings["entities"][TEST_ENTITY_PLURAL_NAME]
+    field_name = next(iter(entity_settings["fields"]))
+    entity_settings["layers"][Layer.API][Component.API_POSTGRES]["indexes"] = [
+        field_name,
+        "ts",
+    ]
+    os.remove(os.path.join(project.path, "settings.json"))
+    project.to_json()
+    project.create()
+
+    models_path = os.path.join(
+        project.path,
+        "platform",
+        Layer.API,
+        Component.API_POSTGRES,
+        TEST_ENTITY_PLURAL_NAME,
+        "app",
+        "models.py",
+    )
+    with open(models_path) as file:
+        text = file.read()
+    assert "index=True, nullable=False" in text
+    assert 'Column("__time", DateTime, index=True)' in text
+
+
+def test_project_create_uid(temp_dir, settings):
+    """Tests project create with time-ordered uids for API."""
+    project = Project(name=TEST_PROJECT_NAME, path=TEMP_DIR)
+    project.from_json()
+    project.settings["config"] = {Component.API_POSTGRES: {"uid": UID.UUID7}}
+    os.remove(os.path.join(project.path, "settings.json"))
+    project.to_json()
+    project.create()
+
+    env_path = os.path.join(
+        project.path,
+        "platform",
+        Layer.API,
+        Component.API_POSTGRES,
+        TEST_ENTITY_PLURAL_NAME,
+        ".env",
+    )
+    with open(env_path) as file:
+        assert f'UID_KIND="{UID.UUID7}"' in file.read()
+
+
+def test_project_create_postgres_profile(temp_dir, settings):
+    """Tests project create with Postgres profiles sized from host resources."""
+    project = Project(name=TEST_PROJECT_NAME, path=TEMP_DIR)
+    project.from_json()
+    project.settings["config"] = {
+        Component.POSTGRES: {"memory": 8192, "cpus": 8, "disk": Disk.HDD}
+    }
+    os.remove(os.path.join(project.path, "settings.json"))
+    project.to_json()
+    project.create()
+
+    postgres_path = os.path.join(
+        project.path, "platform", Layer.STORAGE, Component.POSTGRES
+    )
+    with open(os.path.join(postgres_path, "postgresql.conf")) as file:
+        conf = file.read()
+    assert "shared_buffers = 2048MB\n" in conf
+    assert "effective_cache_size = 6144MB\n" in conf
+    assert "work_mem = 5MB\n" in conf
+    assert "max_parallel_workers_per_gather = 4\n" in conf
+    assert "random_page_cost = 4\n" in conf
+
+    with open(os.path.join(postgres_path, "bulk-load.conf")) as file:
+        conf = file.read()
+    assert "synchronous_commit = off\n" in conf
+    assert "max_wal_size = 32768MB\n" in conf
+
+    with open(os.path.join(project.path, "platform", "docker-compose.yaml")) as file:
+        assert "shm_size: 2048m" in file.read()
+
+    with pytest.raises(ValueError):
+        Storage.postgres_profile({**project.config(Component.POSTGRES), "disk": "nvme"})
+
+
+def test_project_create_pgbouncer(temp_dir, settings):
+    """Tests project create with API connecting through the connection pooler."""
+    project = Project(name=TEST_PROJECT_NAME, path=TEMP_DIR)
+    project.from_json()
+    project.settings["config"] = {Component.PGBOUNCER: {"pool_size": 40}}
+    os.remove(os.path.join(project.path, "settings.json"))
+    project.to_json()
+    project.create()
+
+    platform_path = os.path.join(project.path, "platform")
+    ini_path = os.path.join(
+        platform_path, Layer.STORAGE, Component.PGBOUNCER, "pgbouncer.ini"
+    )
+    with open(ini_path) as file:
+        ini = file.read()
+    assert f"{TEST_PROJECT_NAME} = host=host.docker.internal port=5432" in ini
+    assert "pool_mode = transaction\n" in ini
+    assert "default_pool_size = 40\n" in ini
+    assert "max_db_connections = 45\n" in ini
+
+    env_path = os.path.join(
+        platform_path,
+        Layer.API,
+        Component.API_POSTGRES,
+        TEST_ENTITY_PLURAL_NAME,
+        ".env",
+    )
+    with open(env_path) as file:
+        assert "@host.docker.internal:6432/" in file.read()
+
+
+def test_project_create_without_pgbouncer(temp_dir, settings):
+    """Tests project create connects API directly without the pooler."""
+    project = Project(name=TEST_PROJECT_NAME, path=TEMP_DIR)
+    project.from_json()
+    del project.settings["entities"][TEST_ENTITY_PLURAL_NAME]["layers"][Layer.STORAGE][
+        Component.PGBOUNCER
+    ]
+    os.remove(os.path.join(project.path, "settings.json"))
+    project.to_json()
+    project.create()
+
+    platform_path = os.path.join(project.path, "platform")
+    assert os.listdir(os.path.join(platform_path, Layer.STORAGE)) == ["postgres"]
+    env_path = os.path.join(
+        platform_path,
+        Layer.API,
+        Component.API_POSTGRES,
+        TEST_ENTITY_PLURAL_NAME,
+        ".env",
+    )
+    with open(env_path) as file:
+        assert "@host.docker.internal:5432/" in file.read()
+
+
+def test_project_create_duckdb(temp_dir):
+    """Tests project create with DuckDB read path for Superset & API."""
+    project = Project(name=TEST_PROJECT_NAME, path=TEMP_DIR, data=DATA_DIR)
+    entity = Entity(name=TEST_ENTITY_NAME, path=CSV_FILE)
+    entity.plural_name = TEST_ENTITY_PLURAL_NAME
+    entity.read()
+    entity.register(Layer.API, Component.API_POSTGRES)
+    entity.register(Layer.STORAGE, Component.DUCKDB)
+    entity.register(Layer.ANALYTICS, Component.SUPERSET)
+    project.register(entity)
+    project.settings["config"] = {
+        Component.DUCKDB: {"api_reads": True, "parquet": True}
+    }
+    project.to_json()
+    project.create()
+
+    platform_path = os.path.join(project.path, "platform")
+    duckdb_path = os.path.join(platform_path, Layer.STORAGE, Component.DUCKDB)
+    assert sorted(os.listdir(duckdb_path)) == ["Dockerfile", "db", "load.py"]
+
+    with open(os.path.join(platform_path, "docker-compose.yaml")) as file:
+        compose = file.read()
+    assert "command: python load.py -p -i 300" in compose
+    assert compose.count("- ./storage/duckdb/db:/db:ro") == 2
+
+    env_path = os.path.join(
+        platform_path,
+        Layer.API,
+        Component.API_POSTGRES,
+        TEST_ENTITY_PLURAL_NAME,
+        ".env",
+    )
+    with open(env_path) as file:
+        env = file.read()
+    assert (
+        f'DB_READ_CONNECTION_STR="duckdb:////db/{TEST_PROJECT_NAME}.duckdb'
+        '?access_mode=read_only"'
+    ) in env
+    assert "CACHE_TTL_S=300" in env
+
+    provision_path = os.path.join(
+        platform_path, Layer.ANALYTICS, "superset", "provision.json"
+    )
+    with open(provision_path) as file:
+        provision = json.load(file)
+    assert {
+        "database_name": "DuckDB",
+        "schema": "main",
+        "table_name": TEST_ENTITY_PLURAL_NAME,
+        "cache_timeout": 300,
+    } in provision["datasets"]
+    assert any(
+        database.get("sqlalchemy_uri")
+        == f"duckdb:////db/{TEST_PROJECT_NAME}.duckdb?access_mode=read_only"
+        for database in provision["databases"]
+    )
+
+
+def test_project_create_rollups(temp_dir):
+    """Tests project create with rollup tables as Superset datasets."""
+    project = Project(name=TEST_PROJECT_NAME, path=TEMP_DIR, data=DATA_DIR)
+    entity = Entity(name=TEST_ENTITY_NAME, path=CSV_FILE)
+    entity.plural_name = TEST_ENTITY_PLURAL_NAME
+    entity.read()
+    entity.register(Layer.API, Component.API_POSTGRES)
+    entity.register(Layer.ANALYTICS, Component.SUPERSET)
+    project.register(entity)
+    project.to_json()
+    project.create()
+
+    platform_path = os.path.join(project.path, "platform")
+    rollups_path = os.path.join(platform_path, Layer.ANALYTICS, "superset", "rollups")
+    assert sorted(os.listdir(rollups_path)) == [
+        f"{TEST_ENTITY_PLURAL_NAME}.sql",
+        "refresh.sh",
+    ]
+    with open(os.path.join(rollups_path, f"{TEST_ENTITY_PLURAL_NAME}.sql")) as file:
+        sql = file.read()
+    for rollup in ("hourly", "daily"):
+        assert f'CREATE TABLE IF NOT EXISTS "{TEST_ENTITY_PLURAL_NAME}_{rollup}"' in sql
+    assert "date_trunc('hour', \"__time\")" in sql
+    assert 'sum("value_sum")' in sql
+    assert '"name_sum"' not in sql
+    assert sql.count('ON CONFLICT ("bucket") DO UPDATE SET') == 2
+
+    with open(os.path.join(platform_path, "setup.sh")) as file:
+        setup = file.read()
+    assert "analytics/superset/rollups/refresh.sh" in setup
+    # provisioned even if rollups fail
+    assert "&& python3 analytics/superset/provision.py" not in setup
+    assert "\npython3 analytics/superset/provision.py" in setup
+    with open(os.path.join(rollups_path, "refresh.sh")) as file:
+        assert "to_regclass('public.\\\"$entity\\\"')" in file.read()
+    provision_path = os.path.join(
+        platform_path, Layer.ANALYTICS, "superset", "provision.json"
+    )
+    with open(provision_path) as file:
+        provision = json.load(file)
+    assert [dataset["table_name"] for dataset in provision["datasets"]] == [
+        TEST_ENTITY_PLURAL_NAME,
+        f"{TEST_ENTITY_PLURAL_NAME}_hourly",
+        f"{TEST_ENTITY_PLURAL_NAME}_daily",
+    ]
+
+
+def test_project_create_superset_cache(temp_dir):
+    """Tests project create with Superset caches & async queries."""
+    project = Project(name=TEST_PROJECT_NAME, path=TEMP_DIR, data=DATA_DIR)
+    entity = Entity(name=TEST_ENTITY_NAME, path=CSV_FILE)
+    entity.plural_name = TEST_ENTITY_PLURAL_NAME
+    entity.read()
+    entity.register(Layer.API, Component.API_POSTGRES)
+    entity.register(Layer.ANALYTICS, Component.SUPERSET)
+    project.register(entity)
+    project.settings["config"] = {
+        Component.SUPERSET: {
+            "cache_url": "redis://redis:6379/1",
+            "cache_timeouts": {f"{TEST_ENTITY_PLURAL_NAME}_daily": 86400},
+        }
+    }
+    project.to_json()
+    project.create()
+
+    platform_path = os.path.join(project.path, "platform")
+    superset_path = os.path.join(platform_path, Layer.ANALYTICS, "superset")
+    assert "superset_config.py" in os.listdir(superset_path)
+    with open(os.path.join(superset_path, ".env")) as file:
+        env = file.read()
+    assert 'SUPERSET_CACHE_URL="redis://redis:6379/1"' in env
+    assert "SUPERSET_CACHE_TIMEOUT=300" in env
+    with open(os.path.join(platform_path, "docker-compose.yaml")) as file:
+        compose = file.read()
+    assert "celery_app:app worker" in compose
+    assert "--concurrency=2" in compose
+
+    with open(os.path.join(superset_path, "provision.json")) as file:
+        provision = json.load(file)
+    assert [database["allow_run_async"] for database in provision["databases"]] == [
+        True
+    ]
+    assert [dataset["cache_timeout"] for dataset in provision["datasets"]] == [
+        300,
+        3600,
+        86400,
+    ]
+
+
+def test_project_create_superset_sync(temp_dir):
+    """Tests project create with Superset queries run synchronously."""
+    project = Project(name=TEST_PROJECT_NAME, path=TEMP_DIR, data=DATA_DIR)
+    entity = Entity(name=TEST_ENTITY_NAME, path=CSV_FILE)
+    entity.plural_name = TEST_ENTITY_PLURAL_NAME
+    entity.read()
+    entity.register(Layer.STORAGE, Component.POSTGRES)
+    entity.register(Layer.ANALYTICS, Component.SUPERSET)
+    project.register(entity)
+    project.settings["config"] = {Component.SUPERSET: {"workers": 0}}
+    project.to_json()
+    project.create()
+
+    platform_path = os.path.join(project.path, "platform")
+    with open(os.path.join(platform_path, "docker-compose.yaml")) as file:
+        assert "celery" not in file.read()
+    provision_path = os.path.join(
+        platform_path, Layer.ANALYTICS, "superset", "provision.json"
+    )
+    with open(provision_path) as file:
+        provision = json.load(file)
+    assert provision["databases"][0]["database_name"] == "PostgreSQL"
+    assert "allow_run_async" not in provision["databases"][0]
+
+
+def test_superset_provision():
+    """Tests Superset provisioner against a stub Superset API."""
+    import importlib.util
+    import threading
+    import urllib.parse
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    spec = importlib.util.spec_from_file_location(
+        "provision", os.path.join(SRC_PATH, Layer.ANALYTICS, "superset", "provision.py")
+    )
+    provision = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(provision)
+
+    state = {"databases": [], "datasets": [], "failures": 1, "connections": set()}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def respond(self, status, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def body(self):
+            return json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+
+        def do_GET(self):
+            state["connections"].add(self.client_address)
+            assert self.headers["Authorization"] == "Bearer token"
+            path, _, query = self.path.partition("?")
+            resource = path.strip("/").split("/")[-1]
+            page, page_size = re.match(
+                r"\(page:(\d+),page_size:(\d+)\)",
+                urllib.parse.unquote(query.removeprefix("q=")),
+            ).groups()
+            start = int(page) * int(page_size)
+            objects = state[f"{resource}s"]
+            self.respond(
+                200,
+                {
+                    "count": len(objects),
+                    "result": objects[start : start + int(page_size)],
+                },
+            )
+
+        def do_POST(self):
+            state["connections"].add(self.client_address)
+            body = self.body()
+            if self.path == "/api/v1/security/login":
+                return self.respond(200, {"access_token": "token"})
+            with lock:
+                if self.path == "/api/v1/dataset/" and state["failures"]:
+                    state["failures"] -= 1
+                    return self.respond(503, {"message": "unavailable"})
+                resource = self.path.strip("/").split("/")[-1]
+                objects = state[f"{resource}s"]
+                body["id"] = len(objects) + 1
+                if resource == "dataset":
+                    body["database"] = {"id": body["database"]}
+                objects.append(body)
+            self.respond(201, {"id": body["id"], "result": body})
+
+        def do_PUT(self):
+            dataset_id = int(self.path.rsplit("/", 1)[1])
+            state["datasets"][dataset_id - 1].update(self.body())
+            self.respond(200, {"id": dataset_id})
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        database = {"database_name": "PostgreSQL", "expose_in_sqllab": True}
+        datasets = [
+            {
+                "database_name": "PostgreSQL",
+                "schema": "public",
+                "table_name": f"table_{i}",
+                "cache_timeout": 300,
+            }
+            for i in range(250)
+        ]
+        spec = {"databases": [database], "datasets": datasets}
+
+        client = provision.Client(f"http://127.0.0.1:{server.server_port}", backoff_s=0)
+        client.login("admin", "admin")
+        counts = provision.provision(client, spec, workers=4)
+        assert counts == {"databases": 1, "datasets": 250}
+        assert len(state["datasets"]) == 250
+        assert all(dataset["cache_timeout"] == 300 for dataset in state["datasets"])
+        # one keep-alive connection per thread, besides the login's
+        assert len(state["connections"]) <= 5
+
+        # existing databases & datasets are skipped, across pages
+        assert provision.provision(client, spec, workers=4) == {
+            "databases": 0,
+            "datasets": 0,
+        }
+        assert len(state["datasets"]) == 250
+
+        spec["datasets"][0]["database_name"] = "DuckDB"
+        with pytest.raises(provision.ProvisionError):
+            provision.provision(client, spec, workers=4)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_project_create_nginx_api(temp_dir):
+    """Tests project create with API services proxied & cached by nginx."""
+    project = Project(name=TEST_PROJECT_NAME, path=TEMP_DIR, data=DATA_DIR)
+    for plural_name in ("events", "logs"):
+        entity = Entity(name=plural_name[:-1], path=CSV_FILE)
+        entity.plural_name = plural_name
+        entity.read()
+        entity.register(Layer.API, Component.API_POSTGRES)
+        entity.register(Layer.API, Component.INFERENCE)
+        entity.register(Layer.UTILITY, Component.NGINX)
+        project.register(entity)
+
+        model_path = os.path.join(project.path, "models", plural_name)
+        os.makedirs(model_path)
+        with open(os.path.join(model_path, "model.pkl"), "wb") as file:
+            file.write(plural_name.encode())
+    project.settings["config"] = {
+        Component.API_POSTGRES: {"mode": "consolidated"},
+        Component.NGINX: {"cache_ttl": 2},
+    }
+    project.to_json()
+    project.create()
+
+    platform_path = os.path.join(project.path, "platform")
+    nginx_path = os.path.join(platform_path, Layer.UTILITY, Component.NGINX)
+    assert Layer.API not in os.listdir(nginx_path)
+    with open(os.path.join(nginx_path, "nginx.conf")) as file:
+        conf = file.read()
+    with open(os.path.join(platform_path, "docker-compose.yaml")) as file:
+        services = re.findall(r"^  (\S+):$", file.read(), re.MULTILINE)
+
+    upstreams = re.findall(r"server (\S+):8000 resolve;", conf)
+    assert sorted(upstreams) == [
+        f"{TEST_PROJECT_NAME}_api-postgres",
+        f"{TEST_PROJECT_NAME}_events_inference",
+        f"{TEST_PROJECT_NAME}_logs_inference",
+    ]
+    assert set(upstreams) <= set(services)
+    assert conf.count("keepalive 32;") == 3
+    assert (
+        "location /api/logs/ {\n"
+        f"        proxy_pass http://{TEST_PROJECT_NAME}_api-postgres/api/v1/logs/;"
+    ) in conf
+    assert (
+        "location /api/logs/inference/ {\n"
+        f"        proxy_pass http://{TEST_PROJECT_NAME}_logs_inference/api/v1/inference/;"
+    ) in conf
+    assert conf.count("proxy_cache_valid 200 2s;") == 2
+
+
+@pytest.fixture
+def api_app(monkeypatch):
+    """Import API `app` package, its dependencies are optional here."""
+    import importlib
+    import sys
+
+    for module in ("dotenv", "fastapi", "msgpack", "sqlmodel"):
+        pytest.importorskip(module)
+    monkeypatch.syspath_prepend(os.path.join(SRC_PATH, Layer.API, "api-postgres"))
+    monkeypatch.setenv("ENV_FILE", os.devnull)
+    for name, value in {
+        "API_V1_PREFIX": "/api/v1",
+        "DEBUG": "False",
+        "PROJECT_NAME": TEST_PROJECT_NAME,
+        "VERSION": "0.1.0",
+        "DESCRIPTION": "",
+        "DB_CONNECTION_STR": "sqlite://",
+    }.items():
+        monkeypatch.setenv(name, value)
+    yield importlib.import_module
+    for name in [name for name in sys.modules if name.split(".")[0] == "app"]:
+        del sys.modules[name]
+
+
+def test_cache(api_app):
+    """Tests API cache keys, invalidation & conditional requests."""
+    from datetime import datetime, timedelta, timezone
+
+    from sqlmodel import Field as ModelField
+    from sqlmodel import SQLModel
+    from starlette.requests import Request
+
+    cache = api_app("app.cache")
+
+    class Row(SQLModel, table=True):
+        """Cached model."""
+
+        __tablename__ = "cache_rows"
+        uid: int = ModelField(primary_key=True)
+
+    def request(headers: dict = None) -> Request:
+        return Request(
+            {
+                "type": "http",
+                "query_string": b"fields=value",
+                "headers": [
+                    (name.encode(), value.encode())
+                    for name, value in (headers or {}).items()
+                ],
+            }
+        )
+
+    instance = cache.Cache(cache.Memory(1024), bucket_s=3600, max_buckets=24, ttl_s=60)
+    start_at = datetime(2024, 1, 1, 10)
+    end_at = start_at + timedelta(hours=2)
+    # `__time` is compared with the bounds' wall-clock time
+    aware = timezone(timedelta(hours=2))
+    keys = [
+        instance.range_key(Row, start, end, request(), "application/json")
+        for start, end in (
+            (start_at, end_at),
+            (start_at.replace(tzinfo=aware), end_at.replace(tzinfo=aware)),
+        )
+    ]
+    assert keys[0] == keys[1]
+
+    # writes outside the range keep its key, writes inside change it
+    instance.invalidate(Row, [end_at + timedelta(hours=1)])
+    assert instance.range_key(Row, start_at, end_at, request(), "json") == (
+        instance.range_key(Row, start_at, end_at, request(), "json")
+    )
+    for written in (start_at + timedelta(minutes=30), f"{end_at.isoformat()}+05:00"):
+        key = instance.range_key(Row, start_at, end_at, request(), "json")
+        instance.invalidate(Row, [written])
+        assert instance.range_key(Row, start_at, end_at, request(), "json") != key
+    key = instance.range_key(
+        Row,
+        start_at.replace(tzinfo=aware),
+        end_at.replace(tzinfo=aware),
+        request(),
+        "json",
+    )
+    instance.invalidate(Row, [start_at + timedelta(hours=1)])
+    assert key != instance.range_key(
+        Row,
+        start_at.replace(tzinfo=aware),
+        end_at.replace(tzinfo=aware),
+        request(),
+        "json",
+    )
+
+    # ranges over too many buckets are not cached
+    assert (
+        instance.range_key(
+            Row, start_at, start_at + timedelta(hours=24), request(), "json"
+        )
+        is None
+    )
+
+    entry = instance.set(key, "application/json", b"[]")
+    assert instance.get(key) == entry
+    assert cache.fresh(request({"if-none-match": entry.etag}), entry)
+    assert cache.fresh(request({"if-none-match": f'W/{entry.etag}, "x"'}), entry)
+    assert not cache.fresh(request({"if-none-match": '"x"'}), entry)
+    assert cache.fresh(request({"if-modified-since": entry.last_modified}), entry)
+    assert not cache.fresh(request(), entry)
+    assert cache.respond(request({"if-none-match": "*"}), entry).status_code == 304
+    assert cache.respond(request(), entry).body == b"[]"
+
+
+def test_downsample_aware_bounds_and_nulls():
+    """Tests API downsampling with time zone aware bounds & null values."""
+    import importlib.util
+    from datetime import datetime, timedelta, timezone
+
+    spec = importlib.util.spec_from_file_location(
+        "downsample",
+        os.path.join(
+            SRC_PATH, Layer.API, Component.API_POSTGRES, "app", "downsample.py"
+        ),
+    )
+    downsample = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(downsample)
+
+    start_at = datetime(2024, 1, 1)
+    # `__time` values are naive, nulls in every third value & second half
+    rows = [
+        (
+            start_at + timedelta(minutes=i),
+            None if i % 3 == 0 else float(i % 7),
+            None if i >= 50 else i,
+        )
+        for i in range(100)
+    ]
+    end_at = start_at + timedelta(minutes=100)
+    for method in downsample.METHODS:
+        points = list(
+            downsample.downsample(
+                rows,
+                ["value", "count"],
+                start_at.replace(tzinfo=timezone.utc),
+                end_at.replace(tzinfo=timezone.utc),
+                10,
+                method,
+            )
+        )
+        assert all(value is not None for _, _, value in points)
+        counts = [ts for field_name, ts, _ in points if field_name == "count"]
+        assert counts and max(counts) <= rows[49][0]
+        assert {field_name for field_name, _, _ in points} == {"value", "count"}
+
+    # first & last values of every field are kept
+    points = downsample.downsample(
+        rows, ["value", "count"], start_at, end_at, 10, "lttb"
+    )
+    counts = [ts for field_name, ts, _ in points if field_name == "count"]
+    assert (counts[0], counts[-1]) == (rows[0][0], rows[49][0])
+
+
+def test_ingest_uids_match_api():
+    """Tests ingest.py uid generators are the same as the API's."""
+    import ast
+
+    def functions(path: str) -> dict:
+        with open(path) as file:
+            tree = ast.parse(file.read())
+        return {
+            node.name: ast.dump(node)
+            for node in tree.body
+            if isinstance(node, ast.FunctionDef)
+            and node.name in {"time_ordered", "pack_uuid7", "pack_ulid"}
+        }
+
+    ingest = functions(os.path.join(SRC_PATH, Layer.API, "ingest.py"))
+    ids = functions(
+        os.path.join(SRC_PATH, Layer.API, Component.API_POSTGRES, "app", "ids.py")
+    )
+    assert len(ingest) == 3
+    assert ingest == ids